@@ -0,0 +1,326 @@
+"""Download throughput benchmark against a local bandwidth-shaped server.
+
+A local server (its own process) hands out synthetic MP4 and JPEG files of
+the requested sizes with a per-connection bandwidth cap, a response delay,
+Range support and randomly dropped connections. The files are downloaded by
+three drivers, each at every concurrency level and chunk size:
+
+    downloader    Downloader.download_video, one thread per concurrent file
+    video-worker  DownloadWorker, the Videos Search download button
+    photo-worker  PhotoDownloadWorker, the Stock Photos download button
+
+The two workers go through the shared download path (batch.download and
+DownloadManager). They are given a fresh manager with max_workers and
+per_host set to the concurrency level, the download index turned off and
+history in a temporary directory.
+
+Every configuration runs in a fresh process, so its CPU time and peak RSS
+are its own. Reported: MB/s, files/s, CPU ms per MB downloaded, peak RSS,
+and files that failed or came out with the wrong content.
+
+    python benchmarks/download_benchmark.py [--concurrency 1 4 8] [--chunk-kb 8 64 256]
+        [--videos 4 --video-mb 40] [--photos 40 --photo-kb 800]
+        [--bandwidth 20] [--latency 30] [--drop 0.02] [--json results.json]
+"""
+import argparse
+import json
+import multiprocessing
+import queue
+import random
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DRIVERS = ('downloader', 'video-worker', 'photo-worker')
+# Seconds between checks that a configuration's process is still alive
+POLL = 1.0
+
+# File bytes are a header followed by a repeating pattern, so any byte
+# range can be produced, and checked, without keeping files around
+HEADERS = {
+    'mp4': b'\x00\x00\x00\x20ftypisom\x00\x00\x02\x00isomiso2avc1mp41',
+    'jpg': b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00',
+}
+PATTERN = bytes(range(256)) * 4099
+SEND_BLOCK = 64 * 1024
+
+
+def file_bytes(ext: str, start: int, end: int) -> bytes:
+    # Bytes start..end (inclusive) of a synthetic file
+    header = HEADERS[ext]
+    out = bytearray()
+    position = start
+    if position < len(header):
+        out += header[position:end + 1]
+        position = len(header)
+    while position <= end:
+        offset = position % len(PATTERN)
+        piece = PATTERN[offset:offset + end + 1 - position]
+        out += piece
+        position += len(piece)
+    return bytes(out)
+
+
+class ShapedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, bandwidth: float, latency: float, drop: float, seed: int = 1):
+        super().__init__(('127.0.0.1', 0), _ShapedHandler)
+        # Bytes per second per connection, 0 for no cap
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.drop = drop
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients hang up early on purpose (segmented downloads, retries)
+        if not isinstance(sys.exc_info()[1], (ConnectionError, socket.timeout)):
+            super().handle_error(request, client_address)
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+
+class _ShapedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # /<size>/<name>.<ext>
+        match = re.match(r'^/(\d+)/[\w-]+\.(mp4|jpg)$', self.path)
+        if not match:
+            self.send_error(404)
+            return
+        size, ext = int(match.group(1)), match.group(2)
+        time.sleep(self.server.latency)
+
+        start, end = 0, size - 1
+        ranged = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if ranged:
+            start = int(ranged.group(1))
+            end = min(int(ranged.group(2)), size - 1) if ranged.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4' if ext == 'mp4' else 'image/jpeg')
+        self.send_header('Content-Length', str(end + 1 - start))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+        # A dropped connection stops somewhere in the body
+        cut = end + 1
+        if self.server.roll() < self.server.drop:
+            cut = start + int((end + 1 - start) * self.server.roll())
+
+        sent, started = 0, time.monotonic()
+        position = start
+        while position < cut:
+            block_end = min(position + SEND_BLOCK, cut) - 1
+            self.wfile.write(file_bytes(ext, position, block_end))
+            sent += block_end + 1 - position
+            position = block_end + 1
+            if self.server.bandwidth:
+                ahead = sent / self.server.bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        if cut <= end:
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+
+
+def serve(bandwidth, latency, drop, ports):
+    server = ShapedServer(bandwidth, latency, drop)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _files(base_url, args, kind):
+    if kind == 'videos':
+        size, count, ext = int(args['video_mb'] * 1024 * 1024), args['videos'], 'mp4'
+    else:
+        size, count, ext = int(args['photo_kb'] * 1024), args['photos'], 'jpg'
+    return [{'id': f"{kind}-{n}", 'source': 'Bench', 'size': size, 'ext': ext,
+             'url': f"{base_url}/{size}/{kind}-{n}.{ext}"} for n in range(count)]
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def run_one(driver, concurrency, chunk_size, base_url, args, results):
+    # Runs in its own process
+    from src.services import batch
+    from src.services.download_manager import DownloadManager
+    from src.services.downloader import Downloader
+    from src.utils.logger import logger
+    from src.utils.persistence import PersistenceManager
+
+    # Retries after dropped connections are expected here
+    logger.setLevel('ERROR')
+    files = _files(base_url, args, 'photos' if driver == 'photo-worker' else 'videos')
+    save_path = Path(tempfile.mkdtemp(prefix='dlbench-'))
+
+    if driver != 'downloader':
+        batch.download_manager = DownloadManager(max_workers=concurrency, per_host=concurrency,
+                                                 chunk_size=chunk_size, index=None)
+        batch.persistence = PersistenceManager(save_path / '.history')
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    if driver == 'downloader':
+        downloader = Downloader(save_path, chunk_size=chunk_size)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda f: downloader.download_video(f['url'], f"{f['id']}.{f['ext']}"), files))
+    elif driver == 'video-worker':
+        from src.ui.widgets.search_view import DownloadWorker
+        worker = DownloadWorker([dict(f, download_url=f['url']) for f in files], save_path)
+        worker.start()
+        worker.wait()
+    else:
+        from src.ui.widgets.images_view import PhotoDownloadWorker
+        worker = PhotoDownloadWorker(files, save_path)
+        worker.start()
+        worker.wait()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    # Checked after the clock stops; names differ between the drivers
+    done, bad, total_bytes = 0, 0, 0
+    for path in save_path.iterdir():
+        if not path.is_file() or path.suffix not in ('.mp4', '.jpg'):
+            continue
+        size = path.stat().st_size
+        intact = size == files[0]['size']
+        with open(path, 'rb') as f:
+            position = 0
+            while intact and position < size:
+                block = f.read(1024 * 1024)
+                intact = block == file_bytes(path.suffix[1:], position, position + len(block) - 1)
+                position += len(block)
+        done += intact
+        bad += not intact
+        total_bytes += size
+    shutil.rmtree(save_path, ignore_errors=True)
+
+    mb = total_bytes / 1024 / 1024
+    results.put({
+        'driver': driver, 'concurrency': concurrency, 'chunk_kb': chunk_size // 1024,
+        'files': done, 'failed': len(files) - done, 'corrupt': bad, 'mb': round(mb, 1),
+        'seconds': round(wall, 2), 'mb_s': round(mb / wall, 1), 'files_s': round(done / wall, 1),
+        'cpu_ms_per_mb': round(cpu * 1000 / mb, 1) if mb else None,
+        'peak_rss_mb': _peak_rss_mb(),
+    })
+
+
+def _wait_for(run, results):
+    # The configuration's row, or None once its process died without one
+    # (a failed import, a full disk, ...); its traceback is on stderr
+    while True:
+        try:
+            row = results.get(timeout=POLL)
+        except queue.Empty:
+            if run.is_alive():
+                continue
+            # It may have put its row just before exiting
+            try:
+                row = results.get(timeout=POLL)
+            except queue.Empty:
+                run.join()
+                return None
+        run.join()
+        return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--drivers', nargs='*', choices=DRIVERS, default=list(DRIVERS))
+    parser.add_argument('--concurrency', nargs='*', type=int, default=[1, 4, 8])
+    parser.add_argument('--chunk-kb', nargs='*', type=int, default=[8, 64, 256])
+    parser.add_argument('--videos', type=int, default=4)
+    parser.add_argument('--video-mb', type=float, default=40, help='40 MB and up is fetched in segments')
+    parser.add_argument('--photos', type=int, default=40)
+    parser.add_argument('--photo-kb', type=float, default=800)
+    parser.add_argument('--bandwidth', type=float, default=20, help='MB/s per connection, 0 for no cap')
+    parser.add_argument('--latency', type=float, default=30, help='response delay, ms')
+    parser.add_argument('--drop', type=float, default=0.02, help='share of responses cut off mid-body')
+    parser.add_argument('--json', help='also write the results here')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    ports = ctx.Queue()
+    server = ctx.Process(target=serve, daemon=True,
+                         args=(args.bandwidth * 1024 * 1024, args.latency / 1000, args.drop, ports))
+    server.start()
+    base_url = f"http://127.0.0.1:{ports.get(timeout=30)}"
+    print(f"server {base_url}  {args.bandwidth:g} MB/s per connection  {args.latency:g} ms  "
+          f"drop {args.drop:.0%}\n")
+
+    columns = ['driver', 'concurrency', 'chunk_kb', 'files', 'failed', 'mb', 'seconds',
+               'mb_s', 'files_s', 'cpu_ms_per_mb', 'peak_rss_mb']
+    print(f"{'driver':<14}" + ''.join(f"{c:>14}" for c in columns[1:]))
+    rows = []
+    failures = 0
+    settings = {k: getattr(args, k) for k in ('videos', 'video_mb', 'photos', 'photo_kb')}
+    try:
+        for driver in args.drivers:
+            for concurrency in args.concurrency:
+                for chunk_kb in args.chunk_kb:
+                    results = ctx.Queue()
+                    run = ctx.Process(target=run_one, args=(driver, concurrency, chunk_kb * 1024,
+                                                            base_url, settings, results))
+                    run.start()
+                    row = _wait_for(run, results)
+                    if row is None:
+                        print(f"{driver:<14}{concurrency:>14}{chunk_kb:>14}  failed: process exited with "
+                              f"code {run.exitcode} before reporting", flush=True)
+                        failures += 1
+                        continue
+                    rows.append(row)
+                    cells = [f"{row[c]:.0f}" if c == 'peak_rss_mb' and row[c] is not None else row[c]
+                             for c in columns[1:]]
+                    line = f"{driver:<14}" + ''.join(f"{'-' if v is None else v:>14}" for v in cells)
+                    if row['corrupt']:
+                        line += f"  ({row['corrupt']} corrupt)"
+                    print(line, flush=True)
+    finally:
+        server.terminate()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'settings': vars(args), 'results': rows}, indent=2),
+                                   encoding='utf-8')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
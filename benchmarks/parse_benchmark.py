@@ -0,0 +1,100 @@
+"""Parse-time benchmark for the scrapers over saved result pages.
+
+Runs every scraper's parse step against its fixture in benchmarks/fixtures
+with each installed HTML backend and reports CPU time per page. html.parser
+is the baseline the scrapers used before; the other backends are only listed
+when installed (pip install lxml / selectolax).
+
+    python benchmarks/parse_benchmark.py [--runs 20] [--count 50]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.services import html_parser  # noqa: E402
+from src.services.mixkit_scraper import MixkitScraper  # noqa: E402
+from src.services.coverr_scraper import CoverrScraper  # noqa: E402
+from src.services.videezy_scraper import VideezyScraper  # noqa: E402
+from src.services.mazwai_scraper import MazwaiScraper  # noqa: E402
+from src.services.burst_scraper import BurstScraper  # noqa: E402
+from src.services.stocksnap_scraper import StocksnapScraper  # noqa: E402
+from src.services.unsplash_scraper import UnsplashScraper  # noqa: E402
+from src.utils.logger import logger  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+SCRAPERS = {
+    'mixkit': lambda html, count: MixkitScraper().parse_videos(html, count),
+    'coverr': lambda html, count: CoverrScraper().parse_videos(html, count),
+    'videezy': lambda html, count: VideezyScraper().parse_videos(html, count),
+    'mazwai': lambda html, count: MazwaiScraper().parse_videos(html, count),
+    'burst': lambda html, count: BurstScraper().parse_photos(html, count),
+    'stocksnap': lambda html, count: StocksnapScraper().parse_photos(html, count),
+    'unsplash': lambda html, count: UnsplashScraper().parse_photos(html, count),
+}
+
+
+def measure(parse, html, count, runs):
+    timings = []
+    items = []
+    for _ in range(runs):
+        started = time.process_time()
+        items = list(parse(html, count))
+        timings.append(time.process_time() - started)
+    return statistics.median(timings), items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--count', type=int, default=50, help='results asked from each page')
+    parser.add_argument('--only', nargs='*', choices=sorted(SCRAPERS), help='scrapers to run')
+    args = parser.parse_args()
+
+    # Per-item log lines would dominate the timings
+    logger.setLevel('WARNING')
+    # Baseline first, so the other backends can be checked against it
+    backends = ['html.parser'] + [b for b in html_parser.available_backends() if b != 'html.parser']
+    print(f"backends: {', '.join(backends)}  runs: {args.runs}  count: {args.count}\n")
+    print(f"{'site':<11}{'KB':>6}" + ''.join(f"{b + ' ms':>16}" for b in backends) + f"{'speedup':>10}  items")
+
+    totals = {b: 0.0 for b in backends}
+    for name in args.only or SCRAPERS:
+        html = (FIXTURES / f"{name}.html").read_text(encoding='utf-8')
+        row = f"{name:<11}{len(html) / 1024:>6.0f}"
+        baseline_ids = None
+        mismatched = []
+        results = {}
+        for backend in backends:
+            html_parser.set_backend(backend)
+            seconds, items = measure(SCRAPERS[name], html, args.count, args.runs)
+            results[backend] = seconds
+            totals[backend] += seconds
+            row += f"{seconds * 1000:>16.2f}"
+
+            # Every backend has to find the same results as the baseline
+            ids = [item['id'] for item in items]
+            if baseline_ids is None:
+                baseline_ids = ids
+            elif ids != baseline_ids:
+                mismatched.append(backend)
+        html_parser.set_backend(None)
+
+        fastest = min(results.values())
+        row += f"{results['html.parser'] / fastest:>9.1f}x  {len(baseline_ids)}"
+        if mismatched:
+            row += f"  (different results: {', '.join(mismatched)})"
+        print(row)
+
+    fastest = min(totals.values())
+    print(f"\n{'total':<17}" + ''.join(f"{totals[b] * 1000:>16.2f}" for b in backends)
+          + f"{totals['html.parser'] / fastest:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
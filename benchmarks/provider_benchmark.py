@@ -0,0 +1,312 @@
+"""Offline provider benchmark: every provider searched against recorded responses.
+
+A local stand-in server replays the saved result pages and API responses
+in benchmarks/fixtures with a configurable latency and jitter. The shared
+HTTP session gets an adapter that sends each provider's host there, so the
+real search path runs unchanged: URL building, transport, rate limiter,
+pagination and parsing. The result cache is off and rate limits are lifted.
+
+Reported per provider: parse time of one response (CPU, median), search
+latency percentiles (wall clock), and the peak memory allocated during one
+search (tracemalloc). "All Sources" searches through the search engine are
+timed as well.
+
+    python benchmarks/provider_benchmark.py [--runs 30] [--count 50] [--latency 80] [--jitter 30]
+    python benchmarks/provider_benchmark.py --save-baseline baseline.json
+    python benchmarks/provider_benchmark.py --baseline baseline.json [--tolerance 0.25]
+
+With --baseline the run is compared with a saved one; the exit code is 1
+when any time or allocation figure grew by more than the tolerance.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.services import transport  # noqa: E402
+from src.services.rate_limiter import rate_limiter  # noqa: E402
+from src.services.search_engine import (search_engine, build_video_providers, build_photo_providers,  # noqa: E402
+                                        PUBLIC_VIDEO_SOURCES, API_VIDEO_SOURCES, ALL_PHOTO_SOURCES)
+from src.services.mixkit_scraper import MixkitScraper  # noqa: E402
+from src.services.coverr_scraper import CoverrScraper  # noqa: E402
+from src.services.videezy_scraper import VideezyScraper  # noqa: E402
+from src.services.mazwai_scraper import MazwaiScraper  # noqa: E402
+from src.services.burst_scraper import BurstScraper  # noqa: E402
+from src.services.stocksnap_scraper import StocksnapScraper  # noqa: E402
+from src.services.unsplash_scraper import UnsplashScraper  # noqa: E402
+from src.services.pexels import PexelsService  # noqa: E402
+from src.services.pixabay import PixabayService  # noqa: E402
+from src.utils.logger import logger  # noqa: E402
+from src.utils.result_cache import result_cache  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# (host, path prefix) -> fixture; the first matching prefix wins
+ROUTES = [
+    ('mixkit.co', '/', 'mixkit.html'),
+    ('coverr.co', '/', 'coverr.html'),
+    ('www.videezy.com', '/', 'videezy.html'),
+    ('mazwai.com', '/', 'mazwai.html'),
+    ('burst.shopify.com', '/', 'burst.html'),
+    ('stocksnap.io', '/', 'stocksnap.html'),
+    ('unsplash.com', '/', 'unsplash.html'),
+    ('api.pexels.com', '/videos/', 'pexels_videos.json'),
+    ('api.pexels.com', '/v1/', 'pexels_photos.json'),
+    ('pixabay.com', '/api/videos/', 'pixabay_videos.json'),
+    ('pixabay.com', '/api/', 'pixabay_photos.json'),
+]
+
+# (kind, provider) -> parse step over that provider's fixture
+PARSERS = {
+    ('videos', 'Mixkit'): ('mixkit.html', lambda text, count: list(MixkitScraper().parse_videos(text, count))),
+    ('videos', 'Coverr'): ('coverr.html', lambda text, count: list(CoverrScraper().parse_videos(text, count))),
+    ('videos', 'Videezy'): ('videezy.html', lambda text, count: list(VideezyScraper().parse_videos(text, count))),
+    ('videos', 'Mazwai'): ('mazwai.html', lambda text, count: list(MazwaiScraper().parse_videos(text, count))),
+    ('videos', 'Pexels'): ('pexels_videos.json', lambda text, count: _api_videos(PexelsService('bench'), text, count)),
+    ('videos', 'Pixabay'): ('pixabay_videos.json', lambda text, count: _api_videos(PixabayService('bench'), text, count)),
+    ('photos', 'Burst'): ('burst.html', lambda text, count: list(BurstScraper().parse_photos(text, count))),
+    ('photos', 'Stocksnap'): ('stocksnap.html', lambda text, count: list(StocksnapScraper().parse_photos(text, count))),
+    ('photos', 'Unsplash'): ('unsplash.html', lambda text, count: list(UnsplashScraper().parse_photos(text, count))),
+    ('photos', 'Pexels'): ('pexels_photos.json', lambda text, count: _api_photos(PexelsService('bench'), text, count)),
+    ('photos', 'Pixabay'): ('pixabay_photos.json', lambda text, count: _api_photos(PixabayService('bench'), text, count)),
+}
+
+# Figures compared with the baseline, and the change below which a
+# difference counts as noise
+COMPARED = {'parse_ms': 0.5, 'p50_ms': 2.0, 'p90_ms': 5.0, 'peak_kb': 64.0}
+
+
+def _api_videos(service, text, count):
+    items, _ = service.parse_page('videos', json.loads(text))
+    return [(service.get_video_url(v), service.get_preview_url(v)) for v in items[:count]]
+
+
+def _api_photos(service, text, count):
+    items, _ = service.parse_page('photos', json.loads(text))
+    return [service.format_photo(p) for p in items[:count]]
+
+
+class BenchConfig:
+    # Dummy keys, so the API providers are built; the stand-in ignores them
+    pexels_api_key = 'bench'
+    pixabay_api_key = 'bench'
+
+
+class StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float, jitter: float, seed: int = 1):
+        super().__init__(('127.0.0.1', 0), _StandInHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.bodies = {name: (FIXTURES / name).read_bytes() for _, _, name in ROUTES}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delay(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # Paths arrive as /<original host>/<original path>
+        host, _, rest = self.path.lstrip('/').partition('/')
+        path = '/' + urlsplit(rest).path
+        fixture = next((name for h, prefix, name in ROUTES if h == host and path.startswith(prefix)), None)
+        time.sleep(self.server.delay())
+        if fixture is None:
+            self.send_error(404)
+            return
+        body = self.server.bodies[fixture]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json' if fixture.endswith('.json') else 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class RewritingAdapter(HTTPAdapter):
+    # Sends https://<host>/<path> to <stand-in>/<host>/<path>
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.url = f"{self.base_url}/{url.netloc}{url.path}" + (f"?{url.query}" if url.query else '')
+        return super().send(request, **kwargs)
+
+
+def install(server: StandIn):
+    adapter = RewritingAdapter(server.base_url, pool_maxsize=transport.POOL_SIZE_PER_HOST)
+    for host in {host for host, _, _ in ROUTES}:
+        transport.session().mount(f"https://{host}", adapter)
+    # What is measured is the providers, not their quotas
+    for name in set(PUBLIC_VIDEO_SOURCES + API_VIDEO_SOURCES + ALL_PHOTO_SOURCES):
+        bucket = rate_limiter.bucket(name)
+        bucket.capacity = bucket.tokens = 10 ** 6
+        bucket.rate = 10 ** 6
+    result_cache.enabled = False
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure_parse(kind, name, count, runs):
+    fixture, parse = PARSERS[(kind, name)]
+    text = (FIXTURES / fixture).read_text(encoding='utf-8')
+    timings = []
+    for _ in range(runs):
+        started = time.process_time()
+        parse(text, count)
+        timings.append(time.process_time() - started)
+    return statistics.median(timings) * 1000
+
+
+def measure_search(provider, count, runs, label):
+    # Every run asks for a new query so no paginator is reused
+    timings, found = [], 0
+    for n in range(runs):
+        started = time.perf_counter()
+        found = len(list(provider(f"bench {label} {n}", count)))
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    list(provider(f"bench {label} traced", count))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, found, peak / 1024
+
+
+def summarize(timings, found, peak_kb, parse_ms=None):
+    row = {'items': found,
+           'p50_ms': round(percentile(timings, 50), 2),
+           'p90_ms': round(percentile(timings, 90), 2),
+           'p99_ms': round(percentile(timings, 99), 2),
+           'peak_kb': round(peak_kb, 1)}
+    if parse_ms is not None:
+        row['parse_ms'] = round(parse_ms, 3)
+    return row
+
+
+def run(args):
+    results = {}
+    for kind, build, names in (('videos', build_video_providers, PUBLIC_VIDEO_SOURCES + API_VIDEO_SOURCES),
+                               ('photos', build_photo_providers, ALL_PHOTO_SOURCES)):
+        for name in args.only or names:
+            if name not in names:
+                continue
+            provider = build(name, BenchConfig)[name]
+            parse_ms = measure_parse(kind, name, args.count, args.parse_runs)
+            timings, found, peak = measure_search(provider, args.count, args.runs, f"{kind} {name}")
+            results[f"{kind}/{name}"] = summarize(timings, found, peak, parse_ms)
+
+        if not args.only:
+            providers = build('All Sources', BenchConfig)
+            timings, found, peak = measure_search(
+                lambda query, count: search_engine.search(providers, query, count),
+                args.count, args.runs, f"{kind} all")
+            results[f"{kind}/All Sources"] = summarize(timings, found, peak)
+    return results
+
+
+def report(results, baseline=None, tolerance=0.25):
+    columns = ['items', 'parse_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'peak_kb']
+    print(f"{'provider':<22}" + ''.join(f"{c:>10}" for c in columns))
+    regressions = []
+    for key, row in results.items():
+        print(f"{key:<22}" + ''.join(f"{row[c]:>10}" if c in row else f"{'-':>10}" for c in columns))
+        old = (baseline or {}).get(key)
+        if not old:
+            continue
+        changes = []
+        for metric, noise in COMPARED.items():
+            if metric not in row or metric not in old:
+                continue
+            before, after = old[metric], row[metric]
+            if after - before > noise and after > before * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {before} -> {after}")
+            if before:
+                changes.append(f"{metric} {(after - before) / before:+.0%}")
+        if row['items'] != old.get('items'):
+            changes.append(f"items {old.get('items')} -> {row['items']}")
+        print(f"{'':<22}  vs baseline: {', '.join(changes)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=30, help='searches per provider')
+    parser.add_argument('--parse-runs', type=int, default=20, help='parses per fixture')
+    parser.add_argument('--count', type=int, default=50, help='results asked from each provider')
+    parser.add_argument('--latency', type=float, default=80.0, help='stand-in response delay, ms')
+    parser.add_argument('--jitter', type=float, default=30.0, help='+/- random delay added, ms')
+    parser.add_argument('--only', nargs='*', help='providers to run, e.g. Mixkit Pexels')
+    parser.add_argument('--baseline', help='saved run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed growth before a regression')
+    parser.add_argument('--save-baseline', help='write this run to a file')
+    args = parser.parse_args()
+
+    # Per-item log lines would dominate the timings
+    logger.setLevel('WARNING')
+    server = StandIn(args.latency / 1000, args.jitter / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    install(server)
+
+    meta = {'latency_ms': args.latency, 'jitter_ms': args.jitter, 'count': args.count, 'runs': args.runs,
+            'python': platform.python_version(), 'machine': platform.machine()}
+    print(f"stand-in {server.base_url}  latency {args.latency:.0f}±{args.jitter:.0f} ms  "
+          f"runs {args.runs}  count {args.count}\n")
+
+    baseline = None
+    if args.baseline:
+        saved = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        baseline = saved['results']
+        differs = [k for k in ('latency_ms', 'jitter_ms', 'count') if saved['meta'].get(k) != meta[k]]
+        if differs:
+            print(f"warning: baseline was run with different {', '.join(differs)}\n")
+
+    results = run(args)
+    regressions = report(results, baseline, args.tolerance)
+    print(f"\n{server.requests} requests served")
+    server.shutdown()
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps({'meta': meta, 'results': results}, indent=2),
+                                            encoding='utf-8')
+        print(f"baseline saved to {args.save_baseline}")
+    if regressions:
+        print("\nregressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
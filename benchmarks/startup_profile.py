@@ -0,0 +1,101 @@
+"""Startup profile: what the app imports before its window shows, and how long that takes.
+
+Runs `python -X importtime` on the GUI entry point in a fresh interpreter,
+sums the self time of every module by top-level package and lists the
+slowest ones, then times building and showing MainWindow (offscreen, so no
+display is needed). Pages other than Videos Search are built on first open
+and are not part of the measured startup.
+
+    python benchmarks/startup_profile.py [--top 20] [--runs 5]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# import time: self [us] | cumulative | imported package
+IMPORT_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+WINDOW_SCRIPT = """
+import time
+started = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+from src.ui.main_window import MainWindow
+imported = time.perf_counter()
+app = QApplication([])
+window = MainWindow()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(f"{(imported - started) * 1000:.1f} {(shown - imported) * 1000:.1f}")
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return env
+
+
+def import_times():
+    # (module, self us, cumulative us, depth) for every import of main.py's tree
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import src.ui.main_window'],
+                          cwd=ROOT, env=_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(proc.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)),
+                         len(match.group(3)) // 2))
+    return rows
+
+
+def window_times(runs):
+    imports, builds = [], []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-c', WINDOW_SCRIPT],
+                              cwd=ROOT, env=_env(), capture_output=True, text=True)
+        if proc.returncode != 0:
+            sys.exit(proc.stderr.strip().splitlines()[-1])
+        imported, built = proc.stdout.split()[-2:]
+        imports.append(float(imported))
+        builds.append(float(built))
+    return imports, builds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=20, help='modules and packages to list')
+    parser.add_argument('--runs', type=int, default=5, help='window start-ups to time')
+    args = parser.parse_args()
+
+    rows = import_times()
+    total = sum(self_us for _, self_us, _, _ in rows)
+    packages = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        packages[module.split('.')[0]] += self_us
+
+    print(f"{len(rows)} modules imported in {total / 1000:.0f} ms\n")
+    print(f"{'package':<32} {'ms':>8} {'share':>7}")
+    for package, self_us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{package:<32} {self_us / 1000:>8.1f} {self_us / total:>7.1%}")
+
+    print(f"\n{'module (cumulative)':<48} {'ms':>8}")
+    for module, _, cumulative, _ in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{module:<48} {cumulative / 1000:>8.1f}")
+
+    imports, builds = window_times(args.runs)
+    print(f"\nover {args.runs} runs (median): imports {statistics.median(imports):.0f} ms, "
+          f"window built and shown {statistics.median(builds):.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,7 @@ def build():
         '--hidden-import=PyQt6.QtCore',
         '--hidden-import=PyQt6.QtGui',
         '--hidden-import=PyQt6.QtWidgets',
+        '--hidden-import=bs4',  # imported lazily by the HTML parser layer
     ]
     
     print(f"Building {app_name}...")
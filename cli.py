@@ -0,0 +1,292 @@
+"""Headless search and download, for scripts and render nodes.
+
+    python cli.py search "city night" --count 20
+    python cli.py batch shots.jsonl --out footage/ --results results.jsonl
+    STOCK_PARSER_API_TOKEN=... python cli.py serve --host 0.0.0.0 --out /mnt/footage
+    python cli.py verify-downloads
+
+batch takes either a text file with one query per line (# starts a comment)
+or a JSONL manifest, one object per line:
+
+    {"id": "sh010", "query": "city night", "count": 12, "kind": "videos", "source": "All Sources"}
+
+Only "query" is required; the rest default to the command line options. Each
+job's files go to OUT/<id>/ unless the line sets "out". One JSON line per job
+is written to --results (stdout by default) as soon as the job is done; logs
+go to stderr.
+
+batch and serve reuse clips downloaded before (see the download index in
+src/services/download_index.py); --verify sets when those files are re-hashed
+before reuse. verify-downloads re-hashes every indexed file now and drops the
+ones that changed or disappeared.
+
+serve runs the same searches and downloads as a local HTTP service, so one
+instance can serve a whole team (see src/services/api_server.py for routes).
+
+Exit codes: 0 every job found and downloaded everything, 1 some jobs came up
+short, 2 bad arguments or input, 3 no job succeeded, 130 interrupted.
+
+No Qt module is imported, so this starts without a display.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from src.config import Config
+from src.services import batch
+from src.services.download_index import download_index, VERIFY_MODES
+from src.utils.logger import logger
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+EXIT_INTERRUPTED = 130
+
+
+class ManifestError(Exception):
+    pass
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^\w\-]+', '-', text.lower()).strip('-')[:40] or 'job'
+
+
+def load_jobs(path: Path, defaults: dict) -> list:
+    # A JSONL manifest or a plain query list, told apart by the first line
+    try:
+        lines = path.read_text(encoding='utf-8').splitlines()
+    except OSError as e:
+        raise ManifestError(f"cannot read {path}: {e}")
+
+    content = [(n, line.strip()) for n, line in enumerate(lines, 1)
+               if line.strip() and not line.strip().startswith('#')]
+    manifest = path.suffix in ('.jsonl', '.ndjson') or (content and content[0][1].startswith('{'))
+
+    jobs = []
+    seen_ids = set()
+    for n, line in content:
+        if manifest:
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ManifestError(f"{path}:{n}: invalid JSON: {e}")
+            if not isinstance(entry, dict) or not str(entry.get('query', '')).strip():
+                raise ManifestError(f"{path}:{n}: every line needs a \"query\"")
+        else:
+            entry = {'query': line}
+
+        job = dict(defaults)
+        job.update(entry)
+        job['query'] = str(job['query']).strip()
+        job['id'] = str(entry.get('id') or f"{len(jobs) + 1:04d}-{_slug(job['query'])}")
+
+        if job['kind'] not in batch.KINDS:
+            raise ManifestError(f"{path}:{n}: kind must be one of {', '.join(batch.KINDS)}")
+        if job['source'] not in batch.service_types(job['kind']):
+            raise ManifestError(f"{path}:{n}: unknown {job['kind']} source '{job['source']}'")
+        try:
+            job['count'] = int(job['count'])
+        except (TypeError, ValueError):
+            raise ManifestError(f"{path}:{n}: count must be a number")
+        if job['count'] < 1:
+            raise ManifestError(f"{path}:{n}: count must be at least 1")
+        if job['id'] in seen_ids:
+            raise ManifestError(f"{path}:{n}: duplicate id '{job['id']}'")
+        seen_ids.add(job['id'])
+        jobs.append(job)
+    return jobs
+
+
+def run_job(job: dict, config: Config, out_dir: Path, download: bool) -> dict:
+    started = time.monotonic()
+    record = {'id': job['id'], 'query': job['query'], 'kind': job['kind'], 'source': job['source'],
+              'status': 'ok', 'found': 0, 'downloaded': 0, 'failed': 0, 'dir': None,
+              'items': [], 'error': None}
+    try:
+        results = batch.search(job['kind'], job['source'], job['query'], job['count'], config)
+        record['found'] = len(results)
+        items = [batch.summarize(r) for r in results]
+
+        if results and download:
+            target = Path(job['out']) if job.get('out') else out_dir / _slug(job['id'])
+            record['dir'] = str(target)
+            completed, failed = batch.download(job['kind'], results, target)
+            paths = {(t['source'], str(t['id'])): t['path'] for t in completed}
+            for item in items:
+                path = paths.get((item['source'], str(item['id'])))
+                if path:
+                    item['path'] = path
+            record['downloaded'] = len(completed)
+            record['failed'] = len(failed)
+
+        record['items'] = items
+        if not results:
+            record['status'] = 'empty'
+        elif record['failed']:
+            record['status'] = 'partial'
+    except Exception as e:
+        logger.error(f"Job {job['id']} failed: {e}", exc_info=True)
+        record['status'] = 'error'
+        record['error'] = str(e)
+    record['seconds'] = round(time.monotonic() - started, 2)
+    return record
+
+
+def _quiet_console(verbose: bool):
+    # Logs share the terminal with the results, so they move to stderr
+    for handler in logger.handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(sys.stderr)
+            handler.setLevel(logging.DEBUG if verbose else logging.ERROR)
+
+
+def cmd_search(args) -> int:
+    config = Config()
+    results = batch.search(args.kind, args.source, args.query, args.count, config)
+    json.dump([batch.summarize(r) for r in results], sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+    return EXIT_OK if results else EXIT_FAILED
+
+
+def cmd_batch(args) -> int:
+    defaults = {'kind': args.kind, 'source': args.source, 'count': args.count}
+    try:
+        jobs = load_jobs(Path(args.input), defaults)
+    except ManifestError as e:
+        print(f"stock-parser: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not jobs:
+        print("stock-parser: no queries in input", file=sys.stderr)
+        return EXIT_USAGE
+
+    config = Config()
+    out_dir = Path(args.out)
+    output = sys.stdout if args.results == '-' else open(args.results, 'w', encoding='utf-8')
+    statuses = []
+
+    executor = ThreadPoolExecutor(max_workers=args.jobs, thread_name_prefix='job')
+    try:
+        futures = [executor.submit(run_job, job, config, out_dir, not args.no_download) for job in jobs]
+        for n, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            statuses.append(record['status'])
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+            if not args.quiet:
+                print(f"[{n}/{len(jobs)}] {record['status']:<7} {record['id']}: {record['found']} found, "
+                      f"{record['downloaded']} downloaded, {record['failed']} failed ({record['seconds']}s)",
+                      file=sys.stderr)
+    except KeyboardInterrupt:
+        print("stock-parser: interrupted", file=sys.stderr)
+        executor.shutdown(wait=False, cancel_futures=True)
+        return EXIT_INTERRUPTED
+    finally:
+        executor.shutdown(wait=False)
+        if output is not sys.stdout:
+            output.close()
+
+    ok = statuses.count('ok')
+    if not args.quiet:
+        print(f"{ok}/{len(jobs)} jobs complete", file=sys.stderr)
+    if ok == len(jobs):
+        return EXIT_OK
+    return EXIT_PARTIAL if ok else EXIT_FAILED
+
+
+def cmd_serve(args) -> int:
+    from src.services import api_server
+    try:
+        server = api_server.serve(Config(), Path(args.out), args.host, args.port, args.token)
+    except ValueError as e:
+        print(f"stock-parser: {e} (--token or STOCK_PARSER_API_TOKEN)", file=sys.stderr)
+        return EXIT_USAGE
+    except OSError as e:
+        print(f"stock-parser: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    print(f"Serving on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.service.shutdown()
+        server.server_close()
+    return EXIT_OK
+
+
+def cmd_verify_downloads(args) -> int:
+    intact, dropped = download_index.verify()
+    print(f"{intact} indexed files intact, {dropped} dropped", file=sys.stderr)
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='stock-parser', description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='\n'.join(__doc__.splitlines()[1:]))
+    parser.add_argument('-v', '--verbose', action='store_true', help='log everything to stderr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def common(sub):
+        sub.add_argument('--kind', choices=batch.KINDS, default='videos')
+        sub.add_argument('--source', default='Public Only',
+                         help="'Public Only', 'All Sources' or one provider, as in the GUI")
+        sub.add_argument('--count', type=int, default=10, help='results per query')
+
+    def verify(sub):
+        sub.add_argument('--verify', choices=VERIFY_MODES, default='lazy',
+                         help='when a previously downloaded file is re-hashed before reuse')
+
+    search = commands.add_parser('search', help='search once and print the results as JSON')
+    search.add_argument('query')
+    common(search)
+    search.set_defaults(func=cmd_search)
+
+    run = commands.add_parser('batch', help='search and download every query of a file')
+    run.add_argument('input', help='query list or JSONL manifest')
+    common(run)
+    run.add_argument('--out', default='downloads', help='base directory for the files')
+    run.add_argument('--results', default='-', help='JSONL report, - for stdout')
+    run.add_argument('--jobs', type=int, default=4, help='queries searched at the same time')
+    run.add_argument('--no-download', action='store_true', help='only search')
+    run.add_argument('-q', '--quiet', action='store_true', help='no progress lines')
+    verify(run)
+    run.set_defaults(func=cmd_batch)
+
+    serve = commands.add_parser('serve', help='serve search and downloads over HTTP')
+    serve.add_argument('--host', default='127.0.0.1', help='0.0.0.0 to serve the LAN (needs --token)')
+    serve.add_argument('--port', type=int, default=8700)
+    serve.add_argument('--out', default='downloads', help='directory download jobs write to')
+    serve.add_argument('--token', default=os.getenv('STOCK_PARSER_API_TOKEN'),
+                       help='require "Authorization: Bearer TOKEN" (default $STOCK_PARSER_API_TOKEN)')
+    verify(serve)
+    serve.set_defaults(func=cmd_serve)
+
+    check = commands.add_parser('verify-downloads', help='re-hash every indexed download, drop changed ones')
+    check.set_defaults(func=cmd_verify_downloads)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if hasattr(args, 'source') and args.source not in batch.service_types(args.kind):
+        parser.error(f"unknown {args.kind} source '{args.source}'")
+    _quiet_console(args.verbose)
+    if hasattr(args, 'verify'):
+        download_index.set_verify_mode(args.verify)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,11 @@
+import time
+STARTED = time.perf_counter()
+
 import sys
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication
 from src.ui.main_window import MainWindow
+from src.utils.logger import logger
 
 def main():
     app = QApplication(sys.argv)
@@ -8,6 +13,9 @@ def main():
     
     window = MainWindow()
     window.show()
+    # Runs once the event loop has painted the window
+    QTimer.singleShot(0, lambda: logger.info(
+        f"Window shown {(time.perf_counter() - STARTED) * 1000:.0f} ms after start"))
     
     sys.exit(app.exec())
 
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional
 
 class VideoService(ABC):
     @abstractmethod
@@ -9,3 +9,31 @@ class VideoService(ABC):
     @abstractmethod
     def get_video_url(self, video_data: Dict[str, Any]) -> str:
         pass
+
+    def get_preview_url(self, video_data: Dict[str, Any]) -> Optional[str]:
+        return video_data.get('preview')
+
+class PageScraper(ABC):
+    # A provider searched through its public HTML pages; AsyncScraper
+    # fetches the same pages on the event loop
+    @abstractmethod
+    def search_urls(self, query: str) -> List[str]:
+        # Pages to try in order; the first one that answers 200 is parsed
+        pass
+
+class AsyncVideoService(ABC):
+    # The same contract for providers driven from an asyncio event loop;
+    # results stream out of iter_videos as soon as they are parsed
+    @abstractmethod
+    def iter_videos(self, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        pass
+
+    async def search_videos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return [v async for v in self.iter_videos(query, count)]
+
+    @abstractmethod
+    def get_video_url(self, video_data: Dict[str, Any]) -> str:
+        pass
+
+    def get_preview_url(self, video_data: Dict[str, Any]) -> Optional[str]:
+        return video_data.get('preview')
@@ -0,0 +1,390 @@
+import hmac
+import ipaddress
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from . import batch
+from ..utils.logger import logger
+from ..utils.metrics import metrics
+from ..utils.persistence import persistence
+from ..utils.result_cache import normalize_query
+
+# One warm instance serving a whole team: searches go through the shared
+# result cache and identical searches in flight are run once; downloads go
+# through the shared download pool and index.
+#
+#   GET  /search?q=...&kind=videos&source=Public+Only&count=10
+#   POST /downloads          {"kind", "items": [...]} or {"kind", "query", "source", "count"}, optional "dir"
+#   GET  /downloads          recent jobs
+#   GET  /downloads/<id>     one job
+#   GET  /history?limit=100  recent searches
+#   GET  /history/downloads?limit=100
+#   GET  /health
+#   GET  /metrics            Prometheus text; ?format=json for JSON
+
+DEFAULT_PORT = 8700
+MAX_BODY = 4 * 1024 * 1024
+MAX_COUNT = 500
+# Hosts (and their subdomains) that item URLs may point to: the providers
+# and their CDNs. Anything else, an internal address above all, is refused.
+PROVIDER_HOSTS = (
+    'pexels.com', 'vimeo.com', 'vimeocdn.com', 'pixabay.com', 'unsplash.com', 'mixkit.co',
+    'coverr.co', 'coverr-video.s3.amazonaws.com', 'videezy.com', 'mazwai.com', 'stocksnap.io',
+    'shopify.com', 'shopifycdn.com',
+)
+# Finished download jobs kept for status queries
+MAX_JOBS = 500
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def provider_url(url: Any) -> bool:
+    parts = urlsplit(str(url or ''))
+    host = (parts.hostname or '').lower()
+    return parts.scheme == 'https' and any(host == h or host.endswith('.' + h) for h in PROVIDER_HOSTS)
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class Coalescer:
+    # Callers asking for a key that is already being computed wait for that
+    # computation instead of starting their own
+    def __init__(self):
+        self._inflight: Dict[Any, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        # Returns (result, shared); shared is True for callers that waited
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return future.result(), True
+
+        try:
+            future.set_result(compute())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result(), False
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+
+class DownloadJob:
+    def __init__(self, kind: str, target: Path, items: Optional[List[Dict[str, Any]]] = None,
+                 search: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.target = target
+        self.items = items
+        self.search = search
+        self.state = 'queued'
+        self.created = time.time()
+        self.finished_at = None
+        self.total = 0
+        self.done = 0
+        self.bytes = 0
+        self.files: List[str] = []
+        self.failed: List[str] = []
+        self.error = None
+
+    def on_progress(self, done: int, total: int, done_bytes: int):
+        self.done, self.total, self.bytes = done, total, done_bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'dir': str(self.target),
+            'search': self.search,
+            'total': self.total,
+            'done': self.done,
+            'bytes': self.bytes,
+            'files': list(self.files),
+            'failed': list(self.failed),
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished_at,
+        }
+
+
+class StockService:
+    # What the HTTP layer calls; usable on its own as well
+    def __init__(self, config, download_root: Path, max_jobs: int = 4):
+        self.config = config
+        self.download_root = Path(download_root)
+        self.started = time.time()
+        self.searches = Coalescer()
+        self.jobs: 'OrderedDict[str, DownloadJob]' = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        # Jobs run side by side; their files all share the one download pool
+        self._job_runner = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='api-job')
+
+    def search(self, kind: str, source: str, query: str, count: int) -> Dict[str, Any]:
+        query = query.strip()
+        if not query:
+            raise ApiError(400, "missing query")
+        if kind not in batch.KINDS:
+            raise ApiError(400, f"kind must be one of {', '.join(batch.KINDS)}")
+        if source not in batch.service_types(kind):
+            raise ApiError(400, f"unknown {kind} source '{source}'")
+        if not 1 <= count <= MAX_COUNT:
+            raise ApiError(400, f"count must be between 1 and {MAX_COUNT}")
+
+        started = time.monotonic()
+        key = (kind, source, normalize_query(query), count)
+        results, shared = self.searches.run(
+            key, lambda: [batch.summarize(r) for r in batch.search(kind, source, query, count, self.config)])
+        return {
+            'query': query, 'kind': kind, 'source': source, 'count': count,
+            'shared': shared, 'seconds': round(time.monotonic() - started, 3),
+            'results': results,
+        }
+
+    def _target(self, name: Optional[str]) -> Path:
+        # Clients only pick a folder name below the server's download root
+        if not name:
+            return self.download_root
+        safe = re.sub(r'[^\w\-.]+', '_', str(name)).strip('.')
+        if not safe:
+            raise ApiError(400, "invalid dir")
+        return self.download_root / safe
+
+    def submit_download(self, body: Dict[str, Any]) -> DownloadJob:
+        kind = body.get('kind', 'videos')
+        if kind not in batch.KINDS:
+            raise ApiError(400, f"kind must be one of {', '.join(batch.KINDS)}")
+        items = body.get('items')
+        search = None
+        if items is None:
+            if not str(body.get('query', '')).strip():
+                raise ApiError(400, "either items or query is required")
+            try:
+                count = int(body.get('count', 10))
+            except (TypeError, ValueError):
+                raise ApiError(400, "count must be a number")
+            if not 1 <= count <= MAX_COUNT:
+                raise ApiError(400, f"count must be between 1 and {MAX_COUNT}")
+            search = {
+                'query': str(body['query']),
+                'source': body.get('source', 'Public Only'),
+                'count': count,
+            }
+            if search['source'] not in batch.service_types(kind):
+                raise ApiError(400, f"unknown {kind} source '{search['source']}'")
+        elif not isinstance(items, list) or not all(isinstance(i, dict) and 'id' in i and 'source' in i
+                                                    for i in items):
+            raise ApiError(400, "items must be a list of search results")
+        else:
+            # The server fetches these, so they must lead to a provider
+            field = 'download_url' if kind == 'videos' else 'url'
+            sources = batch.provider_names(kind)
+            for item in items:
+                if item['source'] not in sources:
+                    raise ApiError(400, f"unknown {kind} source '{item['source']}' in item {item['id']}")
+                if item.get(field) and not provider_url(item[field]):
+                    raise ApiError(400, f"{field} of item {item['id']} is not a provider URL")
+
+        job = DownloadJob(kind, self._target(body.get('dir')), items=items, search=search)
+        with self._jobs_lock:
+            self.jobs[job.id] = job
+            while len(self.jobs) > MAX_JOBS:
+                oldest = next(iter(self.jobs.values()))
+                if oldest.state in ('queued', 'running'):
+                    break
+                self.jobs.popitem(last=False)
+        self._job_runner.submit(self._run_job, job)
+        logger.info(f"Download job {job.id} queued ({kind}, {len(items) if items else 'search'})")
+        return job
+
+    def _run_job(self, job: DownloadJob):
+        job.state = 'running'
+        try:
+            items = job.items
+            if items is None:
+                items = self.search(job.kind, job.search['source'], job.search['query'],
+                                    job.search['count'])['results']
+            completed, failed = batch.download(job.kind, items, job.target, on_progress=job.on_progress)
+            job.files = [task['path'] for task in completed]
+            job.failed = [task['url'] or f"{task['source']} {task['id']}: no download URL" for task in failed]
+            job.total = job.done = len(completed) + len(failed)
+            job.state = 'done'
+        except Exception as e:
+            logger.error(f"Download job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.state = 'failed'
+        job.finished_at = time.time()
+
+    def job(self, job_id: str) -> DownloadJob:
+        with self._jobs_lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise ApiError(404, f"no job {job_id}")
+        return job
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._jobs_lock:
+            jobs = list(self.jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
+
+    def health(self) -> Dict[str, Any]:
+        with self._jobs_lock:
+            active = sum(1 for job in self.jobs.values() if job.state in ('queued', 'running'))
+        return {
+            'status': 'ok',
+            'uptime': round(time.time() - self.started),
+            'searches_in_flight': self.searches.inflight(),
+            'active_jobs': active,
+        }
+
+    def shutdown(self):
+        self._job_runner.shutdown(wait=False, cancel_futures=True)
+
+
+def _limit(params: Dict[str, str]) -> int:
+    try:
+        return max(1, min(int(params.get('limit', 100)), 10000))
+    except ValueError:
+        raise ApiError(400, "limit must be a number")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'StockParser'
+    # Set on the subclass made by serve()
+    service: StockService = None
+    token: Optional[str] = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"API {self.address_string()} {format % args}")
+
+    def _send(self, status: int, payload: Any):
+        # Strings go out as plain text (the Prometheus exposition format)
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        if not self.token:
+            return True
+        given = self.headers.get('Authorization', '')
+        # Bytes, since compare_digest refuses non-ASCII str
+        return hmac.compare_digest(given.encode('utf-8'), f"Bearer {self.token}".encode('utf-8'))
+
+    def _body(self) -> Dict[str, Any]:
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # rfile.read(-1) would wait for a close that never comes
+            raise ApiError(400, "invalid Content-Length")
+        if length > MAX_BODY:
+            raise ApiError(413, "request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ApiError(400, "body must be JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "body must be a JSON object")
+        return body
+
+    def _dispatch(self, method: str):
+        try:
+            if not self._authorized():
+                raise ApiError(401, "missing or wrong token")
+            url = urlsplit(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            path = url.path.rstrip('/') or '/'
+            self._send(*self._route(method, path, params))
+        except ApiError as e:
+            self._send(e.status, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"API error on {method} {self.path}: {e}", exc_info=True)
+            self._send(500, {'error': str(e)})
+
+    def _route(self, method: str, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        service = self.service
+        if method == 'GET' and path == '/health':
+            return 200, service.health()
+        if method == 'GET' and path == '/metrics':
+            return 200, metrics.to_json() if params.get('format') == 'json' else metrics.to_prometheus()
+        if method == 'GET' and path == '/search':
+            try:
+                count = int(params.get('count', 10))
+            except ValueError:
+                raise ApiError(400, "count must be a number")
+            return 200, service.search(params.get('kind', 'videos'), params.get('source', 'Public Only'),
+                                       params.get('q', ''), count)
+        if path == '/downloads':
+            if method == 'POST':
+                try:
+                    return 202, service.submit_download(self._body()).to_dict()
+                except (TypeError, ValueError) as e:
+                    raise ApiError(400, str(e))
+            if method == 'GET':
+                return 200, service.list_jobs()
+        if method == 'GET' and path.startswith('/downloads/'):
+            return 200, service.job(path.rsplit('/', 1)[1]).to_dict()
+        if method == 'GET' and path == '/history':
+            return 200, persistence.get_history(_limit(params))
+        if method == 'GET' and path == '/history/downloads':
+            return 200, persistence.get_downloads(_limit(params))
+        raise ApiError(404, f"no route for {method} {path}")
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+
+def serve(config, download_root: Path, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+          token: Optional[str] = None) -> ThreadingHTTPServer:
+    # Returns a bound server; the caller runs serve_forever(). Anything
+    # other than loopback needs a token, since the server downloads for its callers.
+    if not token and not is_loopback(host):
+        raise ValueError(f"a token is required to serve on {host}")
+    service = StockService(config, download_root)
+    handler = type('Handler', (_Handler,), {'service': service, 'token': token})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    logger.info(f"API server listening on http://{host}:{server.server_address[1]} "
+                f"(downloads in {download_root})")
+    return server
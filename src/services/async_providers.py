@@ -0,0 +1,342 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional
+from .api_client import AsyncVideoService
+from .async_transport import AsyncTransport
+from .rate_limiter import RateLimited
+from .search_engine import (select_sources, SearchRun, DONE, PUBLIC_VIDEO_SOURCES, API_VIDEO_SOURCES,
+                            PUBLIC_PHOTO_SOURCES, ALL_PHOTO_SOURCES)
+from .paginator import paginators
+from . import pexels, pixabay
+from .pexels import PexelsService
+from .pixabay import PixabayService
+from .mixkit_scraper import MixkitScraper
+from .coverr_scraper import CoverrScraper
+from .videezy_scraper import VideezyScraper
+from .mazwai_scraper import MazwaiScraper
+from .burst_scraper import BurstScraper
+from .stocksnap_scraper import StocksnapScraper
+from .unsplash_scraper import UnsplashScraper
+from .dedup import deduplicator
+from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, normalize_query, INCOMPLETE, WHOLE_PAGE
+
+# Async counterpart of search_engine.Provider: (query, count) -> async iterable
+AsyncProvider = Callable[[str, int], AsyncIterator[Dict[str, Any]]]
+
+SCRAPERS = {
+    'Mixkit': MixkitScraper,
+    'Coverr': CoverrScraper,
+    'Videezy': VideezyScraper,
+    'Mazwai': MazwaiScraper,
+    'Burst': BurstScraper,
+    'Stocksnap': StocksnapScraper,
+    'Unsplash': UnsplashScraper,
+}
+
+async def _collect(stream: AsyncIterator[Dict[str, Any]]):
+    # (results, complete); async generators can't return INCOMPLETE, so
+    # they yield it as their last item instead
+    results, complete = [], True
+    async for item in stream:
+        if item is INCOMPLETE:
+            complete = False
+        else:
+            results.append(item)
+    return results, complete
+
+
+async def _cached(provider: str, kind: str, query: str, count: int,
+                  stream: Callable[[], AsyncIterator[Dict[str, Any]]],
+                  asked: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    # result_cache.cached for async streams: same entries, same rules, and a
+    # stale hit is refreshed by the cache's own refresher through the loop.
+    # asked is what stream() was asked for, if more than count (a whole page).
+    loop = asyncio.get_running_loop()
+    asked = asked or count
+
+    def refresh():
+        return asyncio.run_coroutine_threadsafe(_collect(stream()), loop).result()
+
+    results = result_cache.lookup(refresh, provider, kind, query, asked)
+    if results is not None:
+        for item in results[:count]:
+            yield item
+        return
+
+    collected, complete = [], True
+    async for item in stream():
+        if item is INCOMPLETE:
+            complete = False
+            continue
+        collected.append(item)
+        if len(collected) <= count:
+            yield item
+    result_cache.store(provider, kind, query, asked, collected, complete)
+
+
+class AsyncScraper(AsyncVideoService):
+    # Fetches a scraper's search page on the event loop and hands the HTML to
+    # the scraper's own parser, so both backends find the same results
+    def __init__(self, scraper, name: str, http: AsyncTransport):
+        self.scraper = scraper
+        self.name = name
+        self.http = http
+
+    async def _fetch(self, query: str) -> Optional[str]:
+        for url in self.scraper.search_urls(query):
+            logger.debug(f"{self.name} search started: {url}")
+            response = await self.http.get(url, provider=self.name, headers=self.scraper.headers, timeout=10)
+            logger.debug(f"{self.name} response: {response.status_code}")
+            if response.status_code == 200:
+                return response.text
+
+        logger.error(f"{self.name} request failed: {response.status_code}")
+        return None
+
+    async def _stream(self, kind: str, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        parse = self.scraper.parse_videos if kind == 'videos' else self.scraper.parse_photos
+        try:
+            html = await self._fetch(query)
+            if html is None:
+                return
+            # Parsing is CPU work, it would hold up every other request on the loop
+            items = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: list(timed(parse_seconds, parse(html, count), provider=self.name)))
+        except Exception as e:
+            logger.error(f"{self.name} scraper exception: {e}")
+            provider_errors.inc(provider=self.name, reason='scraper')
+            yield INCOMPLETE
+            return
+        for item in items:
+            yield item
+
+    # The whole page is parsed and cached, like the sync scrapers do
+    def iter_videos(self, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        return _cached(self.name, 'videos', query, count, lambda: self._stream('videos', query, WHOLE_PAGE),
+                       WHOLE_PAGE)
+
+    def iter_photos(self, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        return _cached(self.name, 'photos', query, count, lambda: self._stream('photos', query, WHOLE_PAGE),
+                       WHOLE_PAGE)
+
+    def get_video_url(self, video_data: Dict[str, Any]) -> str:
+        return video_data.get('download_url')
+
+
+class AsyncApiService(AsyncVideoService):
+    # Pexels and Pixabay on the event loop. Request building and response
+    # parsing come from the sync service, and pages go through the same
+    # paginator registry, so "load more" continues from the pages either
+    # backend already has.
+    def __init__(self, service, name: str, page_size: int, http: AsyncTransport):
+        self.service = service
+        self.name = name
+        self.page_size = page_size
+        self.http = http
+
+    async def _page(self, kind: str, query: str, page: int, per_page: int):
+        url, params, headers = self.service.page_request(kind, query, page, per_page)
+        logger.debug(f"{self.name} search: {url} page {page}")
+        response = await self.http.get(url, provider=self.name, params=params, headers=headers)
+        if response.status_code == 429:
+            raise RateLimited(f"{self.name} API rate limit exceeded")
+        response.raise_for_status()
+        with parse_seconds.time(provider=self.name):
+            return self.service.parse_page(kind, response.json())
+
+    async def _stream(self, kind: str, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        if not self.service.api_key:
+            logger.debug(f"{self.name}: Missing API key")
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def fetch_page(page: int, per_page: int):
+            # Called by the paginator off the loop; the request itself runs on it
+            return asyncio.run_coroutine_threadsafe(self._page(kind, query, page, per_page), loop).result()
+
+        paginator = paginators.get((self.name, kind, self.service.api_key, normalize_query(query)),
+                                   fetch_page, self.page_size)
+        position = 0
+        while position < count:
+            chunk = await loop.run_in_executor(None, paginator.chunk, position, count)
+            if not chunk:
+                return
+            for item in chunk:
+                yield item
+            position += len(chunk)
+
+    async def _photos(self, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        async for p in self._stream('photos', query, count):
+            yield self.service.format_photo(p)
+
+    def iter_videos(self, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        return _cached(self.name, 'videos', query, count, lambda: self._stream('videos', query, count))
+
+    def iter_photos(self, query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        return _cached(self.name, 'photos', query, count, lambda: self._photos(query, count))
+
+    def get_video_url(self, video_data: Dict[str, Any]) -> str:
+        return self.service.get_video_url(video_data)
+
+    def get_preview_url(self, video_data: Dict[str, Any]) -> Optional[str]:
+        return self.service.get_preview_url(video_data)
+
+
+def _api_service(name: str, config, http: AsyncTransport) -> Optional[AsyncApiService]:
+    if name == 'Pexels' and config.pexels_api_key:
+        return AsyncApiService(PexelsService(config.pexels_api_key), name, pexels.PAGE_SIZE, http)
+    if name == 'Pixabay' and config.pixabay_api_key:
+        return AsyncApiService(PixabayService(config.pixabay_api_key), name, pixabay.PAGE_SIZE, http)
+    logger.debug(f"{name} skipped: No API Key")
+    return None
+
+
+def _api_videos(name: str, service: AsyncApiService) -> AsyncProvider:
+    async def search(query: str, count: int) -> AsyncIterator[Dict[str, Any]]:
+        async for v in service.iter_videos(query, count):
+            v['source'] = name
+            v['download_url'] = service.get_video_url(v)
+            v['preview'] = service.get_preview_url(v)
+            yield v
+    return search
+
+
+def build_async_video_providers(service_type: str, config, http: AsyncTransport) -> Dict[str, AsyncProvider]:
+    providers = {}
+    for name in select_sources(service_type, PUBLIC_VIDEO_SOURCES, PUBLIC_VIDEO_SOURCES + API_VIDEO_SOURCES):
+        if name in SCRAPERS:
+            providers[name] = AsyncScraper(SCRAPERS[name](), name, http).iter_videos
+        else:
+            service = _api_service(name, config, http)
+            if service:
+                providers[name] = _api_videos(name, service)
+    return providers
+
+
+def build_async_photo_providers(service_type: str, config, http: AsyncTransport) -> Dict[str, AsyncProvider]:
+    providers = {}
+    for name in select_sources(service_type, PUBLIC_PHOTO_SOURCES, ALL_PHOTO_SOURCES):
+        if name in SCRAPERS:
+            providers[name] = AsyncScraper(SCRAPERS[name](), name, http).iter_photos
+        else:
+            service = _api_service(name, config, http)
+            if service:
+                providers[name] = service.iter_photos
+    return providers
+
+
+class AsyncSearchEngine:
+    # SearchEngine.search on an event loop: providers are tasks instead of
+    # threads, with the same SearchRun doing the batching, time limit, merge
+    # order and dedupe
+    def __init__(self, timeout: float = 25.0, batch_size: int = 12, batch_interval: float = 0.1):
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+
+    async def search(self, providers: Dict[str, AsyncProvider], query: str, count: int,
+                     on_batch: Optional[Callable[[list], None]] = None,
+                     on_provider_finished: Optional[Callable[[str, list], None]] = None,
+                     on_first_result: Optional[Callable[[float], None]] = None,
+                     dedupe: bool = False,
+                     on_duplicates: Optional[Callable[[list], None]] = None,
+                     start: int = 0) -> List[Dict[str, Any]]:
+        if not providers:
+            return []
+
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        async def run(name, provider):
+            try:
+                async for item in provider(query, count):
+                    events.put_nowait((name, item))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{name} search failed: {e}")
+                provider_errors.inc(provider=name, reason='search')
+            finally:
+                events.put_nowait((name, DONE))
+
+        tasks = [asyncio.ensure_future(run(name, provider)) for name, provider in providers.items()]
+
+        search = SearchRun(providers, count, self.timeout, self.batch_size, self.batch_interval,
+                           loop.time, on_batch, on_provider_finished, on_first_result, start)
+        try:
+            while True:
+                wait = search.next_wait()
+                if wait is None:
+                    break
+                try:
+                    name, item = await asyncio.wait_for(events.get(), wait)
+                except asyncio.TimeoutError:
+                    name, item = None, None
+                search.handle(name, item)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        results = search.results()
+        if dedupe:
+            # Reads the stored preview hashes, so it runs next to the loop;
+            # previews not hashed yet report their duplicates later
+            results, dropped = await loop.run_in_executor(None, deduplicator.dedupe, results)
+            if dropped and on_duplicates:
+                on_duplicates(dropped)
+            deduplicator.dedupe_later(results, on_duplicates)
+        return results
+
+
+async_search_engine = AsyncSearchEngine()
+
+
+class EventLoopThread:
+    # One daemon thread running an event loop and its HTTP client. Any thread
+    # can hand it coroutines; every search and page fetch then shares the loop.
+    def __init__(self, http: Optional[AsyncTransport] = None):
+        self.loop = asyncio.new_event_loop()
+        self.http = http or AsyncTransport()
+        self._thread = threading.Thread(target=self._run, name='async-loop', daemon=True)
+        self._thread.start()
+        logger.debug(f"Event loop thread started ({self.http.backend})")
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None):
+        # Blocks the calling thread, never call it from the loop itself
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        if not self.loop.is_running():
+            return
+        try:
+            self.run(self.http.aclose(), timeout=5)
+        except Exception as e:
+            logger.debug(f"Async transport close failed: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+
+def event_loop() -> EventLoopThread:
+    # Started on first use and stopped when the interpreter exits
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = EventLoopThread()
+            atexit.register(_event_loop.stop)
+        return _event_loop
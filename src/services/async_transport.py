@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+import requests
+from . import transport
+from .transport import USER_AGENT, DEFAULT_TIMEOUT, POOL_HOSTS, POOL_SIZE_PER_HOST
+from .rate_limiter import rate_limiter, RETRY_STATUSES
+from ..utils.logger import logger
+
+# Async counterpart of transport.get for code running on an event loop. The
+# first installed client wins; without one, requests still works through a
+# small thread pool, just without the savings.
+BACKENDS = ['httpx', 'aiohttp', 'threads']
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+def available_backends() -> List[str]:
+    available = []
+    if httpx is not None:
+        available.append('httpx')
+    if aiohttp is not None:
+        available.append('aiohttp')
+    available.append('threads')
+    return available
+
+
+def backend() -> str:
+    preferred = os.getenv('STOCK_PARSER_HTTP_BACKEND')
+    available = available_backends()
+    return preferred if preferred in available else available[0]
+
+
+class AsyncResponse:
+    # The parts of requests.Response the providers use, read in full
+    __slots__ = ('url', 'status_code', 'headers', 'text', 'size')
+
+    def __init__(self, url: str, status_code: int, headers, text: str, size: Optional[int] = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        # Bytes received, for the metrics
+        self.size = len(text) if size is None else size
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class AsyncTransport:
+    # One client per event loop, created on first use inside it. Connections
+    # are pooled per host like the sync session's.
+    def __init__(self, backend_name: Optional[str] = None, max_connections: int = POOL_HOSTS * 4):
+        name = backend_name or backend()
+        if name not in available_backends():
+            raise ValueError(f"HTTP backend '{name}' is not available")
+        self.backend = name
+        self.max_connections = max_connections
+        self._client = None
+        self._executor = None
+
+    def _headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        merged = {'User-Agent': USER_AGENT}
+        merged.update(headers or {})
+        return merged
+
+    async def _send(self, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]],
+                    timeout: float) -> AsyncResponse:
+        if self.backend == 'httpx':
+            if self._client is None:
+                limits = httpx.Limits(max_connections=self.max_connections,
+                                      max_keepalive_connections=POOL_HOSTS * POOL_SIZE_PER_HOST)
+                self._client = httpx.AsyncClient(limits=limits, follow_redirects=True)
+            r = await self._client.get(url, params=params, headers=self._headers(headers), timeout=timeout)
+            return AsyncResponse(str(r.url), r.status_code, r.headers, r.text, len(r.content))
+
+        if self.backend == 'aiohttp':
+            if self._client is None:
+                connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=POOL_SIZE_PER_HOST)
+                self._client = aiohttp.ClientSession(connector=connector)
+            # aiohttp only takes string query values
+            params = {k: str(v) for k, v in params.items()} if params else None
+            async with self._client.get(url, params=params, headers=self._headers(headers),
+                                        timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                text = await r.text(errors='replace')
+                return AsyncResponse(str(r.url), r.status, r.headers, text, r.content_length)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=POOL_SIZE_PER_HOST, thread_name_prefix='async-http')
+        r = await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            lambda: transport.session().get(url, params=params, headers=headers, timeout=timeout))
+        return AsyncResponse(r.url, r.status_code, r.headers, r.text, len(r.content))
+
+    async def get(self, url: str, provider: Optional[str] = None, params: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, str]] = None, timeout: float = DEFAULT_TIMEOUT) -> AsyncResponse:
+        # Same contract as transport.get: with a provider name the request
+        # waits for that provider's rate limit, sleeping on the loop rather
+        # than blocking it, and throttled responses are retried
+        if provider is None:
+            return await self._send(url, params, headers, timeout)
+
+        for attempt in range(rate_limiter.max_retries + 1):
+            wait = rate_limiter.reserve(provider)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            started = time.perf_counter()
+            try:
+                response = await self._send(url, params, headers, timeout)
+            except Exception as e:
+                transport.record_request(provider, time.perf_counter() - started, error=e)
+                raise
+            transport.record_request(provider, time.perf_counter() - started, response.status_code, response.size)
+            rate_limiter.observe(provider, response)
+            if response.status_code not in RETRY_STATUSES or attempt == rate_limiter.max_retries:
+                return response
+            rate_limiter.retry_delay(provider, response, attempt)
+        return response
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        if client is not None:
+            if self.backend == 'httpx':
+                await client.aclose()
+            else:
+                await client.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        logger.debug(f"Async transport ({self.backend}) closed")
@@ -0,0 +1,87 @@
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from .search_engine import (search_engine, build_video_providers, build_photo_providers,
+                            PUBLIC_VIDEO_SOURCES, API_VIDEO_SOURCES, ALL_PHOTO_SOURCES)
+from .download_manager import download_manager, safe_filename, ProgressCallback
+from .downloader import MAX_VIDEO_SIZE
+from ..utils.logger import logger
+from ..utils.persistence import persistence
+
+# Search and download the way the GUI does, without Qt, so the GUI workers
+# and the command line share it
+KINDS = ('videos', 'photos')
+
+# Fields of a search result worth handing to other programs; enough to
+# download it again with download()
+ITEM_FIELDS = ('id', 'source', 'title', 'download_url', 'url', 'preview', 'width', 'height', 'duration')
+
+
+def provider_names(kind: str) -> List[str]:
+    # The 'source' a search result of this kind can carry
+    return PUBLIC_VIDEO_SOURCES + API_VIDEO_SOURCES if kind == 'videos' else ALL_PHOTO_SOURCES
+
+
+def service_types(kind: str) -> List[str]:
+    # What the search views offer in their source box
+    return ['Public Only', 'All Sources'] + provider_names(kind)
+
+
+def search(kind: str, service_type: str, query: str, count: int, config, start: int = 0,
+           **callbacks: Optional[Callable]) -> List[Dict[str, Any]]:
+    # callbacks go straight to SearchEngine.search (on_batch, on_duplicates, ...).
+    # start > 0 continues an earlier search ("load more"), which is already
+    # in the history.
+    build = build_video_providers if kind == 'videos' else build_photo_providers
+    results = search_engine.search(build(service_type, config), query, count, dedupe=True, start=start,
+                                   **callbacks)
+    if not start:
+        persistence.add_history(query, service_type, len(results))
+    return results
+
+
+def summarize(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: item[k] for k in ITEM_FIELDS if item.get(k) not in (None, '')}
+
+
+def download_tasks(kind: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Items without a file to fetch get a task with url None, which
+    # download() reports as failed instead of dropping it
+    tasks = []
+    for item in items:
+        if kind == 'videos':
+            tasks.append({
+                'url': item.get('download_url'),
+                'id': item['id'],
+                'filename': safe_filename(item['source'], item['id'], '.mp4'),
+                'source': item['source'],
+                'max_size': MAX_VIDEO_SIZE
+            })
+        else:
+            tasks.append({
+                'url': item.get('url'),
+                'id': item['id'],
+                'filename': safe_filename(item['source'], item['id'], '.jpg'),
+                'source': item['source']
+            })
+    return tasks
+
+
+def download(kind: str, items: List[Dict[str, Any]], save_path: Path,
+             on_progress: Optional[ProgressCallback] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Returns (completed, failed) tasks; completed ones carry 'path'
+    tasks = download_tasks(kind, items)
+    failed = [task for task in tasks if not task['url']]
+    tasks = [task for task in tasks if task['url']]
+    if failed:
+        logger.warning(f"{len(failed)} {kind} without a download URL: "
+                       + ', '.join(f"{task['source']} {task['id']}" for task in failed))
+    finished = []
+
+    def on_file_finished(task, ok):
+        (finished if ok else failed).append(task)
+
+    download_manager.download(tasks, Path(save_path), on_progress=on_progress,
+                              on_file_finished=on_file_finished)
+    # Recorded in one batch once the whole run is over
+    persistence.add_downloads((task['filename'], task['source'], task['path']) for task in finished)
+    return finished, failed
@@ -1,75 +1,86 @@
-import requests
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List, Dict, Any, Iterator
 from urllib.parse import urljoin
+from . import transport, html_parser
+from .api_client import PageScraper
+from .transport import BROWSER_HEADERS
 from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, INCOMPLETE
 
-class BurstScraper:
+class BurstScraper(PageScraper):
     def __init__(self):
         self.base_url = "https://burst.shopify.com"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-        }
+        self.headers = BROWSER_HEADERS
 
     def search_photos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_photos(query, count))
+
+    def search_urls(self, query: str) -> List[str]:
         search_term = query.lower().replace(' ', '+')
-        url = f"{self.base_url}/photos/search?q={search_term}"
-        logger.debug(f"Burst search started: {url}")
-        
+        return [f"{self.base_url}/photos/search?q={search_term}"]
+
+    @result_cache.cached('Burst', 'photos', whole_page=True)
+    def iter_photos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Burst response: {response.status_code}")
-            
+            for url in self.search_urls(query):
+                logger.debug(f"Burst search started: {url}")
+                response = transport.get(url, headers=self.headers, timeout=10, provider='Burst')
+                logger.debug(f"Burst response: {response.status_code}")
+                if response.status_code == 200:
+                    break
+
             if response.status_code != 200:
                 logger.error(f"Burst request failed: {response.status_code}")
-                return []
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            photos = []
-            
-            # Burst photo tiles usually have class 'photo-tile' or are inside specific grids
-            items = soup.find_all('div', class_='photo-tile')
-            logger.debug(f"Burst potential items: {len(items)}")
+                return
 
-            for item in items[:count]:
-                try:
-                    img = item.find('img')
-                    if not img: continue
-                    
-                    link = item.find('a', class_='photo-tile__image-wrapper')
-                    if not link: continue
-                    
-                    preview = img.get('src', '')
-                    if not preview.startswith('http'):
-                        preview = urljoin(self.base_url, preview)
-                        
-                    # Burst ID can be extracted from the link href or img src
-                    href = link.get('href', '')
-                    photo_id = href.split('/')[-1] if href else "burst-photo"
-                    
-                    # Direct download link logic for Burst:
-                    # They usually have a download button on the page. 
-                    # For simplicity, we can use the high-res link if findable or the preview.
-                    # Usually: https://burst.shopify.com/photos/[id]/download
-                    download_url = f"{self.base_url}{href}/download"
-                    
-                    photos.append({
-                        'id': photo_id,
-                        'title': img.get('alt', f"Burst {photo_id}"),
-                        'source': 'Burst',
-                        'url': download_url,
-                        'preview': preview,
-                        'width': 0,
-                        'height': 0
-                    })
-                except Exception as e:
-                    logger.warning(f"Error parsing Burst item: {e}")
-                    continue
-
-            logger.info(f"Burst search finished: {len(photos)} results")
-            return photos
+            yield from timed(parse_seconds, self.parse_photos(response.text, count), provider='Burst')
         except Exception as e:
             logger.error(f"Burst scraper exception: {e}")
-            return []
+            provider_errors.inc(provider='Burst', reason='scraper')
+            return INCOMPLETE
+
+    def parse_photos(self, html: str, count: int) -> Iterator[Dict[str, Any]]:
+        page = html_parser.parse(html)
+        found = 0
+
+        # Burst photo tiles usually have class 'photo-tile' or are inside specific grids
+        items = page.select('div.photo-tile')
+        logger.debug(f"Burst potential items: {len(items)}")
+
+        for item in items[:count]:
+            try:
+                img = item.select_one('img')
+                if not img: continue
+
+                link = item.select_one('a.photo-tile__image-wrapper')
+                if not link: continue
+
+                preview = img.get('src', '')
+                if not preview.startswith('http'):
+                    preview = urljoin(self.base_url, preview)
+
+                # Burst ID can be extracted from the link href or img src
+                href = link.get('href', '')
+                photo_id = href.split('/')[-1] if href else "burst-photo"
+
+                # Direct download link logic for Burst:
+                # They usually have a download button on the page. 
+                # For simplicity, we can use the high-res link if findable or the preview.
+                # Usually: https://burst.shopify.com/photos/[id]/download
+                download_url = f"{self.base_url}{href}/download"
+
+                found += 1
+                yield {
+                    'id': photo_id,
+                    'title': img.get('alt', f"Burst {photo_id}"),
+                    'source': 'Burst',
+                    'url': download_url,
+                    'preview': preview,
+                    'width': 0,
+                    'height': 0
+                }
+            except Exception as e:
+                logger.warning(f"Error parsing Burst item: {e}")
+                continue
+
+        logger.info(f"Burst search finished: {found} results")
@@ -1,91 +1,166 @@
-import requests
-import re
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
 import json
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from . import transport, html_parser
+from .api_client import PageScraper
+from .transport import BROWSER_HEADERS
 from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, INCOMPLETE
 
-class CoverrScraper:
+NEXT_DATA_MARKER = 'id="__NEXT_DATA__"'
+
+# Where the search page keeps its results inside __NEXT_DATA__, most likely
+# first. '*' matches every element of a list.
+RESULT_PATHS: List[Tuple[str, ...]] = [
+    ('props', 'pageProps', 'searchResults', 'hits'),
+    ('props', 'pageProps', 'videos', 'hits'),
+    ('props', 'pageProps', 'videos'),
+    ('props', 'pageProps', 'initialData', 'videos'),
+    ('props', 'pageProps', 'dehydratedState', 'queries', '*', 'state', 'data', 'hits'),
+]
+
+
+def _is_video(obj: Any) -> bool:
+    return isinstance(obj, dict) and isinstance(obj.get('urls'), dict) and 'mp4' in obj['urls']
+
+
+def _script_body(html: str, marker: str) -> Optional[str]:
+    at = html.find(marker)
+    if at == -1:
+        return None
+    start = html.find('>', at) + 1
+    end = html.find('</script>', start)
+    if start == 0 or end == -1:
+        return None
+    return html[start:end]
+
+
+def _resolve(obj: Any, path: Tuple[str, ...]) -> Iterator[Any]:
+    if not path:
+        yield obj
+        return
+    key, rest = path[0], path[1:]
+    if key == '*':
+        if isinstance(obj, list):
+            for item in obj:
+                yield from _resolve(item, rest)
+    elif isinstance(obj, dict) and key in obj:
+        yield from _resolve(obj[key], rest)
+
+
+def _from_known_paths(data: Any) -> Optional[Iterator[Dict[str, Any]]]:
+    # Items of the first known path that holds videos, or None when the
+    # payload has a layout we don't know
+    for path in RESULT_PATHS:
+        for hits in _resolve(data, path):
+            if isinstance(hits, list) and any(_is_video(v) for v in hits):
+                return (v for found in _resolve(data, path) if isinstance(found, list)
+                        for v in found if _is_video(v))
+    return None
+
+
+def _walk_all(data: Any) -> Iterator[Dict[str, Any]]:
+    # Depth-first over the whole payload, in document order. Lazy, so it
+    # stops as soon as the caller has enough.
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            if _is_video(obj):
+                yield obj
+            stack.extend(reversed(list(obj.values())))
+        elif isinstance(obj, list):
+            stack.extend(reversed(obj))
+
+
+class CoverrScraper(PageScraper):
     def __init__(self):
         self.base_url = "https://coverr.co/s"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
+        self.headers = BROWSER_HEADERS
 
     def search_videos(self, query: str, count: int) -> List[Dict[str, Any]]:
-        url = f"{self.base_url}?q={query.lower().replace(' ', '+')}"
-        logger.debug(f"Coverr search started: {url}")
-        
+        return list(self.iter_videos(query, count))
+
+    def search_urls(self, query: str) -> List[str]:
+        return [f"{self.base_url}?q={query.lower().replace(' ', '+')}"]
+
+    @result_cache.cached('Coverr', 'videos', whole_page=True)
+    def iter_videos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Coverr response: {response.status_code}")
-            
+            for url in self.search_urls(query):
+                logger.debug(f"Coverr search started: {url}")
+                response = transport.get(url, headers=self.headers, timeout=10, provider='Coverr')
+                logger.debug(f"Coverr response: {response.status_code}")
+                if response.status_code == 200:
+                    break
+
             if response.status_code != 200:
                 logger.error(f"Coverr request failed: {response.status_code}")
-                return []
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            videos = []
-            
-            data_script = soup.find('script', id='__NEXT_DATA__')
-            if not data_script:
-                logger.warning("Coverr: __NEXT_DATA__ script not found, trying alternate methods")
-                # Fallback: search for any script containing video data patterns
-                scripts = soup.find_all('script')
-                for s in scripts:
-                    if s.string and 'urls' in s.string and 'mp4' in s.string:
-                        data_script = s
-                        break
-            
-            if data_script and data_script.string:
-                try:
-                    # Clean the script content if it's not pure JSON
-                    json_str = data_script.string
-                    if not json_str.strip().startswith('{'):
-                        json_match = re.search(r'\{.*\}', json_str, re.DOTALL)
-                        if json_match:
-                            json_str = json_match.group(0)
-                    
-                    data = json.loads(json_str)
-                    
-                    # Dig through properties to find videos
-                    memo = []
-                    def find_videos_recursive(obj):
-                        if isinstance(obj, list):
-                            for item in obj:
-                                if isinstance(item, dict) and 'urls' in item and 'mp4' in item.get('urls', {}):
-                                    memo.append(item)
-                                find_videos_recursive(item)
-                        elif isinstance(obj, dict):
-                            if 'urls' in obj and 'mp4' in obj.get('urls', {}):
-                                memo.append(obj)
-                            for k, v in obj.items():
-                                find_videos_recursive(v)
-                    
-                    find_videos_recursive(data)
-                    logger.debug(f"Coverr extracted {len(memo)} raw items")
-
-                    for v in memo[:count]:
-                        video_id = v.get('id')
-                        slug = v.get('slug')
-                        if not video_id: continue
-                        
-                        download_url = v.get('urls', {}).get('mp4')
-                        if not download_url:
-                            download_url = f"https://coverr-video.s3.amazonaws.com/mp4/{slug}.mp4"
-                        
-                        videos.append({
-                            'id': video_id,
-                            'title': v.get('title', f"Coverr {video_id}"),
-                            'source': 'Coverr',
-                            'download_url': download_url,
-                            'preview': v.get('thumbnail')
-                        })
-                except Exception as e:
-                    logger.error(f"Coverr JSON parsing error: {e}")
-            
-            logger.info(f"Coverr search finished: {len(videos)} results")
-            return videos
+                return
+
+            yield from timed(parse_seconds, self.parse_videos(response.text, count), provider='Coverr')
         except Exception as e:
             logger.error(f"Coverr scraper exception: {e}")
-            return []
+            provider_errors.inc(provider='Coverr', reason='scraper')
+            return INCOMPLETE
+
+    def parse_videos(self, html: str, count: int) -> Iterator[Dict[str, Any]]:
+        found = 0
+        data = self._load_page_data(html)
+        if data is None:
+            logger.warning("Coverr: no video data found on page")
+            logger.info(f"Coverr search finished: {found} results")
+            return
+
+        videos = _from_known_paths(data)
+        if videos is None:
+            logger.debug("Coverr: no known result array, walking the whole payload")
+            videos = _walk_all(data)
+
+        seen = set()
+        for v in videos:
+            if found >= count: break
+
+            video_id = v.get('id')
+            slug = v.get('slug')
+            if not video_id or video_id in seen: continue
+            seen.add(video_id)
+
+            download_url = v.get('urls', {}).get('mp4')
+            if not download_url:
+                download_url = f"https://coverr-video.s3.amazonaws.com/mp4/{slug}.mp4"
+
+            found += 1
+            yield {
+                'id': video_id,
+                'title': v.get('title', f"Coverr {video_id}"),
+                'source': 'Coverr',
+                'download_url': download_url,
+                'preview': v.get('thumbnail')
+            }
+
+        logger.info(f"Coverr search finished: {found} results")
+
+    def _load_page_data(self, html: str) -> Optional[Any]:
+        # __NEXT_DATA__ is cut straight out of the page, no DOM needed
+        json_str = _script_body(html, NEXT_DATA_MARKER)
+        if json_str is None:
+            logger.warning("Coverr: __NEXT_DATA__ script not found, trying alternate methods")
+            # Fallback: search for any script containing video data patterns
+            for s in html_parser.parse(html).select('script'):
+                text = s.text
+                if text and 'urls' in text and 'mp4' in text:
+                    json_str = text
+                    break
+        if not json_str:
+            return None
+
+        # Clean the script content if it's not pure JSON
+        start, end = json_str.find('{'), json_str.rfind('}')
+        if start == -1 or end < start:
+            return None
+        try:
+            return json.loads(json_str[start:end + 1])
+        except ValueError as e:
+            logger.error(f"Coverr JSON parsing error: {e}")
+            return None
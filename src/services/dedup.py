@@ -0,0 +1,279 @@
+import io
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from urllib.parse import urlsplit
+from . import transport
+from ..utils.logger import logger
+from ..utils.thumbnail_cache import THUMB_WIDTH, THUMB_HEIGHT, thumbnail_path
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Size and quality markers stripped from the last path segment, so
+# clip-720.mp4 and clip-1080.mp4 normalize to the same URL
+_VARIANT = re.compile(r'[-_.](\d{3,4}p?|\d{2,4}x\d{2,4}|thumb|thumbnail|preview|poster|tiny|small|medium|large|hd|sd)(?=[-_.]|$)',
+                      re.IGNORECASE)
+
+# Two previews count as the same picture below this many differing bits (of 64)
+HASH_DISTANCE = 6
+
+
+def normalize_url(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path.rstrip('/')
+    head, _, last = path.rpartition('/')
+    stem, dot, ext = last.rpartition('.')
+    if dot:
+        last = _VARIANT.sub('', stem) + '.' + ext.lower()
+    else:
+        last = _VARIANT.sub('', last)
+    return f"{host}{head}/{last}"
+
+
+def dhash(data: bytes, size: int = 8) -> Optional[int]:
+    # 64-bit difference hash: brightness steps between neighbouring pixels
+    # of a tiny grayscale copy, which survives rescaling and recompression
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft('L', (size * 4, size * 4))
+            pixels = list(image.convert('L').resize((size + 1, size), Image.BILINEAR).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def save_thumbnail(data: bytes, path: Path):
+    # The same scaled JPEG the GUI's ThumbnailLoader would have stored
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            scale = max(THUMB_WIDTH / image.width, THUMB_HEIGHT / image.height)
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            thumb = image.convert('RGB').resize(size, Image.BILINEAR)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        thumb.save(tmp_path, 'JPEG', quality=85)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.debug(f"Thumbnail save failed for {path.name}: {e}")
+
+
+def _pixels(item: Dict[str, Any]) -> int:
+    return (item.get('width') or 0) * (item.get('height') or 0)
+
+
+def _duration(item: Dict[str, Any]) -> Optional[float]:
+    try:
+        return float(item['duration'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _compatible(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    # Metadata that rules a match out; unknown values rule nothing out
+    da, db = _duration(a), _duration(b)
+    if da is not None and db is not None and abs(da - db) > 1.0:
+        return False
+    if _pixels(a) and _pixels(b):
+        ratio_a = a['width'] / a['height']
+        ratio_b = b['width'] / b['height']
+        if abs(ratio_a - ratio_b) > 0.05:
+            return False
+    return True
+
+
+def _quality(item: Dict[str, Any]) -> Tuple:
+    # Higher is better: resolution first, then having a direct file at all
+    return (_pixels(item), bool(item.get('download_url') or item.get('url')), _duration(item) or 0)
+
+
+class Deduplicator:
+    # dedupe() compares URLs and the preview hashes already known, so it never
+    # waits on the network. dedupe_later() hashes the remaining previews in the
+    # background, from the thumbnail cache where possible, and reports what
+    # else turned out to be a duplicate.
+    def __init__(self, max_workers: int = 8, hash_budget: float = 6.0, distance: int = HASH_DISTANCE,
+                 max_hashes: int = 5000, hash_file: Optional[Path] = None):
+        self.max_workers = max_workers
+        # Previews still missing after this many seconds wait for a later search
+        self.hash_budget = hash_budget
+        self.distance = distance
+        self.max_hashes = max_hashes
+        # preview url -> dhash, kept across searches and runs
+        self.hash_file = hash_file or Path.home() / ".stock_parser" / "cache" / "preview_hashes.json"
+        self._hashes = None  # loaded on first use, oldest first
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dedup')
+        self._later = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dedup-later')
+
+    def _load_hashes(self):
+        # Called with the lock held
+        if self._hashes is not None:
+            return
+        entries = {}
+        try:
+            with open(self.hash_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Preview hashes unreadable, starting empty: {e}")
+        self._hashes = OrderedDict((url, h) for url, h in entries.items() if isinstance(h, int))
+
+    def _save_hashes(self):
+        # Called with the lock held
+        while len(self._hashes) > self.max_hashes:
+            self._hashes.popitem(last=False)
+        try:
+            self.hash_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.hash_file.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._hashes, f)
+            os.replace(tmp_path, self.hash_file)
+        except Exception as e:
+            logger.error(f"Preview hashes write failed: {e}")
+
+    def _known_hashes(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        urls = {item['preview'] for item in items if item.get('preview')}
+        with self._lock:
+            self._load_hashes()
+            return {url: self._hashes[url] for url in urls if url in self._hashes}
+
+    def _hash_preview(self, url: str) -> Optional[int]:
+        # The card's cached thumbnail if there is one; a fetched preview is
+        # stored there in turn, so the GUI doesn't fetch it again
+        path = thumbnail_path(url)
+        try:
+            value = dhash(path.read_bytes())
+            if value is not None:
+                return value
+        except OSError:
+            pass
+        try:
+            response = transport.get(url, timeout=5)
+            if response.status_code != 200:
+                return None
+            value = dhash(response.content)
+            if value is not None:
+                save_thumbnail(response.content, path)
+            return value
+        except Exception as e:
+            logger.debug(f"Preview hash failed for {url}: {e}")
+            return None
+
+    def hash_previews(self, items: List[Dict[str, Any]]) -> int:
+        # Blocks up to hash_budget; returns how many new hashes were found
+        if Image is None:
+            return 0
+        known = self._known_hashes(items)
+        missing = {item['preview'] for item in items if item.get('preview')} - set(known)
+        if not missing:
+            return 0
+        futures = {self.executor.submit(self._hash_preview, url): url for url in missing}
+        done, pending = wait(futures, timeout=self.hash_budget)
+        for future in pending:
+            future.cancel()
+        if pending:
+            logger.debug(f"Dedup: {len(pending)} previews not hashed in time")
+        found = {futures[future]: future.result() for future in done if future.result() is not None}
+        if found:
+            with self._lock:
+                self._load_hashes()
+                self._hashes.update(found)
+                self._save_hashes()
+        return len(found)
+
+    def dedupe_later(self, items: List[Dict[str, Any]],
+                     on_duplicates: Optional[Callable[[list], None]] = None):
+        # items are dedupe()'s kept results; duplicates among them that only
+        # the new hashes reveal go to on_duplicates, from a background thread
+        def run():
+            try:
+                if self.hash_previews(items) and on_duplicates:
+                    _, dropped = self.dedupe(items)
+                    if dropped:
+                        on_duplicates(dropped)
+            except Exception as e:
+                logger.warning(f"Dedup: background hashing failed: {e}")
+        if Image is not None and len(items) > 1:
+            self._later.submit(run)
+
+    def dedupe(self, items: List[Dict[str, Any]], perceptual: bool = True) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        # Returns (kept, dropped). Each group of duplicates keeps its best
+        # member, at the position of the group's first member.
+        if len(items) < 2:
+            return list(items), []
+        started = time.monotonic()
+
+        parent = list(range(len(items)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            i, j = find(i), find(j)
+            if i != j:
+                parent[max(i, j)] = min(i, j)
+
+        # Same file or same preview behind differently dressed URLs
+        seen = {}
+        for i, item in enumerate(items):
+            for key in (normalize_url(item.get('download_url') or item.get('url')), normalize_url(item.get('preview'))):
+                if key is None:
+                    continue
+                if key in seen:
+                    union(i, seen[key])
+                else:
+                    seen[key] = i
+
+        # Same picture from different providers, as far as the previews are hashed
+        if perceptual:
+            hashes = self._known_hashes(items)
+            hashed = [(i, hashes[item['preview']]) for i, item in enumerate(items) if item.get('preview') in hashes]
+            for n, (i, hash_i) in enumerate(hashed):
+                for j, hash_j in hashed[n + 1:]:
+                    if bin(hash_i ^ hash_j).count('1') <= self.distance and _compatible(items[i], items[j]):
+                        union(i, j)
+
+        groups = {}
+        for i in range(len(items)):
+            groups.setdefault(find(i), []).append(i)
+
+        kept, dropped = [], []
+        for root in sorted(groups):
+            members = groups[root]
+            best = max(members, key=lambda i: (_quality(items[i]), -i))
+            kept.append(items[best])
+            dropped.extend(items[i] for i in members if i != best)
+
+        if dropped:
+            logger.info(f"Dedup: {len(dropped)} of {len(items)} results were duplicates "
+                        f"({(time.monotonic() - started) * 1000:.0f} ms)")
+        return kept, dropped
+
+
+deduplicator = Deduplicator()
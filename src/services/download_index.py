@@ -0,0 +1,241 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+from ..utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    source TEXT,
+    item_id TEXT,
+    url TEXT,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    verified_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_item ON files (source, item_id);
+CREATE INDEX IF NOT EXISTS files_url ON files (url);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+"""
+
+# How an already downloaded file is put at a new target:
+#   auto      hardlink, else reflink, else copy
+#   hardlink  / reflink / copy  only that
+#   skip      leave the target alone and point at the existing file
+LINK_MODES = ('auto', 'hardlink', 'reflink', 'copy', 'skip')
+
+# When a known file is re-hashed before it is reused:
+#   lazy    when its size/mtime changed, or its last check is older than verify_after
+#   always  every time
+#   off     never (size and mtime only)
+VERIFY_MODES = ('lazy', 'always', 'off')
+
+# Ids the scrapers fall back to when a page gives none; many different clips
+# share them, so such items are only recognised by their URL
+PLACEHOLDER_IDS = {'', 'None', 'mazwai-video', 'burst-photo', 'stocksnap-photo'}
+
+# From linux/fs.h
+FICLONE = 0x40049409
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _item_key(item_id) -> Optional[str]:
+    key = '' if item_id is None else str(item_id)
+    return None if key in PLACEHOLDER_IDS else key
+
+
+def _reflink(source: Path, target: Path):
+    # Copy-on-write clone; only Linux filesystems such as btrfs and XFS
+    if not sys.platform.startswith('linux'):
+        raise OSError("reflink is not supported on this platform")
+    import fcntl
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            target.unlink(missing_ok=True)
+            raise
+
+
+class DownloadIndex:
+    # Remembers every finished download by (source, id), by URL and by content
+    # hash, so the same clip is never fetched or stored twice
+    def __init__(self, db_file: Optional[Path] = None, link_mode: str = 'auto',
+                 verify: str = 'lazy', verify_after: float = 7 * 24 * 60 * 60):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link_mode}")
+        self.db_file = db_file or Path.home() / ".stock_parser" / "download_index.db"
+        self.link_mode = link_mode
+        self.set_verify_mode(verify)
+        self.verify_after = verify_after
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def set_verify_mode(self, mode: str):
+        if mode not in VERIFY_MODES:
+            raise ValueError(f"Unknown verify mode: {mode}")
+        self.verify_mode = mode
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.db_file, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+            with self._schema_lock:
+                if not self._schema_ready:
+                    db.executescript(SCHEMA)
+                    self._schema_ready = True
+        return db
+
+    def _forget(self, path: str):
+        db = self._connection()
+        with db:
+            db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _intact(self, path: str, size: int, mtime: float, sha256: str, verified_at: float,
+                force: bool = False) -> bool:
+        # Whether the indexed file is still what was downloaded, hashing it
+        # only when the verify mode asks for it
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._forget(path)
+            return False
+
+        changed = st.st_size != size or st.st_mtime != mtime
+        if self.verify_mode == 'off' and not force:
+            return st.st_size == size
+
+        stale = time.time() - verified_at > self.verify_after
+        if self.verify_mode == 'lazy' and not changed and not stale and not force:
+            return True
+
+        if file_sha256(Path(path)) != sha256:
+            logger.warning(f"Download index: {path} changed on disk, dropping it")
+            self._forget(path)
+            return False
+
+        db = self._connection()
+        with db:
+            db.execute("UPDATE files SET size = ?, mtime = ?, verified_at = ? WHERE path = ?",
+                       (st.st_size, st.st_mtime, time.time(), path))
+        return True
+
+    def lookup(self, source: str, item_id, url: str) -> Optional[Path]:
+        # An intact local copy of this clip, if one was downloaded before
+        key = _item_key(item_id)
+        if key is None:
+            rows = self._connection().execute(
+                "SELECT path, size, mtime, sha256, verified_at FROM files "
+                "WHERE url = ? ORDER BY verified_at DESC", (url,)).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT path, size, mtime, sha256, verified_at FROM files "
+                "WHERE (source = ? AND item_id = ?) OR url = ? ORDER BY verified_at DESC",
+                (source, key, url)).fetchall()
+        for row in rows:
+            if self._intact(*row):
+                return Path(row[0])
+        return None
+
+    def _by_hash(self, sha256: str, exclude: str) -> Optional[Path]:
+        rows = self._connection().execute(
+            "SELECT path, size, mtime, sha256, verified_at FROM files WHERE sha256 = ? AND path != ?",
+            (sha256, exclude)).fetchall()
+        for row in rows:
+            if self._intact(*row):
+                return Path(row[0])
+        return None
+
+    def _place(self, existing: Path, target: Path, mode: str) -> bool:
+        # Puts existing at target via a temporary name, so a failed attempt
+        # never leaves a half-written target behind
+        tmp = target.with_name(target.name + '.link')
+        tmp.unlink(missing_ok=True)
+        try:
+            if mode == 'hardlink':
+                os.link(existing, tmp)
+            elif mode == 'reflink':
+                _reflink(existing, tmp)
+            else:
+                shutil.copy2(existing, tmp)
+            os.replace(tmp, target)
+            return True
+        except OSError as e:
+            logger.debug(f"Download index: {mode} {existing} -> {target} failed: {e}")
+            tmp.unlink(missing_ok=True)
+            return False
+
+    def materialize(self, existing: Path, target: Path) -> Optional[Path]:
+        # Returns where the clip can now be found, or None if nothing worked
+        target = target.resolve()
+        if existing.resolve() == target:
+            return target
+        if self.link_mode == 'skip':
+            return existing
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        modes = ['hardlink', 'reflink', 'copy'] if self.link_mode == 'auto' else [self.link_mode]
+        for mode in modes:
+            if self._place(existing, target, mode):
+                logger.info(f"Reused {existing} as {target} ({mode})")
+                self._add(target, *self._meta_of(existing))
+                return target
+        return None
+
+    def _meta_of(self, path: Path) -> Tuple[str, str, str, str]:
+        return self._connection().execute(
+            "SELECT source, item_id, url, sha256 FROM files WHERE path = ?", (str(path),)).fetchone()
+
+    def _add(self, path: Path, source: str, item_id, url: str, sha256: str):
+        st = path.stat()
+        db = self._connection()
+        with db:
+            db.execute("INSERT OR REPLACE INTO files (path, source, item_id, url, size, mtime, sha256, verified_at) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                       (str(path), source, _item_key(item_id), url, st.st_size, st.st_mtime, sha256, time.time()))
+
+    def record(self, path: Path, source: str, item_id, url: str) -> Path:
+        # Adds a freshly downloaded file. When the same content is already
+        # stored under another name (same clip, different URL or source) the
+        # new copy is swapped for a link to it where the link mode allows.
+        path = Path(path).resolve()
+        sha256 = file_sha256(path)
+        if self.link_mode in ('auto', 'hardlink', 'reflink'):
+            existing = self._by_hash(sha256, str(path))
+            if existing is not None and not os.path.samefile(existing, path):
+                modes = ['hardlink', 'reflink'] if self.link_mode == 'auto' else [self.link_mode]
+                for mode in modes:
+                    if self._place(existing, path, mode):
+                        logger.info(f"{path} has the same content as {existing}, stored once ({mode})")
+                        break
+        self._add(path, source, item_id, url, sha256)
+        return path
+
+    def verify(self) -> Tuple[int, int]:
+        # Re-hashes every indexed file now; returns (intact, dropped)
+        rows = self._connection().execute(
+            "SELECT path, size, mtime, sha256, verified_at FROM files").fetchall()
+        intact = sum(1 for row in rows if self._intact(*row, force=True))
+        return intact, len(rows) - intact
+
+
+download_index = DownloadIndex()
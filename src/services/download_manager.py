@@ -0,0 +1,162 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional
+from urllib.parse import urlparse
+from .downloader import Downloader
+from .download_index import DownloadIndex, download_index
+from ..utils.logger import logger
+from ..utils.metrics import download_bytes, downloads, download_speed, download_queue, downloads_active
+
+# on_progress(files_done, files_total, bytes_done)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+def safe_filename(source: str, item_id, extension: str) -> str:
+    # Remove query params and illegal characters
+    safe_source = re.sub(r'[^\w\-_.]', '_', str(source).lower())
+    safe_id = re.sub(r'[^\w\-_.]', '_', str(item_id).split('?')[0])
+    return f"{safe_source}_{safe_id}{extension}"
+
+
+def _interleave_by_host(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Round-robin over hosts so one slow CDN doesn't fill the whole pool with
+    # workers that are only waiting for its per-host slot
+    by_host = OrderedDict()
+    for task in tasks:
+        by_host.setdefault(urlparse(task['url']).netloc, []).append(task)
+    ordered = []
+    queues = list(by_host.values())
+    while queues:
+        for queue in list(queues):
+            ordered.append(queue.pop(0))
+            if not queue:
+                queues.remove(queue)
+    return ordered
+
+
+class DownloadManager:
+    def __init__(self, max_workers: int = 8, per_host: int = 4, chunk_size: int = 256 * 1024,
+                 index: Optional[DownloadIndex] = download_index):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.chunk_size = chunk_size
+        # Clips downloaded before are linked or copied from there instead
+        self.index = index
+        # One pool for the whole app, so video and photo batches share the limits
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='download')
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def download(self, tasks: List[Dict[str, Any]], save_path: Path,
+                 on_progress: Optional[ProgressCallback] = None,
+                 on_file_finished: Optional[Callable[[Dict[str, Any], bool], None]] = None) -> List[Dict[str, Any]]:
+        # Each task is a dict with 'url', 'filename' and 'source', plus optional
+        # 'id', 'headers' and 'max_size'. Returns the tasks that completed, each
+        # with 'path' set to where the file ended up.
+        if not tasks:
+            return []
+
+        downloader = Downloader(Path(save_path), chunk_size=self.chunk_size, host_slot=self._host_slot)
+        total = len(tasks)
+        state = {'files': 0, 'bytes': 0, 'reported': 0.0}
+        state_lock = threading.Lock()
+
+        def report(force=False):
+            if not on_progress:
+                return
+            now = time.monotonic()
+            with state_lock:
+                # Byte updates are throttled, file completions always go out
+                if not force and now - state['reported'] < 0.25:
+                    return
+                state['reported'] = now
+                files, done_bytes = state['files'], state['bytes']
+            on_progress(files, total, done_bytes)
+
+        def on_chunk(size):
+            with state_lock:
+                state['bytes'] += size
+            download_bytes.inc(size)
+            report()
+
+        def run_task(task):
+            download_queue.dec()
+            downloads_active.inc()
+            try:
+                return fetch_task(task)
+            finally:
+                downloads_active.dec()
+
+        def fetch_task(task):
+            target = Path(save_path) / task['filename']
+            task['path'] = str(target)
+            if self.index is not None:
+                existing = self.index.lookup(task['source'], task.get('id'), task['url'])
+                if existing is not None:
+                    reused = self.index.materialize(existing, target)
+                    if reused is not None:
+                        task['path'] = str(reused)
+                        downloads.inc(result='reused')
+                        return True
+
+            received = [0]
+
+            def on_file_chunk(size):
+                received[0] += size
+                on_chunk(size)
+
+            with self._host_slot(task['url']):
+                started = time.monotonic()
+                ok = downloader.download_file(
+                    task['url'], task['filename'],
+                    headers=task.get('headers'),
+                    max_size=task.get('max_size'),
+                    on_chunk=on_file_chunk
+                )
+                elapsed = time.monotonic() - started
+            downloads.inc(result='ok' if ok else 'failed')
+            if ok and received[0] and elapsed > 0:
+                download_speed.observe(received[0] / (1024 * 1024) / elapsed)
+            if ok and self.index is not None:
+                try:
+                    self.index.record(target, task['source'], task.get('id'), task['url'])
+                except Exception as e:
+                    logger.warning(f"Download index update failed for {target}: {e}")
+            return ok
+
+        completed = []
+        download_queue.inc(total)
+        futures = {self.executor.submit(run_task, task): task for task in _interleave_by_host(tasks)}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                logger.error(f"Download task crashed for {task['url']}: {e}")
+                downloads.inc(result='failed')
+                ok = False
+
+            if ok:
+                completed.append(task)
+            with state_lock:
+                state['files'] += 1
+            if on_file_finished:
+                on_file_finished(task, ok)
+            report(force=True)
+
+        logger.info(f"Download batch finished: {len(completed)}/{total} files, {state['bytes']} bytes")
+        return completed
+
+
+download_manager = DownloadManager()
@@ -1,36 +1,258 @@
-import requests
+import glob
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, Optional
-from .api_client import VideoService
+from typing import Callable, Optional, Dict
+from . import transport
+from ..utils.logger import logger
+
+# Skip videos larger than this
+MAX_VIDEO_SIZE = 100 * 1024 * 1024
+
+
+class DownloadRejected(Exception):
+    # Raised for responses that retrying will not fix (404, file too large, ...)
+    pass
+
+
+def _total_from_content_range(value: Optional[str]) -> Optional[int]:
+    # "bytes 100-199/1234" or "bytes */1234"
+    match = re.search(r'/(\d+)\s*$', value or '')
+    return int(match.group(1)) if match else None
+
+
+def _start_from_content_range(value: Optional[str]) -> Optional[int]:
+    match = re.match(r'\s*bytes\s+(\d+)-', value or '')
+    return int(match.group(1)) if match else None
+
+
+class _Progress:
+    def __init__(self, progress_callback, on_chunk):
+        self.progress_callback = progress_callback
+        self.on_chunk = on_chunk
+        self.lock = threading.Lock()
+        self.done = 0
+        self.total = 0
+
+    def start(self, done: int, total: Optional[int]):
+        with self.lock:
+            self.done = done
+            self.total = total or 0
+
+    def add(self, size: int):
+        with self.lock:
+            self.done += size
+            done, total = self.done, self.total
+        if self.on_chunk:
+            self.on_chunk(size)
+        if self.progress_callback and total > 0:
+            self.progress_callback(int((done / total) * 100))
+
 
 class Downloader:
-    def __init__(self, save_path: Path):
+    def __init__(self, save_path: Path, chunk_size: int = 256 * 1024, retries: int = 3,
+                 segments: int = 4, segment_threshold: int = 32 * 1024 * 1024,
+                 host_slot: Optional[Callable[[str], threading.BoundedSemaphore]] = None):
         self.save_path = save_path
+        self.chunk_size = chunk_size
+        self.retries = retries
+        # Files at least segment_threshold bytes long are fetched as this many
+        # parallel byte ranges when the server supports it; 1 turns it off
+        self.segments = segments
+        self.segment_threshold = segment_threshold
+        # The caller's per-host connection limit. The file itself already holds
+        # one slot; segments only run side by side on slots that are free.
+        self.host_slot = host_slot
 
-    def download_video(self, url: str, filename: str, progress_callback: Optional[Callable[[int], None]] = None) -> bool:
-        try:
-            response = requests.get(url, stream=True, timeout=30)
-            if response.status_code == 200:
-                total_size = int(response.headers.get('content-length', 0))
-                
-                # Skip if > 100MB
-                if total_size > 100 * 1024 * 1024:
-                    return False
-                
-                file_path = self.save_path / filename
+    def download_video(self, url: str, filename: str, progress_callback: Optional[Callable[[int], None]] = None,
+                       on_chunk: Optional[Callable[[int], None]] = None) -> bool:
+        return self.download_file(url, filename, progress_callback, max_size=MAX_VIDEO_SIZE, on_chunk=on_chunk)
+
+    def download_file(self, url: str, filename: str, progress_callback: Optional[Callable[[int], None]] = None,
+                      headers: Optional[Dict[str, str]] = None, max_size: Optional[int] = None,
+                      on_chunk: Optional[Callable[[int], None]] = None, timeout: int = 30) -> bool:
+        # Data goes to "<filename>.part" and is only renamed into place once its
+        # size matches what the server announced. A leftover .part file from an
+        # earlier attempt is resumed with a Range request, so it only ever holds
+        # a contiguous start of the file; segmented downloads keep their pieces
+        # in files of their own until all of them are complete.
+        file_path = self.save_path / filename
+        part_path = self.save_path / (filename + '.part')
+        progress = _Progress(progress_callback, on_chunk)
+
+        for attempt in range(1, self.retries + 1):
+            try:
                 self.save_path.mkdir(parents=True, exist_ok=True)
-                
-                downloaded_size = 0
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded_size += len(chunk)
-                            if progress_callback and total_size > 0:
-                                percent = int((downloaded_size / total_size) * 100)
-                                progress_callback(percent)
+                total_size = self._fetch(url, part_path, headers, max_size, progress, timeout)
+
+                size = part_path.stat().st_size
+                if total_size is not None and size != total_size:
+                    raise IOError(f"incomplete file, {size} of {total_size} bytes")
+
+                os.replace(part_path, file_path)
+                # Segments of an earlier attempt at a different size
+                for stale in self.save_path.glob(glob.escape(part_path.name) + '.*'):
+                    stale.unlink(missing_ok=True)
                 return True
-        except Exception as e:
-            print(f"Download error: {e}")
-            return False
+            except DownloadRejected as e:
+                logger.error(f"Download failed for {url}: {e}")
+                return False
+            except Exception as e:
+                logger.warning(f"Download attempt {attempt}/{self.retries} failed for {url}: {e}")
+
+        logger.error(f"Download error for {url}: giving up after {self.retries} attempts")
         return False
+
+    def _fetch(self, url, part_path: Path, headers, max_size, progress: _Progress, timeout) -> Optional[int]:
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        request_headers = dict(headers or {})
+        # Media is already compressed, and sizes must match the bytes on disk
+        request_headers['Accept-Encoding'] = 'identity'
+        if offset:
+            request_headers['Range'] = f'bytes={offset}-'
+        elif self.segments > 1:
+            # A one-byte probe tells the size and whether ranges work, without
+            # starting a body that segmenting would have to throw away. A
+            # server that ignores it answers 200, which is read as usual.
+            request_headers['Range'] = 'bytes=0-0'
+
+        with transport.get(url, headers=request_headers, stream=True, timeout=timeout) as response:
+            if not offset and response.status_code in (206, 416):
+                total_size = _total_from_content_range(response.headers.get('content-range'))
+                # Reading the byte hands the connection back to the pool
+                response.content
+                if max_size and total_size and total_size > max_size:
+                    raise DownloadRejected(f"{total_size} bytes is over the limit")
+                if response.status_code == 206 and total_size and total_size >= self.segment_threshold:
+                    self._fetch_segments(url, part_path, request_headers, total_size, progress, timeout)
+                    return total_size
+                del request_headers['Range']
+                with transport.get(url, headers=request_headers, stream=True, timeout=timeout) as response:
+                    return self._read(url, response, part_path, 0, max_size, progress)
+            return self._read(url, response, part_path, offset, max_size, progress)
+
+    def _read(self, url, response, part_path: Path, offset: int, max_size, progress: _Progress) -> Optional[int]:
+        # Writes the body to part_path, appending when it continues at offset
+        if response.status_code == 416 and offset:
+            total_size = _total_from_content_range(response.headers.get('content-range'))
+            if total_size == offset:
+                return total_size
+            # The partial file doesn't belong to this resource any more
+            part_path.unlink()
+            raise IOError("stale partial file discarded")
+
+        if response.status_code == 206 and offset:
+            content_range = response.headers.get('content-range')
+            start = _start_from_content_range(content_range)
+            if start == 0:
+                offset = 0
+            elif start != offset:
+                # Appending another range would corrupt the file silently
+                part_path.unlink()
+                raise IOError(f"asked for byte {offset}, got range '{content_range}'; restarting")
+            total_size = _total_from_content_range(content_range)
+            logger.debug(f"Resuming {url} at byte {offset}")
+        elif response.status_code == 200:
+            # Either a fresh start or the server ignored our Range header
+            offset = 0
+            total_size = int(response.headers.get('content-length', 0)) or None
+        elif response.status_code == 429 or response.status_code >= 500:
+            raise IOError(f"Status {response.status_code}")
+        else:
+            raise DownloadRejected(f"Status {response.status_code}")
+
+        if max_size and total_size and total_size > max_size:
+            part_path.unlink(missing_ok=True)
+            raise DownloadRejected(f"{total_size} bytes is over the limit")
+
+        progress.start(offset, total_size)
+        with open(part_path, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    progress.add(len(chunk))
+        return total_size
+
+    def _segment_paths(self, part_path: Path, total_size: int, count: int):
+        # Named after the size they belong to, so pieces of a file that
+        # changed on the server are never mixed in
+        return [part_path.with_name(f"{part_path.name}.{total_size}.{n}") for n in range(count)]
+
+    def _fetch_segments(self, url, part_path: Path, headers, total_size: int, progress: _Progress, timeout):
+        segment_size = -(-total_size // self.segments)
+        bounds = [(start, min(start + segment_size, total_size) - 1)
+                  for start in range(0, total_size, segment_size)]
+        paths = self._segment_paths(part_path, total_size, len(bounds))
+
+        # Pieces left by an interrupted attempt are resumed where they stopped
+        done = 0
+        pending = []
+        for (start, end), path in zip(bounds, paths):
+            size = path.stat().st_size if path.exists() else 0
+            if size > end + 1 - start:
+                path.unlink()
+                size = 0
+            done += size
+            if size < end + 1 - start:
+                pending.append((start, end, path))
+        progress.start(done, total_size)
+        logger.debug(f"Fetching {url} as {len(bounds)} segments, {len(pending)} to go")
+
+        # The first segment runs on the slot this file already holds, the
+        # others only on slots nobody else is waiting for
+        extra = []
+        if self.host_slot is not None:
+            slot = self.host_slot(url)
+            while len(extra) < len(pending) - 1 and slot.acquire(blocking=False):
+                extra.append(slot)
+        workers = 1 + len(extra) if self.host_slot is not None else len(pending)
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='segment') as pool:
+                    futures = [pool.submit(self._fetch_segment, url, path, headers, start, end, progress, timeout)
+                               for start, end, path in pending]
+                    for future in futures:
+                        future.result()
+        finally:
+            for slot in extra:
+                slot.release()
+
+        # Joined beside the .part file and renamed onto it, so .part never
+        # holds anything but a contiguous start of the file
+        joined = part_path.with_name(part_path.name + '.joining')
+        with open(joined, 'wb') as out:
+            for path in paths:
+                with open(path, 'rb') as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+        os.replace(joined, part_path)
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def _fetch_segment(self, url, path: Path, headers, start: int, end: int, progress: _Progress, timeout):
+        for attempt in range(1, self.retries + 1):
+            position = start + (path.stat().st_size if path.exists() else 0)
+            if position > end:
+                return
+            try:
+                segment_headers = dict(headers)
+                segment_headers['Range'] = f'bytes={position}-{end}'
+                with transport.get(url, headers=segment_headers, stream=True, timeout=timeout) as response:
+                    if response.status_code != 206:
+                        raise IOError(f"range request answered with status {response.status_code}")
+                    with open(path, 'ab') as f:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if chunk:
+                                chunk = chunk[:end + 1 - position]
+                                f.write(chunk)
+                                position += len(chunk)
+                                progress.add(len(chunk))
+                if position > end:
+                    return
+                raise IOError(f"segment ended early at byte {position}")
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.debug(f"Segment {start}-{end} of {url} retrying from {position}: {e}")
@@ -1,18 +1,50 @@
-import google.generativeai as genai
+import threading
 from typing import List
+from ..utils.logger import logger
+from ..utils.prompt_cache import prompt_cache
+
+MODEL = 'gemini-pro'
+
+# One configured model for the whole process; genai.configure is global,
+# so it is only redone when the key changes
+_client = None  # (api_key, model)
+_client_lock = threading.Lock()
+
+
+def _model(api_key: str):
+    global _client
+    with _client_lock:
+        if _client is None or _client[0] != api_key:
+            # The SDK takes most of a second to import, so it waits until a
+            # prompt is actually requested
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            _client = (api_key, genai.GenerativeModel(MODEL))
+        return _client[1]
+
 
 class GeminiService:
     def __init__(self, api_key: str):
         self.api_key = api_key
 
-    def generate_prompts(self, scenario: str) -> List[str]:
+    def generate_prompts(self, scenario: str, use_cache: bool = True, instruction: str = '') -> List[str]:
+        # Scenarios seen before (or lightly edited since) are answered from
+        # the prompt cache without a request. An instruction goes into the
+        # prompt ahead of the scenario; the cache keeps its answers apart but
+        # only compares the scenarios themselves.
+        cache_model = f"{MODEL}|{instruction}" if instruction else MODEL
+        if use_cache:
+            cached = prompt_cache.get(cache_model, scenario)
+            if cached is not None:
+                return cached
+
         if not self.api_key:
             raise ValueError("Gemini API key is missing")
             
-        genai.configure(api_key=self.api_key)
-        model = genai.GenerativeModel('gemini-pro')
+        model = _model(self.api_key)
         
         prompt = f"""
+        {instruction}
         Create 5 search queries in English for finding stock videos based on the following scenario/description:
         {scenario}
         
@@ -39,4 +71,6 @@ class GeminiService:
                 if len(parts) > 1:
                     prompts.append(parts[1])
                     
+        logger.info(f"Gemini generated {len(prompts)} prompts")
+        prompt_cache.put(cache_model, scenario, prompts)
         return prompts
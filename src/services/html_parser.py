@@ -0,0 +1,157 @@
+import functools
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from ..utils.logger import logger
+
+# Scrapers only need CSS selection, attributes and text, so every backend is
+# wrapped in the same small Node interface. The fastest installed backend
+# wins; BeautifulSoup's built-in html.parser is always there as a fallback.
+BACKENDS = ['selectolax', 'lxml', 'html.parser']
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as _SelectolaxParser
+    except ImportError:
+        _SelectolaxParser = None
+
+# BeautifulSoup imports lxml itself; it only has to be installed
+_HAS_LXML = importlib.util.find_spec('lxml') is not None
+
+
+class Node(ABC):
+    tag: str
+
+    @abstractmethod
+    def get(self, name: str, default=None):
+        pass
+
+    def __getitem__(self, name: str) -> str:
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    @property
+    @abstractmethod
+    def text(self) -> str:
+        pass
+
+    @abstractmethod
+    def select(self, selector: str) -> List['Node']:
+        pass
+
+    @abstractmethod
+    def select_one(self, selector: str) -> Optional['Node']:
+        pass
+
+
+class _SelectolaxNode(Node):
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def tag(self) -> str:
+        return self._node.tag
+
+    def get(self, name: str, default=None):
+        attributes = self._node.attributes
+        if name not in attributes:
+            return default
+        # Attributes without a value come back as None
+        return attributes[name] or ''
+
+    @property
+    def text(self) -> str:
+        return self._node.text(deep=True)
+
+    def select(self, selector: str) -> List[Node]:
+        nodes = self._node.css(selector)
+        if ',' in selector:
+            # A node matching several selectors of a group is returned once
+            # per match; soupsieve returns it once
+            seen = set()
+            nodes = [n for n in nodes if not (n.mem_id in seen or seen.add(n.mem_id))]
+        return [_SelectolaxNode(n) for n in nodes]
+
+    def select_one(self, selector: str) -> Optional[Node]:
+        node = self._node.css_first(selector)
+        return _SelectolaxNode(node) if node is not None else None
+
+
+@functools.lru_cache(maxsize=128)
+def _compiled(selector: str):
+    import soupsieve
+    return soupsieve.compile(selector)
+
+
+class _SoupNode(Node):
+    __slots__ = ('_tag',)
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    @property
+    def tag(self) -> str:
+        return self._tag.name
+
+    def get(self, name: str, default=None):
+        value = self._tag.get(name, default)
+        # Multi-valued attributes such as class come back as lists
+        return ' '.join(value) if isinstance(value, list) else value
+
+    @property
+    def text(self) -> str:
+        return self._tag.get_text()
+
+    def select(self, selector: str) -> List[Node]:
+        return [_SoupNode(t) for t in _compiled(selector).select(self._tag)]
+
+    def select_one(self, selector: str) -> Optional[Node]:
+        tag = _compiled(selector).select_one(self._tag)
+        return _SoupNode(tag) if tag is not None else None
+
+
+def available_backends() -> List[str]:
+    available = []
+    if _SelectolaxParser is not None:
+        available.append('selectolax')
+    if _HAS_LXML:
+        available.append('lxml')
+    available.append('html.parser')
+    return available
+
+
+_backend = None
+
+
+def set_backend(name: Optional[str]):
+    # None goes back to picking the fastest installed backend
+    global _backend
+    if name is not None and name not in available_backends():
+        raise ValueError(f"HTML backend '{name}' is not available")
+    _backend = name
+
+
+def backend() -> str:
+    global _backend
+    if _backend is None:
+        preferred = os.getenv('STOCK_PARSER_HTML_BACKEND')
+        available = available_backends()
+        _backend = preferred if preferred in available else available[0]
+        logger.debug(f"HTML parser backend: {_backend}")
+    return _backend
+
+
+def parse(html: str) -> Node:
+    name = backend()
+    if name == 'selectolax':
+        return _SelectolaxNode(_SelectolaxParser(html).root)
+
+    from bs4 import BeautifulSoup
+    return _SoupNode(BeautifulSoup(html, name))
@@ -1,67 +1,82 @@
-import requests
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List, Dict, Any, Iterator
 from urllib.parse import urljoin
+from . import transport, html_parser
+from .api_client import PageScraper
+from .transport import BROWSER_HEADERS
 from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, INCOMPLETE
 
-class MazwaiScraper:
+class MazwaiScraper(PageScraper):
     def __init__(self):
         self.base_url = "https://mazwai.com"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
+        self.headers = BROWSER_HEADERS
 
     def search_videos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_videos(query, count))
+
+    def search_urls(self, query: str) -> List[str]:
         search_term = query.lower().replace(' ', '-')
-        url = f"{self.base_url}/stock-video-free/{search_term}"
-        logger.debug(f"Mazwai search started: {url}")
-        
-        try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Mazwai response: {response.status_code}")
-            
-            if response.status_code != 200:
-                # Try search URL instead of categorical URL
-                url = f"{self.base_url}/search/{query.replace(' ', '+')}"
-                logger.debug(f"Retrying Mazwai with search URL: {url}")
-                response = requests.get(url, headers=self.headers, timeout=10)
+        return [
+            f"{self.base_url}/stock-video-free/{search_term}",
+            # Search URL instead of categorical URL
+            f"{self.base_url}/search/{query.replace(' ', '+')}",
+        ]
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            videos = []
-            
-            # Mazwai structure: list items with class 'video-clip'
-            items = soup.find_all('div', class_='video-clip')
-            logger.debug(f"Mazwai potential items: {len(items)}")
+    @result_cache.cached('Mazwai', 'videos', whole_page=True)
+    def iter_videos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
+        try:
+            for url in self.search_urls(query):
+                logger.debug(f"Mazwai search started: {url}")
+                response = transport.get(url, headers=self.headers, timeout=10, provider='Mazwai')
+                logger.debug(f"Mazwai response: {response.status_code}")
+                if response.status_code == 200:
+                    break
 
-            for item in items[:count]:
-                try:
-                    link = item.find('a')
-                    if not link: continue
-                    
-                    href = link.get('href', '')
-                    video_url = urljoin(self.base_url, href)
-                    
-                    # Thumb
-                    img = item.find('img')
-                    thumb = img.get('src', '') if img else ""
-                    
-                    # Mazwai is harder to get direct MP4 without visiting the page
-                    # but we can try to find data-attributes if they exist
-                    # For now, we provide the link to the video page
-                    
-                    videos.append({
-                        'id': href.split('/')[-2] if '/' in href else "mazwai-video",
-                        'title': item.get('data-title', "Mazwai Video"),
-                        'source': 'Mazwai',
-                        'download_url': video_url,
-                        'preview': thumb
-                    })
-                except Exception as e:
-                    logger.warning(f"Error parsing Mazwai item: {e}")
-                    continue
+            if response.status_code != 200:
+                logger.error(f"Mazwai request failed: {response.status_code}")
+                return
 
-            logger.info(f"Mazwai search finished: {len(videos)} results")
-            return videos
+            yield from timed(parse_seconds, self.parse_videos(response.text, count), provider='Mazwai')
         except Exception as e:
             logger.error(f"Mazwai scraper exception: {e}")
-            return []
+            provider_errors.inc(provider='Mazwai', reason='scraper')
+            return INCOMPLETE
+
+    def parse_videos(self, html: str, count: int) -> Iterator[Dict[str, Any]]:
+        page = html_parser.parse(html)
+        found = 0
+
+        # Mazwai structure: list items with class 'video-clip'
+        items = page.select('div.video-clip')
+        logger.debug(f"Mazwai potential items: {len(items)}")
+
+        for item in items[:count]:
+            try:
+                link = item.select_one('a')
+                if not link: continue
+
+                href = link.get('href', '')
+                video_url = urljoin(self.base_url, href)
+
+                # Thumb
+                img = item.select_one('img')
+                thumb = img.get('src', '') if img else ""
+
+                # Mazwai is harder to get direct MP4 without visiting the page
+                # but we can try to find data-attributes if they exist
+                # For now, we provide the link to the video page
+
+                found += 1
+                yield {
+                    'id': href.split('/')[-2] if '/' in href else "mazwai-video",
+                    'title': item.get('data-title', "Mazwai Video"),
+                    'source': 'Mazwai',
+                    'download_url': video_url,
+                    'preview': thumb
+                }
+            except Exception as e:
+                logger.warning(f"Error parsing Mazwai item: {e}")
+                continue
+
+        logger.info(f"Mazwai search finished: {found} results")
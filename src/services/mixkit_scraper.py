@@ -1,78 +1,93 @@
-import requests
 import re
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List, Dict, Any, Iterator
+from . import transport, html_parser
+from .api_client import PageScraper
+from .transport import BROWSER_HEADERS
 from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, INCOMPLETE
 
-class MixkitScraper:
+VIDEO_LINK = re.compile(r'/free-stock-video/.*-\d+/')
+VIDEO_ID = re.compile(r'-(\d+)/?$')
+
+class MixkitScraper(PageScraper):
     def __init__(self):
         self.base_url = "https://mixkit.co/free-stock-video"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
+        self.headers = BROWSER_HEADERS
 
     def search_videos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_videos(query, count))
+
+    def search_urls(self, query: str) -> List[str]:
         search_term = query.lower().replace(' ', '-')
-        url = f"{self.base_url}/{search_term}/"
-        logger.debug(f"Mixkit search started: {url}")
-        
+        return [
+            f"{self.base_url}/{search_term}/",
+            f"https://mixkit.co/search/videos/{query.lower().replace(' ', '%20')}/",
+        ]
+
+    @result_cache.cached('Mixkit', 'videos', whole_page=True)
+    def iter_videos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Mixkit response: {response.status_code}")
-            
-            if response.status_code != 200:
-                url = f"https://mixkit.co/search/videos/{query.lower().replace(' ', '%20')}/"
-                logger.debug(f"Retrying Mixkit with search URL: {url}")
-                response = requests.get(url, headers=self.headers, timeout=10)
-            
+            for url in self.search_urls(query):
+                logger.debug(f"Mixkit search started: {url}")
+                response = transport.get(url, headers=self.headers, timeout=10, provider='Mixkit')
+                logger.debug(f"Mixkit response: {response.status_code}")
+                if response.status_code == 200:
+                    break
+
             if response.status_code != 200:
                 logger.error(f"Mixkit request failed: {response.status_code}")
-                return []
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            videos = []
-            
-            # Mixkit video cards often use generic classes or data attributes
-            items = soup.find_all('div', class_=re.compile(r'video-card'))
-            if not items:
-                # Fallback: look for any links that look like video pages
-                items = soup.find_all('a', href=re.compile(r'/free-stock-video/.*-\d+/'))
-            
-            logger.debug(f"Mixkit found potential items: {len(items)}")
+                return
 
-            for item in items[:count]:
-                try:
-                    # Handle both div-based and a-based items
-                    if item.name == 'a':
-                        href = item['href']
-                        title_tag = item.find(['p', 'h2', 'span'])
-                        title = title_tag.text if title_tag else "Mixkit Video"
-                    else:
-                        link_tag = item.find('a')
-                        if not link_tag: continue
-                        href = link_tag['href']
-                        title_tag = item.find(['p', 'h2', 'span'])
-                        title = title_tag.text if title_tag else "Mixkit Video"
-
-                    video_id_match = re.search(r'-(\d+)/?$', href)
-                    if not video_id_match: continue
-                    
-                    video_id = video_id_match.group(1)
-                    download_url = f"https://assets.mixkit.co/videos/{video_id}/{video_id}-720.mp4"
-                    
-                    videos.append({
-                        'id': video_id,
-                        'title': title.strip(),
-                        'source': 'Mixkit',
-                        'download_url': download_url,
-                        'preview': f"https://assets.mixkit.co/videos/{video_id}/{video_id}-thumb.jpg"
-                    })
-                except Exception as e:
-                    logger.warning(f"Error parsing Mixkit item: {e}")
-                    continue
-                    
-            logger.info(f"Mixkit search finished: {len(videos)} results")
-            return videos
+            yield from timed(parse_seconds, self.parse_videos(response.text, count), provider='Mixkit')
         except Exception as e:
             logger.error(f"Mixkit scraper exception: {e}")
-            return []
+            provider_errors.inc(provider='Mixkit', reason='scraper')
+            return INCOMPLETE
+
+    def parse_videos(self, html: str, count: int) -> Iterator[Dict[str, Any]]:
+        page = html_parser.parse(html)
+        found = 0
+        
+        # Mixkit video cards often use generic classes or data attributes
+        items = page.select('div[class*="video-card"]')
+        if not items:
+            # Fallback: look for any links that look like video pages
+            items = [a for a in page.select('a[href*="/free-stock-video/"]')
+                     if VIDEO_LINK.search(a.get('href', ''))]
+        
+        logger.debug(f"Mixkit found potential items: {len(items)}")
+
+        for item in items[:count]:
+            try:
+                # Handle both div-based and a-based items
+                if item.tag == 'a':
+                    href = item['href']
+                    title_tag = item.select_one('p, h2, span')
+                    title = title_tag.text if title_tag else "Mixkit Video"
+                else:
+                    link_tag = item.select_one('a')
+                    if not link_tag: continue
+                    href = link_tag['href']
+                    title_tag = item.select_one('p, h2, span')
+                    title = title_tag.text if title_tag else "Mixkit Video"
+
+                video_id_match = VIDEO_ID.search(href)
+                if not video_id_match: continue
+                
+                video_id = video_id_match.group(1)
+                download_url = f"https://assets.mixkit.co/videos/{video_id}/{video_id}-720.mp4"
+                
+                found += 1
+                yield {
+                    'id': video_id,
+                    'title': title.strip(),
+                    'source': 'Mixkit',
+                    'download_url': download_url,
+                    'preview': f"https://assets.mixkit.co/videos/{video_id}/{video_id}-thumb.jpg"
+                }
+            except Exception as e:
+                logger.warning(f"Error parsing Mixkit item: {e}")
+                continue
+                
+        logger.info(f"Mixkit search finished: {found} results")
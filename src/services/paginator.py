@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Hashable, Iterator, List, Optional, Tuple
+from ..utils.logger import logger
+
+# fetch_page(page, per_page) -> (items on that page, total results or None)
+PageFetcher = Callable[[int, int], Tuple[List[Dict[str, Any]], Optional[int]]]
+
+_prefetcher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='prefetch')
+
+
+class Paginator:
+    # Walks a paged API one page at a time. Fetched items are kept, so a later
+    # iteration with a larger count ("load more") replays them and only asks
+    # for the pages it doesn't have yet. While a page is being consumed the
+    # next one is already on its way.
+    def __init__(self, fetch_page: PageFetcher, per_page: int, max_items: Optional[int] = None):
+        self.fetch_page = fetch_page
+        self.per_page = per_page
+        # Hard cap on top of the provider's own total, if any
+        self.max_items = max_items
+        self.items = []
+        self.total = None
+        self.next_page = 1
+        self.exhausted = False
+        self._pending = None
+        self._lock = threading.Lock()
+
+    @property
+    def has_more(self) -> bool:
+        return not self.exhausted
+
+    def _load_next(self):
+        # Called with the lock held
+        future, self._pending = self._pending, None
+        if future is None:
+            future = _prefetcher.submit(self.fetch_page, self.next_page, self.per_page)
+        items, total = future.result()
+
+        logger.debug(f"Fetched page {self.next_page} ({len(items)} items, total {total})")
+        self.next_page += 1
+        if total is not None:
+            self.total = total
+        self.items.extend(items)
+
+        limit = min(x for x in (self.total, self.max_items, float('inf')) if x is not None)
+        if len(items) < self.per_page or len(self.items) >= limit:
+            self.exhausted = True
+
+    def chunk(self, position: int, count: int) -> List[Dict[str, Any]]:
+        # Items from position up to count that are available, fetching the
+        # next page first if none are; empty once there are no more. Blocks,
+        # so the async engine calls it from an executor.
+        with self._lock:
+            if position >= len(self.items):
+                if self.exhausted:
+                    return []
+                self._load_next()
+            # Start on the next page only if this iteration will need it
+            if (not self.exhausted and self._pending is None
+                    and len(self.items) < count and position < len(self.items)):
+                self._pending = _prefetcher.submit(self.fetch_page, self.next_page, self.per_page)
+            return self.items[position:count]
+
+    def iter(self, count: int) -> Iterator[Dict[str, Any]]:
+        position = 0
+        while position < count:
+            chunk = self.chunk(position, count)
+            if not chunk:
+                return
+            for item in chunk:
+                yield item
+            position += len(chunk)
+
+    def __iter__(self):
+        return self.iter(self.max_items or float('inf'))
+
+
+class PaginatorRegistry:
+    # Keeps recent paginators alive so a repeated search for the same query
+    # continues from the pages it already has
+    def __init__(self, max_items: int = 32, ttl: float = 15 * 60):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._paginators = OrderedDict()  # key -> (created, Paginator)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fetch_page: PageFetcher, per_page: int,
+            max_items: Optional[int] = None) -> Paginator:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._paginators.get(key)
+            if entry is None or now - entry[0] > self.ttl:
+                entry = (now, Paginator(fetch_page, per_page, max_items))
+                self._paginators[key] = entry
+            self._paginators.move_to_end(key)
+            while len(self._paginators) > self.max_items:
+                self._paginators.popitem(last=False)
+            return entry[1]
+
+
+paginators = PaginatorRegistry()
@@ -1,54 +1,84 @@
-import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from .api_client import VideoService
+from . import transport
+from .paginator import paginators
+from .rate_limiter import RateLimited
 from ..utils.logger import logger
+from ..utils.metrics import parse_seconds
+from ..utils.result_cache import result_cache, normalize_query
+
+# Largest page the API hands out
+PAGE_SIZE = 80
+
+ENDPOINTS = {
+    'videos': 'https://api.pexels.com/videos/search',
+    'photos': 'https://api.pexels.com/v1/search',
+}
 
 class PexelsService(VideoService):
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.pexels.com/videos"
 
+    def page_request(self, kind: str, query: str, page: int, per_page: int) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        # (url, params, headers) of one result page, shared with the async client
+        params = {'query': query, 'per_page': per_page, 'page': page}
+        return ENDPOINTS[kind], params, {'Authorization': self.api_key}
+
+    def parse_page(self, kind: str, data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        return data.get(kind, []), data.get('total_results')
+
+    def _fetch_page(self, kind: str, query: str, page: int, per_page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        url, params, headers = self.page_request(kind, query, page, per_page)
+        logger.debug(f"Pexels search: {url} page {page}")
+
+        response = transport.get(url, params=params, headers=headers, provider='Pexels')
+        if response.status_code == 429:
+            raise RateLimited("Pexels API rate limit exceeded")
+        response.raise_for_status()
+        with parse_seconds.time(provider='Pexels'):
+            return self.parse_page(kind, response.json())
+
     def search_videos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_videos(query, count))
+
+    @result_cache.cached('Pexels', 'videos')
+    def iter_videos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         if not self.api_key:
             logger.debug("Pexels: Missing API key")
-            return []
+            return
 
-        headers = {'Authorization': self.api_key}
-        url = f'{self.base_url}/search?query={query}&per_page={count}'
-        logger.debug(f"Pexels search: {url}")
-        
-        response = requests.get(url, headers=headers)
-        if response.status_code == 429:
-            raise Exception("Pexels API rate limit exceeded")
-        response.raise_for_status()
-        
-        data = response.json()
-        return data.get('videos', [])
+        def fetch_page(page: int, per_page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+            return self._fetch_page('videos', query, page, per_page)
+
+        paginator = paginators.get(('Pexels', 'videos', self.api_key, normalize_query(query)), fetch_page, PAGE_SIZE)
+        yield from paginator.iter(count)
 
     def search_photos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_photos(query, count))
+
+    @result_cache.cached('Pexels', 'photos')
+    def iter_photos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         if not self.api_key:
-            return []
+            return
 
-        headers = {'Authorization': self.api_key}
-        url = f'https://api.pexels.com/v1/search?query={query}&per_page={count}'
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        data = response.json()
-        photos = data.get('photos', [])
+        def fetch_page(page: int, per_page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+            return self._fetch_page('photos', query, page, per_page)
+
+        paginator = paginators.get(('Pexels', 'photos', self.api_key, normalize_query(query)), fetch_page, PAGE_SIZE)
+        for p in paginator.iter(count):
+            yield self.format_photo(p)
+
+    def format_photo(self, p: Dict[str, Any]) -> Dict[str, Any]:
         # Format to match our internal structure
-        results = []
-        for p in photos:
-            results.append({
-                'id': p['id'],
-                'url': p['src']['original'],
-                'preview': p['src']['large'],
-                'width': p['width'],
-                'height': p['height'],
-                'source': 'Pexels'
-            })
-        return results
+        return {
+            'id': p['id'],
+            'url': p['src']['original'],
+            'preview': p['src']['large'],
+            'width': p['width'],
+            'height': p['height'],
+            'source': 'Pexels'
+        }
 
     def get_video_url(self, video_data: Dict[str, Any]) -> str:
         video_files = video_data.get('video_files', [])
@@ -58,3 +88,7 @@ class PexelsService(VideoService):
         # Sort by quality (height)
         video_files.sort(key=lambda x: x.get('height', 0), reverse=True)
         return video_files[0]['link']
+
+    def get_preview_url(self, video_data: Dict[str, Any]) -> Optional[str]:
+        # Pexels calls the poster frame 'image'
+        return video_data.get('image')
@@ -1,75 +1,100 @@
-import requests
-import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from .api_client import VideoService
+from . import transport
+from .paginator import paginators
 from ..utils.logger import logger
+from ..utils.metrics import parse_seconds
+from ..utils.result_cache import result_cache, normalize_query
+
+# The API allows up to 200 hits per page
+PAGE_SIZE = 100
+
+ENDPOINTS = {
+    'videos': 'https://pixabay.com/api/videos/',
+    # Base url for photos is https://pixabay.com/api/
+    'photos': 'https://pixabay.com/api/',
+}
 
 class PixabayService(VideoService):
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://pixabay.com/api/videos/"
 
+    def page_request(self, kind: str, query: str, page: int, per_page: int) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        # (url, params, headers) of one result page, shared with the async client
+        if kind == 'videos':
+            params = {
+                'key': self.api_key,
+                'q': query,
+                'per_page': per_page,
+                'lang': 'en',
+                'order': 'latest',
+                'min_width': 1280,
+                'min_height': 720,
+                'safesearch': 'true',
+                'page': page
+            }
+        else:
+            params = {
+                'key': self.api_key,
+                'q': query,
+                'per_page': per_page,
+                'image_type': 'photo',
+                'safesearch': 'true',
+                'page': page
+            }
+        return ENDPOINTS[kind], params, {}
+
+    def parse_page(self, kind: str, data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        # totalHits is how many the API will actually page through
+        return data.get('hits', []), data.get('totalHits')
+
+    def _fetch_page(self, kind: str, query: str, page: int, per_page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        url, params, _ = self.page_request(kind, query, page, per_page)
+        response = transport.get(url, params=params, provider='Pixabay')
+        response.raise_for_status()
+        with parse_seconds.time(provider='Pixabay'):
+            return self.parse_page(kind, response.json())
+
     def search_videos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_videos(query, count))
+
+    @result_cache.cached('Pixabay', 'videos')
+    def iter_videos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         if not self.api_key:
             logger.debug("Pixabay: Missing API key")
-            return []
-
-        params = {
-            'key': self.api_key,
-            'q': query,
-            'per_page': count * 2,  # Request more for better selection
-            'lang': 'en',
-            'order': 'latest',
-            'min_width': 1280,
-            'min_height': 720,
-            'safesearch': 'true',
-            'page': 1
-        }
-        
-        response = requests.get(self.base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        if not data.get('hits'):
-            # Try second page
-            params['page'] = 2
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-        hits = data.get('hits', [])
-        random.shuffle(hits)
-        return hits[:count]
+            return
+
+        def fetch_page(page: int, per_page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+            return self._fetch_page('videos', query, page, per_page)
+
+        paginator = paginators.get(('Pixabay', 'videos', self.api_key, normalize_query(query)), fetch_page, PAGE_SIZE)
+        yield from paginator.iter(count)
 
     def search_photos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_photos(query, count))
+
+    @result_cache.cached('Pixabay', 'photos')
+    def iter_photos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         if not self.api_key:
-            return []
-
-        params = {
-            'key': self.api_key,
-            'q': query,
-            'per_page': count,
-            'image_type': 'photo',
-            'safesearch': 'true'
+            return
+
+        def fetch_page(page: int, per_page: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+            return self._fetch_page('photos', query, page, per_page)
+
+        paginator = paginators.get(('Pixabay', 'photos', self.api_key, normalize_query(query)), fetch_page, PAGE_SIZE)
+        for h in paginator.iter(count):
+            yield self.format_photo(h)
+
+    def format_photo(self, h: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': h['id'],
+            'url': h['largeImageURL'],
+            'preview': h['webformatURL'],
+            'width': h['imageWidth'],
+            'height': h['imageHeight'],
+            'source': 'Pixabay'
         }
-        
-        # Base url for photos is https://pixabay.com/api/
-        response = requests.get("https://pixabay.com/api/", params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        hits = data.get('hits', [])
-        results = []
-        for h in hits:
-            results.append({
-                'id': h['id'],
-                'url': h['largeImageURL'],
-                'preview': h['webformatURL'],
-                'width': h['imageWidth'],
-                'height': h['imageHeight'],
-                'source': 'Pixabay'
-            })
-        return results
 
     def get_video_url(self, video_data: Dict[str, Any]) -> str:
         # Pixabay structure is different
@@ -78,3 +103,13 @@ class PixabayService(VideoService):
             if videos.get(quality, {}).get('url'):
                 return videos[quality]['url']
         return None
+
+    def get_preview_url(self, video_data: Dict[str, Any]) -> Optional[str]:
+        videos = video_data.get('videos', {})
+        for quality in ['medium', 'small', 'large', 'tiny']:
+            if videos.get(quality, {}).get('thumbnail'):
+                return videos[quality]['thumbnail']
+        # Older responses only carry the Vimeo picture id
+        if video_data.get('picture_id'):
+            return f"https://i.vimeocdn.com/video/{video_data['picture_id']}_640x360.jpg"
+        return None
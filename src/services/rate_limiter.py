@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+import requests
+from ..utils.logger import logger
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+
+# Requests allowed per period, from the providers' published limits. The
+# scraped sites publish none, so they get a polite default.
+PROVIDER_QUOTAS: Dict[str, Tuple[int, float]] = {
+    'Pexels': (200, HOUR),
+    'Pixabay': (100, MINUTE),
+}
+DEFAULT_QUOTA = (30, MINUTE)
+# Scraped sites get at most this many requests back to back
+DEFAULT_BURST = 5
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class RateLimited(Exception):
+    pass
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _reset_in(value: str) -> Optional[float]:
+    # Pexels sends a UNIX timestamp, Pixabay the seconds left in the window
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    if reset > 1e9:
+        reset -= time.time()
+    return max(reset, 0.0)
+
+
+class TokenBucket:
+    # Callers reserve a token up front and sleep until it is theirs, so waiting
+    # requests are served in arrival order at the refill rate
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        # Set when the server asked us to back off
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        # Returns how long the caller has to wait before sending
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(self.paused_until - now, -(self.tokens - 1) / self.rate, 0.0)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimited(f"would have to wait {wait:.0f}s")
+            self.tokens -= 1
+            return wait
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def sync(self, remaining: int):
+        # The server's count wins when it is lower than ours
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class RateLimiter:
+    def __init__(self, max_retries: int = 4, max_wait: float = 120.0,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0):
+        self.max_retries = max_retries
+        # Callers wait in line up to this long, after that they get RateLimited
+        self.max_wait = max_wait
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, provider: str) -> TokenBucket:
+        with self._lock:
+            if provider not in self._buckets:
+                limit, period = PROVIDER_QUOTAS.get(provider, DEFAULT_QUOTA)
+                bucket = TokenBucket(limit, period)
+                if provider not in PROVIDER_QUOTAS:
+                    bucket.capacity = bucket.tokens = DEFAULT_BURST
+                self._buckets[provider] = bucket
+            return self._buckets[provider]
+
+    def reserve(self, provider: str) -> float:
+        # Takes the provider's next token; returns how long to wait for it.
+        # The async transport sleeps on the event loop instead of the thread.
+        wait = self.bucket(provider).reserve(self.max_wait)
+        if wait > 0:
+            logger.debug(f"{provider}: waiting {wait:.1f}s for rate limit")
+        return wait
+
+    def acquire(self, provider: str):
+        wait = self.reserve(provider)
+        if wait > 0:
+            time.sleep(wait)
+
+    def backoff(self, attempt: int) -> float:
+        # Exponential with jitter, so queued callers don't all retry at once
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def observe(self, provider: str, response: requests.Response):
+        headers = response.headers
+        bucket = self.bucket(provider)
+        remaining = headers.get('X-Ratelimit-Remaining')
+        if remaining is not None:
+            try:
+                remaining = int(remaining)
+            except ValueError:
+                return
+            bucket.sync(remaining)
+            reset = _reset_in(headers.get('X-Ratelimit-Reset'))
+            if remaining <= 0 and reset:
+                logger.warning(f"{provider} quota used up, pausing for {reset:.0f}s")
+                bucket.pause(reset)
+
+    def send(self, provider: str, request: Callable[[], requests.Response]) -> requests.Response:
+        # Runs request() once a token is free, retrying throttled and
+        # temporarily unavailable responses. The last response is returned
+        # as is when the retries run out.
+        for attempt in range(self.max_retries + 1):
+            self.acquire(provider)
+            response = request()
+            self.observe(provider, response)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+
+            self.retry_delay(provider, response, attempt)
+            response.close()
+        return response
+
+    def retry_delay(self, provider: str, response: requests.Response, attempt: int) -> float:
+        # Holds the provider back after a throttled response; the retry then
+        # waits for its token like any other request
+        delay = max(_retry_after(response) or 0.0, self.backoff(attempt))
+        logger.warning(f"{provider} answered {response.status_code}, retrying in {delay:.1f}s")
+        self.bucket(provider).pause(delay)
+        return delay
+
+
+rate_limiter = RateLimiter()
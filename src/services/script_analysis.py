@@ -0,0 +1,142 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, Optional
+from .gemini import GeminiService
+from ..utils.logger import logger
+from ..utils.result_cache import normalize_query
+
+# Long scripts are split into scenes and every scene is asked for its own
+# search terms, a few at a time, instead of one prompt for the whole script
+
+# Characters per chunk; short paragraphs are joined up to this, longer
+# ones are cut at sentence ends
+MAX_CHUNK = 1500
+# Scenes analyzed at the same time
+MAX_PARALLEL = 4
+
+# Part of the prompt, not of the scene text the prompt cache compares
+INSTRUCTION = "The scenario below is one scene of a video script; identify the key visual assets it needs."
+
+# Screenplay sluglines (INT./EXT.), "SCENE 12", "# Heading" or a --- rule
+SCENE_HEADING = re.compile(r'^\s*(?:(?:INT|EXT|INT\./EXT|I/E)[.\s]|SCENE\s+\d+|#{1,6}\s|-{3,}\s*$)',
+                           re.IGNORECASE)
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _blocks(script: str) -> List[str]:
+    # Scene headings start a new block when the script has them,
+    # paragraphs otherwise
+    lines = script.splitlines()
+    if any(SCENE_HEADING.match(line) for line in lines):
+        blocks, current = [], []
+        for line in lines:
+            if SCENE_HEADING.match(line) and current:
+                blocks.append('\n'.join(current))
+                current = []
+            if not re.match(r'^\s*-{3,}\s*$', line):
+                current.append(line)
+        blocks.append('\n'.join(current))
+    else:
+        blocks = re.split(r'\n\s*\n', script)
+    return [block.strip() for block in blocks if block.strip()]
+
+
+def _cut(text: str, limit: int) -> List[str]:
+    # An over-long block split at sentence ends, or hard at the limit
+    pieces, current = [], ''
+    for sentence in SENTENCE_END.split(text):
+        while len(sentence) > limit:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(sentence[:limit])
+            sentence = sentence[limit:]
+        if current and len(current) + len(sentence) + 1 > limit:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_scenes(script: str, max_chars: int = MAX_CHUNK) -> List[Dict[str, Any]]:
+    # [{'index', 'title', 'text'}], numbered from 1 in script order
+    chunks, current = [], ''
+    for block in _blocks(script):
+        if SCENE_HEADING.match(block):
+            # A scene stays its own chunk so its queries map back to it
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.extend(_cut(block, max_chars) if len(block) > max_chars else [block])
+        elif len(block) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.extend(_cut(block, max_chars))
+        elif current and len(current) + len(block) + 2 > max_chars:
+            chunks.append(current)
+            current = block
+        else:
+            current = f"{current}\n\n{block}".strip()
+    if current:
+        chunks.append(current)
+
+    scenes = []
+    for n, text in enumerate(chunks, 1):
+        first_line = text.splitlines()[0].lstrip('# ').strip()
+        scenes.append({'index': n, 'title': first_line[:60], 'text': text})
+    return scenes
+
+
+def _query_key(query: str) -> str:
+    return normalize_query(re.sub(r'[^\w\s]', ' ', query))
+
+
+def merge_queries(scenes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Queries asked for by several scenes are listed once, with every scene
+    # that asked for them, in order of first appearance
+    merged: Dict[str, Dict[str, Any]] = {}
+    for scene in scenes:
+        for query in scene.get('queries', []):
+            key = _query_key(query)
+            if not key:
+                continue
+            entry = merged.setdefault(key, {'query': query.strip(), 'scenes': []})
+            if scene['index'] not in entry['scenes']:
+                entry['scenes'].append(scene['index'])
+    return list(merged.values())
+
+
+def analyze_script(script: str, api_key: str, max_parallel: int = MAX_PARALLEL,
+                   on_scene: Optional[Callable[[Dict[str, Any], int, int], None]] = None) -> Dict[str, Any]:
+    # Returns {'scenes': [... with 'queries' or 'error'], 'queries': merge_queries(...)}.
+    # on_scene(scene, done, total) is called from the worker threads as
+    # each scene comes back. Raises only when no scene could be analyzed.
+    scenes = split_scenes(script)
+    if not scenes:
+        return {'scenes': [], 'queries': []}
+
+    gemini = GeminiService(api_key)
+    logger.info(f"Analyzing script in {len(scenes)} scenes, {min(max_parallel, len(scenes))} at a time")
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(scenes)), thread_name_prefix='script') as executor:
+        futures = {executor.submit(gemini.generate_prompts, scene['text'], instruction=INSTRUCTION): scene
+                   for scene in scenes}
+        for done, future in enumerate(as_completed(futures), 1):
+            scene = futures[future]
+            try:
+                scene['queries'] = future.result()
+            except Exception as e:
+                logger.warning(f"Scene {scene['index']} analysis failed: {e}")
+                scene['queries'] = []
+                scene['error'] = str(e)
+                errors.append(e)
+            if on_scene:
+                on_scene(scene, done, len(scenes))
+
+    if len(errors) == len(scenes):
+        raise errors[0]
+    return {'scenes': scenes, 'queries': merge_queries(scenes)}
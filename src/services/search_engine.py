@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Optional
+from .pexels import PexelsService
+from .pixabay import PixabayService
+from .mixkit_scraper import MixkitScraper
+from .coverr_scraper import CoverrScraper
+from .videezy_scraper import VideezyScraper
+from .mazwai_scraper import MazwaiScraper
+from .burst_scraper import BurstScraper
+from .stocksnap_scraper import StocksnapScraper
+from .unsplash_scraper import UnsplashScraper
+from .dedup import deduplicator
+from ..utils.logger import logger
+from ..utils.metrics import (search_seconds, results_requested, results_returned,
+                             provider_errors, provider_timeouts)
+
+# A provider is any callable taking (query, count) and returning an iterable of
+# results. Generators let results through as soon as they are parsed.
+Provider = Callable[[str, int], Iterable[Dict[str, Any]]]
+
+PUBLIC_VIDEO_SOURCES = ['Mixkit', 'Coverr', 'Videezy', 'Mazwai']
+API_VIDEO_SOURCES = ['Pexels', 'Pixabay']
+PUBLIC_PHOTO_SOURCES = ['Burst', 'Stocksnap']
+# Unsplash is public but often blocked, so it only joins "All Sources"
+ALL_PHOTO_SOURCES = ['Burst', 'Stocksnap', 'Unsplash', 'Pexels', 'Pixabay']
+
+
+def select_sources(service_type: str, public: List[str], everything: List[str]) -> List[str]:
+    if service_type == 'Public Only':
+        return public
+    if service_type == 'All Sources':
+        return everything
+    return [service_type] if service_type in everything else []
+
+
+def _api_videos(name: str, service) -> Provider:
+    def search(query: str, count: int) -> Iterable[Dict[str, Any]]:
+        for v in service.iter_videos(query, count):
+            v['source'] = name
+            v['download_url'] = service.get_video_url(v)
+            v['preview'] = service.get_preview_url(v)
+            yield v
+    return search
+
+
+def build_video_providers(service_type: str, config) -> Dict[str, Provider]:
+    providers = {}
+    for name in select_sources(service_type, PUBLIC_VIDEO_SOURCES, PUBLIC_VIDEO_SOURCES + API_VIDEO_SOURCES):
+        if name == 'Mixkit':
+            providers[name] = MixkitScraper().iter_videos
+        elif name == 'Coverr':
+            providers[name] = CoverrScraper().iter_videos
+        elif name == 'Videezy':
+            providers[name] = VideezyScraper().iter_videos
+        elif name == 'Mazwai':
+            providers[name] = MazwaiScraper().iter_videos
+        elif name == 'Pexels':
+            if config.pexels_api_key:
+                providers[name] = _api_videos(name, PexelsService(config.pexels_api_key))
+            else:
+                logger.debug("Pexels skipped: No API Key")
+        elif name == 'Pixabay':
+            if config.pixabay_api_key:
+                providers[name] = _api_videos(name, PixabayService(config.pixabay_api_key))
+            else:
+                logger.debug("Pixabay skipped: No API Key")
+    return providers
+
+
+def build_photo_providers(service_type: str, config) -> Dict[str, Provider]:
+    providers = {}
+    for name in select_sources(service_type, PUBLIC_PHOTO_SOURCES, ALL_PHOTO_SOURCES):
+        if name == 'Burst':
+            providers[name] = BurstScraper().iter_photos
+        elif name == 'Stocksnap':
+            providers[name] = StocksnapScraper().iter_photos
+        elif name == 'Unsplash':
+            providers[name] = UnsplashScraper().iter_photos
+        elif name == 'Pexels':
+            if config.pexels_api_key:
+                providers[name] = PexelsService(config.pexels_api_key).iter_photos
+            else:
+                logger.debug("Pexels Photos: No API Key")
+        elif name == 'Pixabay':
+            if config.pixabay_api_key:
+                providers[name] = PixabayService(config.pixabay_api_key).iter_photos
+            else:
+                logger.debug("Pixabay Photos: No API Key")
+    return providers
+
+
+def record_provider(name: str, count: int, results: list, seconds: float, dropped: bool = False):
+    # One provider's part of a search; shared with the async engine
+    search_seconds.observe(seconds, provider=name)
+    results_requested.inc(count, provider=name)
+    results_returned.inc(len(results), provider=name)
+    if dropped:
+        provider_timeouts.inc(provider=name, stage='search')
+
+
+# Sent by a provider when it is done
+DONE = object()
+
+
+class SearchRun:
+    # The part of a search both engines share: results per provider, batches,
+    # the overall deadline and the merge. The engines only differ in how
+    # providers run and how the next (name, item) event is waited for.
+    def __init__(self, providers: Dict[str, Any], count: int, timeout: float, batch_size: int,
+                 batch_interval: float, clock: Callable[[], float],
+                 on_batch: Optional[Callable[[list], None]] = None,
+                 on_provider_finished: Optional[Callable[[str, list], None]] = None,
+                 on_first_result: Optional[Callable[[float], None]] = None, start: int = 0):
+        self.names = list(providers)
+        self.count = count
+        # Each provider's first start results were delivered by an earlier
+        # search ("load more") and are skipped
+        self.start = start
+        self.skipped = {name: 0 for name in self.names}
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.clock = clock
+        self.on_batch = on_batch
+        self.on_provider_finished = on_provider_finished
+        self.on_first_result = on_first_result
+
+        self.started = clock()
+        self.deadline = self.started + timeout
+        self.results_by_provider = {name: [] for name in self.names}
+        self.remaining = set(self.names)
+        self.batch = []
+        self.flushed_at = None
+
+    def next_wait(self) -> Optional[float]:
+        # Seconds to wait for the next event, None once the search is over
+        if not self.remaining:
+            return None
+        now = self.clock()
+        if now >= self.deadline:
+            logger.warning(f"Search timed out after {self.timeout}s, dropped: {', '.join(sorted(self.remaining))}")
+            for name in self.remaining:
+                record_provider(name, self.count - self.start, self.results_by_provider[name],
+                                now - self.started, dropped=True)
+            self.remaining.clear()
+            return None
+        return min(self.deadline - now, self.batch_interval)
+
+    def handle(self, name: Optional[str], item: Any):
+        # name is None when the wait ran out without an event
+        if item is DONE:
+            self.remaining.discard(name)
+            results = self.results_by_provider[name]
+            logger.debug(f"{name} finished with {len(results)} results")
+            record_provider(name, self.count - self.start, results, self.clock() - self.started)
+            if self.on_provider_finished:
+                self.on_provider_finished(name, results)
+        elif name is not None and self.skipped[name] < self.start:
+            self.skipped[name] += 1
+        elif name is not None:
+            if self.flushed_at is None and not self.batch:
+                latency = self.clock() - self.started
+                logger.info(f"First result after {latency * 1000:.0f} ms ({name})")
+                if self.on_first_result:
+                    self.on_first_result(latency)
+            self.results_by_provider[name].append(item)
+            self.batch.append(item)
+
+        # The very first result goes out on its own so it shows up at once
+        if self.batch and self.on_batch and (self.flushed_at is None or len(self.batch) >= self.batch_size
+                                             or self.clock() - self.flushed_at >= self.batch_interval):
+            self.on_batch(self.batch)
+            self.batch = []
+            self.flushed_at = self.clock()
+
+    def results(self) -> List[Dict[str, Any]]:
+        if self.batch and self.on_batch:
+            self.on_batch(self.batch)
+            self.batch = []
+        # Merged in the order the sources were selected, not the order they finished
+        merged = []
+        for name in self.names:
+            merged.extend(self.results_by_provider[name])
+        return merged
+
+
+class SearchEngine:
+    def __init__(self, max_workers: int = 8, timeout: float = 25.0,
+                 batch_size: int = 12, batch_interval: float = 0.1):
+        self.max_workers = max_workers
+        # Overall limit for one search, not per provider
+        self.timeout = timeout
+        # Streamed results are handed over in batches of up to batch_size, or
+        # whatever arrived within batch_interval seconds
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+
+    def search(self, providers: Dict[str, Provider], query: str, count: int,
+               on_batch: Optional[Callable[[list], None]] = None,
+               on_provider_finished: Optional[Callable[[str, list], None]] = None,
+               on_first_result: Optional[Callable[[float], None]] = None,
+               dedupe: bool = False,
+               on_duplicates: Optional[Callable[[list], None]] = None,
+               start: int = 0) -> List[Dict[str, Any]]:
+        # With start, only results start..count of each provider are
+        # returned; paged providers and the result cache replay the rest
+        if not providers:
+            return []
+
+        events = queue.Queue()
+        abandoned = threading.Event()
+
+        def run(name, provider):
+            try:
+                for item in provider(query, count):
+                    if abandoned.is_set():
+                        return
+                    events.put((name, item))
+            except Exception as e:
+                logger.error(f"{name} search failed: {e}")
+                provider_errors.inc(provider=name, reason='search')
+            finally:
+                events.put((name, DONE))
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(providers)),
+                                      thread_name_prefix='search')
+        for name, provider in providers.items():
+            executor.submit(run, name, provider)
+
+        search = SearchRun(providers, count, self.timeout, self.batch_size, self.batch_interval,
+                           time.monotonic, on_batch, on_provider_finished, on_first_result, start)
+        try:
+            while True:
+                wait = search.next_wait()
+                if wait is None:
+                    break
+                try:
+                    name, item = events.get(timeout=wait)
+                except queue.Empty:
+                    name, item = None, None
+                search.handle(name, item)
+        finally:
+            # Stragglers stop at their next result, nobody waits for them
+            abandoned.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results = search.results()
+        if dedupe:
+            # Everything was already streamed out; duplicates are reported
+            # afterwards so callers can take them back out, those found by
+            # hashing previews not seen before only once that is done
+            results, dropped = deduplicator.dedupe(results)
+            if dropped and on_duplicates:
+                on_duplicates(dropped)
+            deduplicator.dedupe_later(results, on_duplicates)
+        return results
+
+
+search_engine = SearchEngine()
@@ -1,72 +1,85 @@
-import requests
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from typing import List, Dict, Any, Iterator
 from urllib.parse import urljoin
+from . import transport, html_parser
+from .api_client import PageScraper
+from .transport import BROWSER_HEADERS
 from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, INCOMPLETE
 
-class StocksnapScraper:
+class StocksnapScraper(PageScraper):
     def __init__(self):
         self.base_url = "https://stocksnap.io"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
+        self.headers = BROWSER_HEADERS
 
     def search_photos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_photos(query, count))
+
+    def search_urls(self, query: str) -> List[str]:
         search_term = query.lower().replace(' ', '+')
-        url = f"{self.base_url}/search/{search_term}"
-        logger.debug(f"Stocksnap search started: {url}")
-        
+        return [f"{self.base_url}/search/{search_term}"]
+
+    @result_cache.cached('Stocksnap', 'photos', whole_page=True)
+    def iter_photos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Stocksnap response: {response.status_code}")
-            
+            for url in self.search_urls(query):
+                logger.debug(f"Stocksnap search started: {url}")
+                response = transport.get(url, headers=self.headers, timeout=10, provider='Stocksnap')
+                logger.debug(f"Stocksnap response: {response.status_code}")
+                if response.status_code == 200:
+                    break
+
             if response.status_code != 200:
                 logger.error(f"Stocksnap request failed: {response.status_code}")
-                return []
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            photos = []
-            
-            items = soup.find_all('div', class_='photo-grid-item')
-            logger.debug(f"Stocksnap potential items: {len(items)}")
+                return
 
-            for item in items[:count]:
-                try:
-                    img = item.find('img')
-                    if not img: continue
-                    
-                    link = item.find('a', class_='photo-link')
-                    if not link: continue
-                    
-                    # Stocksnap images are usually in <img> src
-                    preview = img.get('src', '')
-                    if not preview.startswith('http'):
-                        preview = urljoin(self.base_url, preview)
-                        
-                    href = link.get('href', '')
-                    photo_id = href.split('/')[-1] if href else "stocksnap-photo"
-                    
-                    # High res download URL pattern for Stocksnap
-                    # Usually found on the individual page, but we can try to guess or use preview
-                    # For now, use the preview as URL if we can't find direct
-                    # Actually, Stocksnap has: https://stocksnap.io/photo/[id]/download
-                    download_url = f"{self.base_url}/photo/{photo_id}/download"
-                    
-                    photos.append({
-                        'id': photo_id,
-                        'title': img.get('alt', f"Stocksnap {photo_id}"),
-                        'source': 'Stocksnap',
-                        'url': download_url,
-                        'preview': preview,
-                        'width': 0,
-                        'height': 0
-                    })
-                except Exception as e:
-                    logger.warning(f"Error parsing Stocksnap item: {e}")
-                    continue
-
-            logger.info(f"Stocksnap search finished: {len(photos)} results")
-            return photos
+            yield from timed(parse_seconds, self.parse_photos(response.text, count), provider='Stocksnap')
         except Exception as e:
             logger.error(f"Stocksnap scraper exception: {e}")
-            return []
+            provider_errors.inc(provider='Stocksnap', reason='scraper')
+            return INCOMPLETE
+
+    def parse_photos(self, html: str, count: int) -> Iterator[Dict[str, Any]]:
+        page = html_parser.parse(html)
+        found = 0
+
+        items = page.select('div.photo-grid-item')
+        logger.debug(f"Stocksnap potential items: {len(items)}")
+
+        for item in items[:count]:
+            try:
+                img = item.select_one('img')
+                if not img: continue
+
+                link = item.select_one('a.photo-link')
+                if not link: continue
+
+                # Stocksnap images are usually in <img> src
+                preview = img.get('src', '')
+                if not preview.startswith('http'):
+                    preview = urljoin(self.base_url, preview)
+
+                href = link.get('href', '')
+                photo_id = href.split('/')[-1] if href else "stocksnap-photo"
+
+                # High res download URL pattern for Stocksnap
+                # Usually found on the individual page, but we can try to guess or use preview
+                # For now, use the preview as URL if we can't find direct
+                # Actually, Stocksnap has: https://stocksnap.io/photo/[id]/download
+                download_url = f"{self.base_url}/photo/{photo_id}/download"
+
+                found += 1
+                yield {
+                    'id': photo_id,
+                    'title': img.get('alt', f"Stocksnap {photo_id}"),
+                    'source': 'Stocksnap',
+                    'url': download_url,
+                    'preview': preview,
+                    'width': 0,
+                    'height': 0
+                }
+            except Exception as e:
+                logger.warning(f"Error parsing Stocksnap item: {e}")
+                continue
+
+        logger.info(f"Stocksnap search finished: {found} results")
@@ -0,0 +1,132 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.util.request import ACCEPT_ENCODING
+from typing import Dict, Any, Optional
+from .rate_limiter import rate_limiter
+from ..utils.metrics import (provider_requests, provider_request_seconds, provider_bytes,
+                             provider_errors, provider_timeouts, connections_opened, connections_reused)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+
+# Headers the scrapers send with every page request
+BROWSER_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+DEFAULT_TIMEOUT = 10
+
+# Number of hosts that keep a pool, and idle keep-alive connections kept per host
+POOL_HOSTS = 32
+POOL_SIZE_PER_HOST = 16
+
+
+class _PooledAdapter(HTTPAdapter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # host -> (id of its pool, connections that pool had opened so far)
+        self._seen = {}
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+    # Remember the pool send() picked so its connection counter can be read
+    # afterwards (newer requests versions use the first, older the second)
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        self._local.pool = super().get_connection_with_tls_context(*args, **kwargs)
+        return self._local.pool
+
+    def get_connection(self, *args, **kwargs):
+        self._local.pool = super().get_connection(*args, **kwargs)
+        return self._local.pool
+
+    def send(self, request, **kwargs):
+        self._local.pool = None
+        response = super().send(request, **kwargs)
+        if self._local.pool is not None:
+            self._record(urlparse(request.url).netloc, self._local.pool)
+        return response
+
+    def _record(self, host, pool):
+        with self._stats_lock:
+            pool_id, seen = self._seen.get(host, (None, 0))
+            # A host's pool can be evicted and recreated, which resets its counter
+            if pool_id != id(pool):
+                seen = 0
+            opened = max(pool.num_connections - seen, 0)
+            self._seen[host] = (id(pool), pool.num_connections)
+        if opened:
+            connections_opened.inc(opened, host=host)
+        else:
+            connections_reused.inc(host=host)
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    adapter = _PooledAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE_PER_HOST)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+_session = _create_session()
+
+
+def session() -> requests.Session:
+    return _session
+
+
+def is_timeout(error: BaseException) -> bool:
+    # requests, httpx and asyncio (aiohttp) each have their own timeout type
+    return isinstance(error, (requests.Timeout, TimeoutError)) or 'Timeout' in type(error).__name__
+
+
+def record_request(provider: str, seconds: float, status: Optional[int] = None, size: int = 0,
+                   error: Optional[BaseException] = None):
+    # Shared with the async transport
+    provider_request_seconds.observe(seconds, provider=provider)
+    if error is not None:
+        if is_timeout(error):
+            provider_requests.inc(provider=provider, status='timeout')
+            provider_timeouts.inc(provider=provider, stage='request')
+        else:
+            provider_requests.inc(provider=provider, status='error')
+            provider_errors.inc(provider=provider, reason=type(error).__name__)
+        return
+    provider_requests.inc(provider=provider, status=status)
+    provider_bytes.inc(size, provider=provider)
+    if status >= 400:
+        provider_errors.inc(provider=provider, reason=f"http {status}")
+
+
+def _measured(provider: str, url: str, kwargs: Dict[str, Any]) -> requests.Response:
+    started = time.perf_counter()
+    try:
+        response = _session.get(url, **kwargs)
+    except Exception as e:
+        record_request(provider, time.perf_counter() - started, error=e)
+        raise
+    # A streamed body hasn't been read yet, so its announced length counts
+    size = (int(response.headers.get('content-length') or 0) if kwargs.get('stream')
+            else len(response.content))
+    record_request(provider, time.perf_counter() - started, response.status_code, size)
+    return response
+
+
+def get(url: str, provider: Optional[str] = None, **kwargs: Any) -> requests.Response:
+    # Drop-in for requests.get that goes through the shared keep-alive pools.
+    # With a provider name the request also waits its turn under that
+    # provider's rate limit, is retried when throttled and is counted in
+    # that provider's metrics.
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    if provider is None:
+        return _session.get(url, **kwargs)
+    return rate_limiter.send(provider, lambda: _measured(provider, url, kwargs))
@@ -1,74 +1,88 @@
-import requests
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
-import json
+from typing import List, Dict, Any, Iterator
 import re
+from . import transport, html_parser
+from .api_client import PageScraper
+from .transport import BROWSER_HEADERS
 from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, INCOMPLETE
 
-class UnsplashScraper:
+PHOTO_ID = re.compile(r'photo-([a-zA-Z0-9-]+)')
+
+class UnsplashScraper(PageScraper):
     def __init__(self):
         self.base_url = "https://unsplash.com/s/photos"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
+        self.headers = BROWSER_HEADERS
 
     def search_photos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_photos(query, count))
+
+    def search_urls(self, query: str) -> List[str]:
         search_term = query.lower().replace(' ', '-')
-        url = f"{self.base_url}/{search_term}"
-        logger.debug(f"Unsplash search started: {url}")
-        
+        return [f"{self.base_url}/{search_term}"]
+
+    @result_cache.cached('Unsplash', 'photos', whole_page=True)
+    def iter_photos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Unsplash response: {response.status_code}")
-            
+            for url in self.search_urls(query):
+                logger.debug(f"Unsplash search started: {url}")
+                response = transport.get(url, headers=self.headers, timeout=10, provider='Unsplash')
+                logger.debug(f"Unsplash response: {response.status_code}")
+                if response.status_code == 200:
+                    break
+
             if response.status_code != 200:
                 logger.error(f"Unsplash request failed: {response.status_code}")
-                return []
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            photos = []
-            
-            # Unsplash often stores initial state in a script tag
-            # or we can just parse the img tags with specific classes
-            # The direct download URL pattern: https://unsplash.com/photos/[id]/download?force=true
-            
-            # Find image elements
-            img_tags = soup.find_all('img', attrs={'srcset': True})
-            logger.debug(f"Unsplash potential images: {len(img_tags)}")
-
-            for img in img_tags:
-                if len(photos) >= count: break
-                
-                try:
-                    src = img.get('src', '')
-                    if 'images.unsplash.com' not in src: continue
-                    
-                    # Extract ID from URL
-                    # Example: https://images.unsplash.com/photo-1501785888041-af3ef285b470?...
-                    photo_id_match = re.search(r'photo-([a-zA-Z0-9-]+)', src)
-                    if not photo_id_match: continue
-                    photo_id = photo_id_match.group(1)
-                    
-                    # High quality download URL
-                    download_url = f"https://unsplash.com/photos/{photo_id}/download?force=true"
-                    
-                    photos.append({
-                        'id': photo_id,
-                        'title': img.get('alt', f"Unsplash {photo_id}"),
-                        'source': 'Unsplash',
-                        'url': download_url,
-                        'preview': src,
-                        'width': 0, # Scraped doesn't always have metadata
-                        'height': 0
-                    })
-                except Exception as e:
-                    logger.warning(f"Error parsing Unsplash item: {e}")
-                    continue
-
-            logger.info(f"Unsplash search finished: {len(photos)} results")
-            return photos
+                return
+
+            yield from timed(parse_seconds, self.parse_photos(response.text, count), provider='Unsplash')
         except Exception as e:
             logger.error(f"Unsplash scraper exception: {e}")
+            provider_errors.inc(provider='Unsplash', reason='scraper')
+            return INCOMPLETE
             import traceback
             logger.error(traceback.format_exc())
-            return []
+
+    def parse_photos(self, html: str, count: int) -> Iterator[Dict[str, Any]]:
+        page = html_parser.parse(html)
+        found = 0
+
+        # Unsplash often stores initial state in a script tag
+        # or we can just parse the img tags with specific classes
+        # The direct download URL pattern: https://unsplash.com/photos/[id]/download?force=true
+
+        # Find image elements
+        img_tags = page.select('img[srcset]')
+        logger.debug(f"Unsplash potential images: {len(img_tags)}")
+
+        for img in img_tags:
+            if found >= count: break
+
+            try:
+                src = img.get('src', '')
+                if 'images.unsplash.com' not in src: continue
+
+                # Extract ID from URL
+                # Example: https://images.unsplash.com/photo-1501785888041-af3ef285b470?...
+                photo_id_match = PHOTO_ID.search(src)
+                if not photo_id_match: continue
+                photo_id = photo_id_match.group(1)
+
+                # High quality download URL
+                download_url = f"https://unsplash.com/photos/{photo_id}/download?force=true"
+
+                found += 1
+                yield {
+                    'id': photo_id,
+                    'title': img.get('alt', f"Unsplash {photo_id}"),
+                    'source': 'Unsplash',
+                    'url': download_url,
+                    'preview': src,
+                    'width': 0, # Scraped doesn't always have metadata
+                    'height': 0
+                }
+            except Exception as e:
+                logger.warning(f"Error parsing Unsplash item: {e}")
+                continue
+
+        logger.info(f"Unsplash search finished: {found} results")
@@ -1,71 +1,85 @@
-import requests
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
-import re
+from typing import List, Dict, Any, Iterator
+from urllib.parse import urljoin
+from . import transport, html_parser
+from .api_client import PageScraper
+from .transport import BROWSER_HEADERS
 from ..utils.logger import logger
+from ..utils.metrics import timed, parse_seconds, provider_errors
+from ..utils.result_cache import result_cache, INCOMPLETE
 
-class VideezyScraper:
+class VideezyScraper(PageScraper):
     def __init__(self):
         self.base_url = "https://www.videezy.com"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
+        self.headers = BROWSER_HEADERS
 
     def search_videos(self, query: str, count: int) -> List[Dict[str, Any]]:
+        return list(self.iter_videos(query, count))
+
+    def search_urls(self, query: str) -> List[str]:
         search_term = query.lower().replace(' ', '-')
-        url = f"{self.base_url}/free-video/{search_term}"
-        logger.debug(f"Videezy search started: {url}")
-        
+        return [
+            f"{self.base_url}/free-video/{search_term}",
+            # Generic search
+            f"{self.base_url}/search/{query.replace(' ', '+')}",
+        ]
+
+    @result_cache.cached('Videezy', 'videos', whole_page=True)
+    def iter_videos(self, query: str, count: int) -> Iterator[Dict[str, Any]]:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            logger.debug(f"Videezy response: {response.status_code}")
-            
+            for url in self.search_urls(query):
+                logger.debug(f"Videezy search started: {url}")
+                response = transport.get(url, headers=self.headers, timeout=10, provider='Videezy')
+                logger.debug(f"Videezy response: {response.status_code}")
+                if response.status_code == 200:
+                    break
+
             if response.status_code != 200:
-                # Try generic search
-                url = f"{self.base_url}/search/{query.replace(' ', '+')}"
-                logger.debug(f"Retrying Videezy with search URL: {url}")
-                response = requests.get(url, headers=self.headers, timeout=10)
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            videos = []
-            
-            items = soup.find_all(['li', 'div'], class_=re.compile(r'video-tile|item'))
-            logger.debug(f"Videezy potential items: {len(items)}")
-
-            for item in items[:count]:
-                try:
-                    link = item.find('a')
-                    if not link: continue
-                    
-                    from urllib.parse import urljoin
-                    href = link['href']
-                    
-                    # Filter out non-video links or sponsored content to sister sites
-                    if not any(x in href for x in ['/free-video/', '/search/']) and href.startswith('http'):
-                        if 'videezy.com' not in href:
-                            continue # Skip non-Videezy sponsored links
-                    
-                    video_url = urljoin(self.base_url, href)
-                    
-                    img = item.find('img')
-                    thumb = img['src'] if img else ""
-                    
-                    title_div = item.find(class_=re.compile(r'title|name'))
-                    title = title_div.text if title_div else "Videezy Video"
-                    
-                    videos.append({
-                        'id': href.split('/')[-1],
-                        'title': title.strip(),
-                        'source': 'Videezy',
-                        'download_url': video_url,
-                        'preview': thumb
-                    })
-                except Exception as e:
-                    logger.warning(f"Error parsing Videezy item: {e}")
-                    continue
-
-            logger.info(f"Videezy search finished: {len(videos)} results")
-            return videos
+                logger.error(f"Videezy request failed: {response.status_code}")
+                return
+
+            yield from timed(parse_seconds, self.parse_videos(response.text, count), provider='Videezy')
         except Exception as e:
             logger.error(f"Videezy scraper exception: {e}")
-            return []
+            provider_errors.inc(provider='Videezy', reason='scraper')
+            return INCOMPLETE
+
+    def parse_videos(self, html: str, count: int) -> Iterator[Dict[str, Any]]:
+        page = html_parser.parse(html)
+        found = 0
+
+        items = page.select('li[class*="video-tile"], li[class*="item"], div[class*="video-tile"], div[class*="item"]')
+        logger.debug(f"Videezy potential items: {len(items)}")
+
+        for item in items[:count]:
+            try:
+                link = item.select_one('a')
+                if not link: continue
+
+                href = link['href']
+
+                # Filter out non-video links or sponsored content to sister sites
+                if not any(x in href for x in ['/free-video/', '/search/']) and href.startswith('http'):
+                    if 'videezy.com' not in href:
+                        continue # Skip non-Videezy sponsored links
+
+                video_url = urljoin(self.base_url, href)
+
+                img = item.select_one('img')
+                thumb = img['src'] if img else ""
+
+                title_div = item.select_one('[class*="title"], [class*="name"]')
+                title = title_div.text if title_div else "Videezy Video"
+
+                found += 1
+                yield {
+                    'id': href.split('/')[-1],
+                    'title': title.strip(),
+                    'source': 'Videezy',
+                    'download_url': video_url,
+                    'preview': thumb
+                }
+            except Exception as e:
+                logger.warning(f"Error parsing Videezy item: {e}")
+                continue
+
+        logger.info(f"Videezy search finished: {found} results")
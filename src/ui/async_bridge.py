@@ -0,0 +1,71 @@
+import asyncio
+from PyQt6.QtCore import QObject, pyqtSignal
+from ..services import async_transport
+from ..services.async_providers import (event_loop, async_search_engine,
+                                        build_async_video_providers, build_async_photo_providers)
+from ..utils.logger import logger
+from ..utils.persistence import persistence
+
+
+def async_search_available() -> bool:
+    # Searches go through the shared event loop when a real async HTTP client
+    # is installed; otherwise each search keeps its own QThread
+    return async_transport.backend() != 'threads'
+
+
+class AsyncSearchJob(QObject):
+    # Drop-in for SearchWorker / PhotoSearchWorker: same signals and start(),
+    # but the search runs as a task on the shared event loop thread. Signals
+    # emitted there are queued over to the GUI thread by Qt.
+    finished = pyqtSignal(list)
+    provider_finished = pyqtSignal(str, list)
+    batch_ready = pyqtSignal(list)
+    first_result = pyqtSignal(float)
+    duplicates_found = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def __init__(self, kind, service_type, query, count, config, start=0):
+        super().__init__()
+        self.kind = kind
+        self.service_type = service_type
+        self.query = query
+        self.count = count
+        self.config = config
+        self.start_at = start
+        self._future = None
+
+    def start(self):
+        self._future = event_loop().submit(self._run())
+
+    def isRunning(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def cancel(self):
+        if self._future is not None:
+            self._future.cancel()
+
+    async def _run(self):
+        logger.info(f"AsyncSearchJob started: {self.kind}, type={self.service_type}, query='{self.query}'")
+        try:
+            build = build_async_video_providers if self.kind == 'videos' else build_async_photo_providers
+            providers = build(self.service_type, self.config, event_loop().http)
+            results = await async_search_engine.search(providers, self.query, self.count,
+                                                       on_batch=self.batch_ready.emit,
+                                                       on_provider_finished=self.provider_finished.emit,
+                                                       on_first_result=self.first_result.emit,
+                                                       dedupe=True,
+                                                       on_duplicates=self.duplicates_found.emit,
+                                                       start=self.start_at)
+
+            # "Load more" continues a search that is already in the history
+            if not self.start_at:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, persistence.add_history, self.query, self.service_type, len(results))
+
+            logger.info(f"AsyncSearchJob finished: {len(results)} total results found")
+            self.finished.emit(results)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"AsyncSearchJob crash: {e}", exc_info=True)
+            self.error.emit(f"Critical search error: {str(e)}")
@@ -2,20 +2,20 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QStackedWidget, QPushButton, QLabel, QFrame, QGraphicsDropShadowEffect)
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QColor
+import time
 from .styles import MINIMALIST_THEME
-from .widgets.api_settings import ApiSettingsWidget
-from .widgets.search_view import SearchViewWidget
-from .widgets.downloads_view import DownloadsViewWidget
-from .widgets.history_view import HistoryViewWidget
-from .widgets.images_view import ImagesViewWidget
-from .widgets.notes_view import NotesViewWidget
-from .widgets.script_assets_view import ScriptAssetsViewWidget
 from ..config import Config
+from ..utils.logger import logger
+
+# Sidebar order of the pages in the content stack
+PAGE_COUNT = 8
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.config = Config()
+        # Pages are built, and their modules imported, the first time they are shown
+        self._pages = {}
         self.init_ui()
 
     def init_ui(self):
@@ -44,26 +44,88 @@ class MainWindow(QMainWindow):
         
         main_layout.addWidget(content_container)
 
-        # Initialize pages
-        self.search_view = SearchViewWidget(self.config)
-        self.images_view = ImagesViewWidget(self.config)
-        self.script_view = ScriptAssetsViewWidget(self.config)
-        self.downloads_view = DownloadsViewWidget(self.config)
-        self.history_view = HistoryViewWidget(self.config)
-        self.notes_view = NotesViewWidget(self.config)
-        self.api_settings = ApiSettingsWidget(self.config)
-
-        self.content_stack.addWidget(self.search_view)    # 0
-        self.content_stack.addWidget(self.images_view)    # 1
-        self.content_stack.addWidget(self.script_view)    # 2
-        self.content_stack.addWidget(self.downloads_view) # 3
-        self.content_stack.addWidget(self.history_view)   # 4
-        self.content_stack.addWidget(self.notes_view)     # 5
-        self.content_stack.addWidget(self.api_settings)   # 6
+        # Empty stand-ins until each page is first opened
+        for _ in range(PAGE_COUNT):
+            self.content_stack.addWidget(QWidget())
 
         # Default page
+        self.switch_page(0)
         self.nav_search.setChecked(True)
 
+    def _build_page(self, index):
+        # Imports stay inside the branches so a page's dependencies load with it
+        if index == 0:
+            from .widgets.search_view import SearchViewWidget
+            return SearchViewWidget(self.config)
+        elif index == 1:
+            from .widgets.images_view import ImagesViewWidget
+            return ImagesViewWidget(self.config)
+        elif index == 2:
+            from .widgets.script_assets_view import ScriptAssetsViewWidget
+            return ScriptAssetsViewWidget(self.config)
+        elif index == 3:
+            from .widgets.downloads_view import DownloadsViewWidget
+            return DownloadsViewWidget(self.config)
+        elif index == 4:
+            from .widgets.history_view import HistoryViewWidget
+            return HistoryViewWidget(self.config)
+        elif index == 5:
+            from .widgets.notes_view import NotesViewWidget
+            return NotesViewWidget(self.config)
+        elif index == 6:
+            from .widgets.api_settings import ApiSettingsWidget
+            return ApiSettingsWidget(self.config)
+        elif index == 7:
+            from .widgets.diagnostics_view import DiagnosticsViewWidget
+            return DiagnosticsViewWidget(self.config)
+        raise IndexError(index)
+
+    def page(self, index):
+        page = self._pages.get(index)
+        if page is None:
+            started = time.perf_counter()
+            page = self._build_page(index)
+            placeholder = self.content_stack.widget(index)
+            self.content_stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.content_stack.insertWidget(index, page)
+            self._pages[index] = page
+            logger.debug(f"{type(page).__name__} built in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return page
+
+    # Other pages reach each other through these (Script Assistant -> Videos Search)
+    @property
+    def search_view(self):
+        return self.page(0)
+
+    @property
+    def images_view(self):
+        return self.page(1)
+
+    @property
+    def script_view(self):
+        return self.page(2)
+
+    @property
+    def downloads_view(self):
+        return self.page(3)
+
+    @property
+    def history_view(self):
+        return self.page(4)
+
+    @property
+    def notes_view(self):
+        return self.page(5)
+
+    @property
+    def api_settings(self):
+        return self.page(6)
+
+    @property
+    def diagnostics_view(self):
+        return self.page(7)
+
     def create_sidebar(self):
         self.sidebar = QFrame()
         self.sidebar.setObjectName("Sidebar")
@@ -113,7 +175,9 @@ class MainWindow(QMainWindow):
 
         add_label("SYSTEM")
         self.nav_settings = self.create_nav_button("Settings", 6)
+        self.nav_diagnostics = self.create_nav_button("Diagnostics", 7)
         layout.addWidget(self.nav_settings)
+        layout.addWidget(self.nav_diagnostics)
         
         layout.addStretch()
         
@@ -132,10 +196,11 @@ class MainWindow(QMainWindow):
         return btn
 
     def switch_page(self, index):
+        page = self.page(index)
         self.content_stack.setCurrentIndex(index)
         
-        # Refresh dynamic views
+        # Refresh dynamic views, including on their first showing
         if index == 3: # Downloads
-            self.downloads_view.refresh_downloads()
+            page.refresh_downloads()
         elif index == 4: # History
-            self.history_view.refresh_history()
+            page.refresh_history()
@@ -0,0 +1,230 @@
+import itertools
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Optional
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, QUrl, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest
+from ..services.transport import USER_AGENT
+from ..utils.logger import logger
+from ..utils.thumbnail_cache import THUMB_DIR, THUMB_WIDTH, THUMB_HEIGHT, thumbnail_path
+
+
+class _DecodeSignals(QObject):
+    # job id, url, decoded image (null on failure), came from the network
+    decoded = pyqtSignal(int, str, QImage, bool)
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, job_id: int, url: str, data: Optional[bytes], path: Path, signals: _DecodeSignals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.url = url
+        self.data = data
+        self.path = path
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        image = QImage()
+        from_network = self.data is not None
+        if not self.cancelled:
+            try:
+                if from_network:
+                    image.loadFromData(self.data)
+                    if not image.isNull():
+                        image = image.scaled(THUMB_WIDTH, THUMB_HEIGHT, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                                             Qt.TransformationMode.SmoothTransformation)
+                        self.path.parent.mkdir(parents=True, exist_ok=True)
+                        image.save(str(self.path), 'JPG', 85)
+                else:
+                    image.load(str(self.path))
+            except Exception as e:
+                logger.warning(f"Thumbnail decode failed for {self.url}: {e}")
+                image = QImage()
+        self.data = None
+        self.signals.decoded.emit(self.job_id, self.url, image, from_network)
+
+
+class ThumbnailLoader(QObject):
+    thumbnail_ready = pyqtSignal(str, QPixmap)
+    thumbnail_failed = pyqtSignal(str)
+
+    def __init__(self, max_concurrent: int = 6, memory_items: int = 400,
+                 disk_dir: Optional[Path] = None, max_disk_bytes: int = 200 * 1024 * 1024,
+                 decode_threads: int = 4, max_pending_decodes: int = 8):
+        super().__init__()
+        self.max_concurrent = max_concurrent
+        self.memory_items = memory_items
+        self.disk_dir = disk_dir or THUMB_DIR
+        self.max_disk_bytes = max_disk_bytes
+        # Downloads pause while this many fetched images are waiting for a decoder
+        self.max_pending_decodes = max_pending_decodes
+
+        self.manager = QNetworkAccessManager(self)
+        self.manager.finished.connect(self._on_finished)
+
+        # Decoding and scaling happen here, off the GUI thread
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(decode_threads)
+        self._signals = _DecodeSignals()
+        self._signals.decoded.connect(self._on_decoded)
+        self._job_ids = itertools.count()
+
+        self._memory = OrderedDict()      # url -> scaled QPixmap, least recently used first
+        self._queue = deque()             # urls waiting for a network slot
+        self._active = {}                 # reply -> url
+        self._decode_queue = deque()      # (url, data or None) waiting for a decoder
+        self._decoding = {}               # job id -> _DecodeJob handed to the pool
+        self._interest = {}               # url -> number of cards waiting for it
+        self._saves_since_prune = None
+
+    def _disk_path(self, url: str) -> Path:
+        return thumbnail_path(url, self.disk_dir)
+
+    def _remember(self, url: str, pixmap: QPixmap):
+        self._memory[url] = pixmap
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def cached(self, url: str) -> Optional[QPixmap]:
+        # Memory lookup only, never queues any work
+        pixmap = self._memory.get(url)
+        if pixmap is not None:
+            self._memory.move_to_end(url)
+        return pixmap
+
+    def request(self, url: str) -> Optional[QPixmap]:
+        # Returns the pixmap right away when it is in memory; otherwise it is
+        # read from disk or fetched, and thumbnail_ready/thumbnail_failed fire later
+        if url in self._memory:
+            self._memory.move_to_end(url)
+            return self._memory[url]
+
+        self._interest[url] = self._interest.get(url, 0) + 1
+        if self._interest[url] == 1:
+            if self._disk_path(url).exists():
+                self._decode_queue.append((url, None))
+            else:
+                self._queue.append(url)
+            self._pump()
+        return None
+
+    def release(self, url: str):
+        # A card that asked for url went away before it arrived: drop whatever
+        # work is still outstanding for it
+        if url not in self._interest:
+            return
+        self._interest[url] -= 1
+        if self._interest[url] > 0:
+            return
+        del self._interest[url]
+
+        if url in self._queue:
+            self._queue.remove(url)
+        self._decode_queue = deque(item for item in self._decode_queue if item[0] != url)
+        for job in list(self._decoding.values()):
+            if job.url == url:
+                job.cancelled = True
+                if self.pool.tryTake(job):
+                    del self._decoding[job.job_id]
+        for reply, reply_url in list(self._active.items()):
+            if reply_url == url:
+                reply.abort()
+        self._pump()
+
+    def forget(self, url: str):
+        # Drops a decoded thumbnail nobody shows any more; the disk copy stays,
+        # so asking for it again only costs a decode
+        self._memory.pop(url, None)
+
+    def _pump(self):
+        while self._decode_queue and len(self._decoding) < self.pool.maxThreadCount():
+            url, data = self._decode_queue.popleft()
+            job = _DecodeJob(next(self._job_ids), url, data, self._disk_path(url), self._signals)
+            self._decoding[job.job_id] = job
+            self.pool.start(job)
+
+        while (self._queue and len(self._active) < self.max_concurrent
+               and len(self._decode_queue) < self.max_pending_decodes):
+            url = self._queue.popleft()
+            request = QNetworkRequest(QUrl(url))
+            request.setHeader(QNetworkRequest.KnownHeaders.UserAgentHeader, USER_AGENT)
+            reply = self.manager.get(request)
+            self._active[reply] = url
+
+    def _on_finished(self, reply):
+        url = self._active.pop(reply, None)
+        reply.deleteLater()
+        if url is None or url not in self._interest:
+            self._pump()
+            return
+
+        if reply.error() == reply.NetworkError.NoError:
+            self._decode_queue.append((url, bytes(reply.readAll())))
+        else:
+            self._fail(url)
+        self._pump()
+
+    def _on_decoded(self, job_id: int, url: str, image: QImage, from_network: bool):
+        job = self._decoding.pop(job_id, None)
+        if job is None or job.cancelled or url not in self._interest:
+            self._pump()
+            return
+
+        if image.isNull():
+            if from_network:
+                self._fail(url)
+            else:
+                # Unreadable cache file, fetch it again
+                self._disk_path(url).unlink(missing_ok=True)
+                self._queue.append(url)
+        else:
+            # Only the cheap QImage -> QPixmap conversion happens on the GUI thread
+            pixmap = QPixmap.fromImage(image)
+            self._remember(url, pixmap)
+            del self._interest[url]
+            if from_network:
+                self._count_save()
+            self.thumbnail_ready.emit(url, pixmap)
+        self._pump()
+
+    def _fail(self, url: str):
+        self._interest.pop(url, None)
+        self.thumbnail_failed.emit(url)
+
+    def _count_save(self):
+        # Trim the directory after the first write and every few hundred after
+        if self._saves_since_prune is None or self._saves_since_prune >= 200:
+            self.pool.start(self._prune_disk)
+            self._saves_since_prune = 0
+        self._saves_since_prune += 1
+
+    def _prune_disk(self):
+        # Oldest files go first once the cache grows past its budget
+        files = []
+        for f in self.disk_dir.glob('*.jpg'):
+            try:
+                st = f.stat()
+                files.append((st.st_mtime, st.st_size, f))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in files)
+        for _, size, f in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+
+
+_loader = None
+
+
+def thumbnail_loader() -> ThumbnailLoader:
+    # Created on first use, after the QApplication exists
+    global _loader
+    if _loader is None:
+        _loader = ThumbnailLoader()
+    return _loader
@@ -0,0 +1,176 @@
+import json
+import time
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox)
+from PyQt6.QtCore import Qt, QTimer
+from ...utils import metrics as m
+
+COLUMNS = ["Provider", "Requests", "Errors", "Timeouts", "p50 ms", "p95 ms",
+           "Parse p95 ms", "Search p95 ms", "Yield", "MB in"]
+CONNECTION_COLUMNS = ["Host", "Requests", "Connections opened", "Reused"]
+
+# Seconds between refreshes while the page is open
+REFRESH_INTERVAL = 2
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+class DiagnosticsViewWidget(QWidget):
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+        # (time, bytes) of the previous refresh, for the current download speed
+        self._last_bytes = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL * 1000)
+        self.timer.timeout.connect(self.refresh_metrics)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(24)
+
+        header_layout = QHBoxLayout()
+        header = QLabel("Diagnostics")
+        header.setObjectName("Header")
+        header_layout.addWidget(header)
+        header_layout.addStretch()
+
+        for text, slot in (("Export JSON", self.export_json), ("Export Prometheus", self.export_prometheus),
+                           ("Reset", self.reset_metrics)):
+            btn = QPushButton(text)
+            btn.setObjectName("SecondaryButton")
+            btn.clicked.connect(slot)
+            header_layout.addWidget(btn)
+        layout.addLayout(header_layout)
+
+        desc = QLabel("Per-provider latency and yield since start (or the last reset), slowest first. "
+                      "Percentiles cover each provider's most recent requests. Below, per host, how many "
+                      "requests went over an already open keep-alive connection.")
+        desc.setWordWrap(True)
+        desc.setStyleSheet("color: #71717a; font-size: 14px;")
+        layout.addWidget(desc)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setStyleSheet("background-color: #18181b; border: 1px solid #27272a; border-radius: 12px;")
+        layout.addWidget(self.table, 3)
+
+        self.connections_table = QTableWidget(0, len(CONNECTION_COLUMNS))
+        self.connections_table.setHorizontalHeaderLabels(CONNECTION_COLUMNS)
+        self.connections_table.verticalHeader().setVisible(False)
+        self.connections_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.connections_table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
+        self.connections_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.connections_table.setStyleSheet(
+            "background-color: #18181b; border: 1px solid #27272a; border-radius: 12px;")
+        layout.addWidget(self.connections_table, 2)
+
+        self.downloads_label = QLabel()
+        self.downloads_label.setStyleSheet("color: #a1a1aa; font-size: 13px;")
+        layout.addWidget(self.downloads_label)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_metrics()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def provider_rows(self):
+        providers = set()
+        for metric in (m.provider_requests, m.search_seconds, m.parse_seconds):
+            providers.update(labels['provider'] for labels in metric.label_sets())
+
+        rows = []
+        for name in providers:
+            requested = m.results_requested.value(provider=name)
+            returned = m.results_returned.value(provider=name)
+            rows.append({
+                'provider': name,
+                'requests': int(m.provider_requests.value(provider=name)),
+                'errors': int(m.provider_errors.value(provider=name)),
+                'timeouts': int(m.provider_timeouts.value(provider=name)),
+                'p50': m.provider_request_seconds.percentile(50, provider=name),
+                'p95': m.provider_request_seconds.percentile(95, provider=name),
+                'parse_p95': m.parse_seconds.percentile(95, provider=name),
+                'search_p95': m.search_seconds.percentile(95, provider=name),
+                'yield': returned / requested if requested else None,
+                'mb': m.provider_bytes.value(provider=name) / (1024 * 1024),
+            })
+        rows.sort(key=lambda r: -(r['search_p95'] or r['p95'] or 0))
+        return rows
+
+    def connection_rows(self):
+        hosts = {labels['host'] for metric in (m.connections_opened, m.connections_reused)
+                 for labels in metric.label_sets()}
+        rows = []
+        for host in hosts:
+            opened = int(m.connections_opened.value(host=host))
+            reused = int(m.connections_reused.value(host=host))
+            rows.append({'host': host, 'requests': opened + reused, 'opened': opened, 'reused': reused})
+        rows.sort(key=lambda r: -r['requests'])
+        return rows
+
+    def _fill(self, table, rows):
+        table.setRowCount(len(rows))
+        for i, cells in enumerate(rows):
+            for j, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if j:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(i, j, item)
+
+    def refresh_metrics(self):
+        self._fill(self.table, [
+            [row['provider'], str(row['requests']), str(row['errors']), str(row['timeouts']),
+             _ms(row['p50']), _ms(row['p95']), _ms(row['parse_p95']), _ms(row['search_p95']),
+             "-" if row['yield'] is None else f"{row['yield']:.0%}", f"{row['mb']:.1f}"]
+            for row in self.provider_rows()])
+        self._fill(self.connections_table, [
+            [row['host'], str(row['requests']), str(row['opened']),
+             f"{row['reused']} ({row['reused'] / row['requests']:.0%})"]
+            for row in self.connection_rows()])
+
+        now, total = time.monotonic(), m.download_bytes.value()
+        speed = 0.0
+        if self._last_bytes is not None and now > self._last_bytes[0]:
+            speed = max(0.0, total - self._last_bytes[1]) / (1024 * 1024) / (now - self._last_bytes[0])
+        self._last_bytes = (now, total)
+        median = m.download_speed.percentile(50)
+        self.downloads_label.setText(
+            f"Downloads: {speed:.1f} MB/s now  ·  {int(m.download_queue.value())} queued  ·  "
+            f"{int(m.downloads_active.value())} active  ·  {int(m.downloads.value(result='ok'))} done, "
+            f"{int(m.downloads.value(result='failed'))} failed, {int(m.downloads.value(result='reused'))} reused  ·  "
+            f"{total / (1024 * 1024):.0f} MB total  ·  median file "
+            + ("-" if median is None else f"{median:.1f} MB/s"))
+
+    def _export(self, title, suffix, content):
+        path, _ = QFileDialog.getSaveFileName(self, title, f"stock_parser_metrics{suffix}")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Export failed: {e}")
+
+    def export_json(self):
+        self._export("Export metrics as JSON", ".json", json.dumps(m.metrics.to_json(), indent=2))
+
+    def export_prometheus(self):
+        self._export("Export metrics for Prometheus", ".prom", m.metrics.to_prometheus())
+
+    def reset_metrics(self):
+        m.metrics.reset()
+        self._last_bytes = None
+        self.refresh_metrics()
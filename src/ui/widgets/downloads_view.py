@@ -42,8 +42,6 @@ class DownloadsViewWidget(QWidget):
         
         self.scroll.setWidget(self.container)
         layout.addWidget(self.scroll)
-        
-        self.refresh_downloads()
 
     def refresh_downloads(self):
         while self.container_layout.count():
@@ -40,8 +40,6 @@ class HistoryViewWidget(QWidget):
         
         self.scroll.setWidget(self.container)
         layout.addWidget(self.scroll)
-        
-        self.refresh_history()
 
     def refresh_history(self):
         # Clear existing
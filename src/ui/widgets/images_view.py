@@ -1,81 +1,65 @@
-import requests
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                             QPushButton, QComboBox, QSpinBox, QProgressBar, 
-                            QTextEdit, QFileDialog, QMessageBox, QFrame, QScrollArea)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+                            QMessageBox, QFrame)
+from PyQt6.QtCore import QThread, pyqtSignal
 from pathlib import Path
-from ...services.pexels import PexelsService
-from ...services.pixabay import PixabayService
-from ...services.unsplash_scraper import UnsplashScraper
-from ...services.burst_scraper import BurstScraper
-from ...services.stocksnap_scraper import StocksnapScraper
-from ...services.downloader import Downloader
+from ...services import batch
 from ...utils.logger import logger
-from ...utils.persistence import persistence
-from .tilt_card import TiltCard
+from ..async_bridge import AsyncSearchJob, async_search_available
+from .result_grid import ResultGrid
 
 class PhotoSearchWorker(QThread):
     finished = pyqtSignal(list)
+    provider_finished = pyqtSignal(str, list)
+    batch_ready = pyqtSignal(list)
+    duplicates_found = pyqtSignal(list)
     error = pyqtSignal(str)
 
-    def __init__(self, service_type, query, count, config):
+    def __init__(self, service_type, query, count, config, start=0):
         super().__init__()
         self.service_type = service_type
         self.query = query
         self.count = count
         self.config = config
+        self.start_at = start
 
     def run(self):
         logger.info(f"PhotoSearchWorker: query='{self.query}'")
         try:
-            results = []
-            
-            # Burst (Public)
-            if self.service_type in ['Burst', 'Public Only', 'All Sources']:
-                burst = BurstScraper()
-                results.extend(burst.search_photos(self.query, self.count))
-
-            # Stocksnap (Public)
-            if self.service_type in ['Stocksnap', 'Public Only', 'All Sources']:
-                stocksnap = StocksnapScraper()
-                results.extend(stocksnap.search_photos(self.query, self.count))
-
-            # Unsplash (Public - often blocked)
-            if self.service_type in ['Unsplash', 'All Sources']:
-                unsplash = UnsplashScraper()
-                results.extend(unsplash.search_photos(self.query, self.count))
-
-            # Pexels (Key required)
-            if self.service_type in ['Pexels', 'All Sources']:
-                if self.config.pexels_api_key:
-                    pexels = PexelsService(self.config.pexels_api_key)
-                    photos = pexels.search_photos(self.query, self.count)
-                    results.extend(photos)
-                else:
-                    logger.debug("Pexels Photos: No API Key")
-
-            # Pixabay (Key required)
-            if self.service_type in ['Pixabay', 'All Sources']:
-                if self.config.pixabay_api_key:
-                    pixabay = PixabayService(self.config.pixabay_api_key)
-                    photos = pixabay.search_photos(self.query, self.count)
-                    results.extend(photos)
-                else:
-                    logger.debug("Pixabay Photos: No API Key")
-            
-            # Record in history
-            persistence.add_history(self.query, self.service_type, len(results))
+            results = batch.search('photos', self.service_type, self.query, self.count, self.config,
+                                   start=self.start_at,
+                                   on_batch=self.batch_ready.emit,
+                                   on_provider_finished=self.provider_finished.emit,
+                                   on_duplicates=self.duplicates_found.emit)
             
             self.finished.emit(results)
         except Exception as e:
             logger.error(f"PhotoSearchWorker error: {e}", exc_info=True)
             self.error.emit(str(e))
 
+class PhotoDownloadWorker(QThread):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(int)
+
+    def __init__(self, photos, save_path):
+        super().__init__()
+        self.photos = photos
+        self.save_path = Path(save_path)
+
+    def run(self):
+        completed, _ = batch.download('photos', self.photos, self.save_path,
+                                      on_progress=lambda done, total, done_bytes: self.progress.emit(done))
+        self.finished.emit(len(completed))
+
 class ImagesViewWidget(QWidget):
     def __init__(self, config):
         super().__init__()
         self.config = config
         self.found_images = []
+        self.seen_images = set()
+        self.search_query = None
+        self.search_type = None
+        self.search_count = 0
         self.init_ui()
 
     def init_ui(self):
@@ -110,7 +94,7 @@ class ImagesViewWidget(QWidget):
         self.service_combo.setMinimumHeight(48)
         
         self.count_spin = QSpinBox()
-        self.count_spin.setRange(1, 100)
+        self.count_spin.setRange(1, 500)
         self.count_spin.setValue(10)
         self.count_spin.setSuffix(" photos")
         self.count_spin.setMinimumHeight(48)
@@ -124,22 +108,18 @@ class ImagesViewWidget(QWidget):
         controls_layout.addWidget(self.count_spin)
         controls_layout.addWidget(self.search_btn)
         
+        self.more_btn = QPushButton("Load More")
+        self.more_btn.setObjectName("SecondaryButton")
+        self.more_btn.setEnabled(False)
+        self.more_btn.setMinimumHeight(48)
+        self.more_btn.clicked.connect(self.load_more)
+        controls_layout.addWidget(self.more_btn)
+        
         layout.addWidget(controls_frame)
 
         # Results
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("background: transparent; border: none;")
-        
-        self.results_container = QWidget()
-        self.results_container.setStyleSheet("background: transparent;")
-        self.results_layout = QHBoxLayout(self.results_container)
-        self.results_layout.setContentsMargins(0, 0, 0, 0)
-        self.results_layout.setSpacing(20)
-        self.results_layout.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        
-        self.scroll_area.setWidget(self.results_container)
-        layout.addWidget(self.scroll_area)
+        self.results_grid = ResultGrid()
+        layout.addWidget(self.results_grid)
 
         # Download All
         self.download_btn = QPushButton("Download All Found")
@@ -157,63 +137,88 @@ class ImagesViewWidget(QWidget):
         query = self.query_input.text()
         if not query: return
         
+        self.results_grid.clear()
+        self.found_images = []
+        self.seen_images = set()
+        self.download_btn.setEnabled(False)
+
+        self.search_query = query
+        self.search_type = self.service_combo.currentText()
+        self.search_count = self.count_spin.value()
+        self.run_search()
+
+    def load_more(self):
+        # Only the next page is asked for. Paged sources continue from the pages
+        # they already fetched, and the search isn't added to the history again
+        if not self.search_query:
+            return
+        start = self.search_count
+        self.search_count += self.count_spin.value()
+        self.run_search(start)
+
+    def run_search(self, start=0):
         self.search_btn.setEnabled(False)
-        while self.results_layout.count():
-            item = self.results_layout.takeAt(0)
-            if item.widget(): item.widget().deleteLater()
+        self.more_btn.setEnabled(False)
             
-        self.worker = PhotoSearchWorker(
-            self.service_combo.currentText(),
-            query,
-            self.count_spin.value(),
-            self.config
-        )
+        if async_search_available():
+            self.worker = AsyncSearchJob('photos', self.search_type, self.search_query,
+                                         self.search_count, self.config, start)
+        else:
+            self.worker = PhotoSearchWorker(
+                self.search_type,
+                self.search_query,
+                self.search_count,
+                self.config,
+                start
+            )
+        self.worker.batch_ready.connect(self.on_results_batch)
+        self.worker.duplicates_found.connect(self.on_duplicates_found)
         self.worker.finished.connect(self.on_search_finished)
         self.worker.start()
 
+    def on_results_batch(self, photos):
+        photos = [p for p in photos if (p['source'], p['id']) not in self.seen_images]
+        if not photos:
+            return
+        self.seen_images.update((p['source'], p['id']) for p in photos)
+        self.found_images.extend(photos)
+        self.results_grid.append_entries([{
+            'key': (photo['source'], photo['id']),
+            'title': f"Photo {photo['id']}",
+            'subtitle': f"{photo['source']} | {photo['width']}x{photo['height']}",
+            'preview': photo.get('preview')
+        } for photo in photos])
+        self.download_btn.setEnabled(True)
+
+    def on_duplicates_found(self, photos):
+        # Late reports of an earlier search don't apply to the results shown now
+        if self.sender() is not self.worker:
+            return
+        keys = {(p['source'], p['id']) for p in photos}
+        self.found_images = [p for p in self.found_images if (p['source'], p['id']) not in keys]
+        self.results_grid.remove_keys(keys)
+
     def on_search_finished(self, results):
         self.search_btn.setEnabled(True)
-        self.found_images = results
-        for photo in results:
-            card = TiltCard(f"Photo {photo['id']}", f"{photo['source']} | {photo['width']}x{photo['height']}", photo.get('preview'))
-            self.results_layout.addWidget(card)
-        
-        if results:
-            self.download_btn.setEnabled(True)
+        self.more_btn.setEnabled(bool(self.found_images))
 
     def start_download(self):
-        # reuse Downloader logic or implement simple batch download
+        if not self.found_images:
+            return
+
         save_path = Path(self.config.default_download_path) / "photos"
-        save_path.mkdir(parents=True, exist_ok=True)
         
+        self.download_btn.setEnabled(False)
         self.progress_bar.show()
         self.progress_bar.setRange(0, len(self.found_images))
+        self.progress_bar.setValue(0)
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-        }
-        
-        import re
-        count = 0
-        for i, img in enumerate(self.found_images):
-            # Sanitize filename
-            raw_id = img['id']
-            # Remove query params and illegal characters
-            safe_id = re.sub(r'[^\w\-_.]', '_', raw_id.split('?')[0])
-            filename = f"{img['source'].lower()}_{safe_id}.jpg"
-            try:
-                logger.debug(f"Downloading photo: {img['url']}")
-                r = requests.get(img['url'], headers=headers, timeout=15, allow_redirects=True)
-                if r.status_code == 200:
-                    with open(save_path / filename, 'wb') as f:
-                        f.write(r.content)
-                    persistence.add_download(filename, img['source'], str(save_path / filename))
-                    count += 1
-                else:
-                    logger.error(f"Download failed for {img['url']}: Status {r.status_code}")
-            except Exception as e:
-                logger.error(f"Download error for {img['url']}: {e}")
-            self.progress_bar.setValue(i+1)
-            
+        self.dl_worker = PhotoDownloadWorker(list(self.found_images), save_path)
+        self.dl_worker.progress.connect(self.progress_bar.setValue)
+        self.dl_worker.finished.connect(self.on_download_finished)
+        self.dl_worker.start()
+
+    def on_download_finished(self, count):
+        self.download_btn.setEnabled(True)
         self.progress_bar.hide()
-        QMessageBox.information(self, "Success", f"Downloaded {count} photos to {save_path}")
+        QMessageBox.information(self, "Success", f"Downloaded {count} photos to {self.dl_worker.save_path}")
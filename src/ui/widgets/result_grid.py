@@ -0,0 +1,308 @@
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRectF, QSize, QEvent, QTimer
+from PyQt6.QtGui import QColor, QPainter, QPainterPath, QFont, QPen
+from ..thumbnails import thumbnail_loader, THUMB_WIDTH, THUMB_HEIGHT
+from .tilt_card import TiltCard
+
+# Same geometry as a TiltCard: a 270x220 card with a 20px margin
+CELL_WIDTH = 310
+CELL_HEIGHT = 260
+CARD_MARGIN = 20
+CARD_WIDTH = 270
+CARD_HEIGHT = 220
+
+# Lines of cells above and below the viewport that keep their thumbnails,
+# so a short scroll back doesn't reload them
+KEEP_LINES = 1
+
+SubtitleRole = Qt.ItemDataRole.UserRole + 1
+PreviewStateRole = Qt.ItemDataRole.UserRole + 2
+
+
+class ResultListModel(QAbstractListModel):
+    # Each entry is a dict with 'title', 'subtitle', an optional 'preview' URL
+    # and an optional 'key' to remove it by. Thumbnails are only requested
+    # once a cell is actually painted, and let go again once it scrolls away.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self._rows_by_url = {}
+        self._requested = set()
+        self._shown = set()
+        self._failed = set()
+
+        loader = thumbnail_loader()
+        loader.thumbnail_ready.connect(self._on_thumbnail_ready)
+        loader.thumbnail_failed.connect(self._on_thumbnail_failed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return entry['title']
+        if role == SubtitleRole:
+            return entry['subtitle']
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._thumbnail(entry.get('preview'))
+        if role == PreviewStateRole:
+            url = entry.get('preview')
+            if not url:
+                return "No Preview"
+            return "Error" if url in self._failed else "Loading..."
+        return None
+
+    def _thumbnail(self, url):
+        if not url or url in self._failed:
+            return None
+        loader = thumbnail_loader()
+        pixmap = loader.cached(url)
+        if pixmap is None and url not in self._requested:
+            self._requested.add(url)
+            pixmap = loader.request(url)
+            if pixmap is not None:
+                self._requested.discard(url)
+        if pixmap is not None:
+            self._shown.add(url)
+        return pixmap
+
+    def append_entries(self, entries):
+        if not entries:
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        for row, entry in enumerate(entries, first):
+            self.entries.append(entry)
+            if entry.get('preview'):
+                self._rows_by_url.setdefault(entry['preview'], []).append(row)
+        self.endInsertRows()
+
+    def remove_keys(self, keys):
+        rows = [row for row, entry in enumerate(self.entries) if entry.get('key') in keys]
+        if not rows:
+            return
+        # Back to front, one contiguous run at a time
+        while rows:
+            last = rows.pop()
+            first = last
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.entries[first:last + 1]
+            self.endRemoveRows()
+
+        self._rows_by_url = {}
+        for row, entry in enumerate(self.entries):
+            if entry.get('preview'):
+                self._rows_by_url.setdefault(entry['preview'], []).append(row)
+
+    def release_outside(self, first, last):
+        # Thumbnails of cells outside rows first..last are dropped: pending
+        # ones are cancelled, decoded ones leave memory and come back from
+        # the disk cache when their cell is painted again
+        loader = thumbnail_loader()
+        for url in list(self._requested | self._shown):
+            if any(first <= row <= last for row in self._rows_by_url.get(url, [])):
+                continue
+            if url in self._requested:
+                self._requested.discard(url)
+                loader.release(url)
+            self._shown.discard(url)
+            loader.forget(url)
+
+    def clear(self):
+        loader = thumbnail_loader()
+        for url in self._requested:
+            loader.release(url)
+        for url in self._shown:
+            loader.forget(url)
+        self.beginResetModel()
+        self.entries = []
+        self._rows_by_url = {}
+        self._requested = set()
+        self._shown = set()
+        self._failed = set()
+        self.endResetModel()
+
+    def _rows_changed(self, url):
+        for row in self._rows_by_url.get(url, []):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole, PreviewStateRole])
+
+    def _on_thumbnail_ready(self, url, pixmap):
+        if url in self._requested:
+            self._requested.discard(url)
+            self._shown.add(url)
+            self._rows_changed(url)
+
+    def _on_thumbnail_failed(self, url):
+        if url in self._requested:
+            self._requested.discard(url)
+            self._failed.add(url)
+            self._rows_changed(url)
+
+
+class ResultCardDelegate(QStyledItemDelegate):
+    def sizeHint(self, option, index):
+        return QSize(CELL_WIDTH, CELL_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+
+        card = QRectF(option.rect.x() + CARD_MARGIN, option.rect.y() + CARD_MARGIN, CARD_WIDTH, CARD_HEIGHT)
+        shape = QPainterPath()
+        shape.addRoundedRect(card.adjusted(0.5, 0.5, -0.5, -0.5), 12, 12)
+        painter.fillPath(shape, QColor("#18181b"))
+
+        # Preview, clipped to the card's rounded top corners
+        preview = QRectF(card.x(), card.y(), THUMB_WIDTH, THUMB_HEIGHT)
+        painter.save()
+        painter.setClipPath(shape)
+        painter.fillRect(preview, QColor("#09090b"))
+        pixmap = index.data(Qt.ItemDataRole.DecorationRole)
+        if pixmap is not None and not pixmap.isNull():
+            # Same crop as a QLabel centering an over-sized pixmap
+            source = QRectF((pixmap.width() - THUMB_WIDTH) / 2, (pixmap.height() - THUMB_HEIGHT) / 2,
+                            THUMB_WIDTH, THUMB_HEIGHT)
+            painter.drawPixmap(preview, pixmap, source)
+        else:
+            painter.setPen(QColor("#fafafa"))
+            painter.drawText(preview, Qt.AlignmentFlag.AlignCenter, index.data(PreviewStateRole))
+        painter.restore()
+
+        painter.setPen(QPen(QColor("#27272a"), 1))
+        painter.drawLine(preview.bottomLeft(), preview.bottomRight())
+        painter.drawPath(shape)
+
+        # Title and subtitle
+        text_rect = QRectF(card.x() + 16, preview.bottom() + 12, CARD_WIDTH - 32, card.bottom() - preview.bottom() - 28)
+        title_font = QFont(option.font)
+        title_font.setPixelSize(13)
+        title_font.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(title_font)
+        painter.setPen(QColor("#ffffff"))
+        title_flags = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap
+        title_bounds = painter.boundingRect(text_rect, title_flags, index.data(Qt.ItemDataRole.DisplayRole))
+        painter.drawText(text_rect, title_flags, index.data(Qt.ItemDataRole.DisplayRole))
+
+        subtitle_font = QFont(option.font)
+        subtitle_font.setPixelSize(11)
+        painter.setFont(subtitle_font)
+        painter.setPen(QColor("#22d3ee"))
+        subtitle_rect = text_rect.adjusted(0, min(title_bounds.height(), text_rect.height()) + 4, 0, 0)
+        painter.drawText(subtitle_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+                         index.data(SubtitleRole))
+
+        painter.restore()
+
+
+class ResultGrid(QListView):
+    # Cells are painted by the delegate, so the widget count stays constant no
+    # matter how many results there are. The single TiltCard is moved over the
+    # hovered cell to keep the tilt effect.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hover_card = None
+        self.hover_row = -1
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setGridSize(QSize(CELL_WIDTH, CELL_HEIGHT))
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(200)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setMouseTracking(True)
+        self.setStyleSheet("background: transparent; border: none;")
+
+        self.results_model = ResultListModel(self)
+        self.setModel(self.results_model)
+        self.setItemDelegate(ResultCardDelegate(self))
+
+        self.hover_card = TiltCard("", "", parent=self.viewport())
+        self.hover_card.hide()
+        self.hover_card.installEventFilter(self)
+
+        # Off-screen thumbnails are let go once scrolling settles
+        self.release_timer = QTimer(self)
+        self.release_timer.setSingleShot(True)
+        self.release_timer.setInterval(200)
+        self.release_timer.timeout.connect(self.release_hidden)
+
+        self.verticalScrollBar().valueChanged.connect(self.hide_hover_card)
+        self.verticalScrollBar().valueChanged.connect(self.release_timer.start)
+        self.results_model.modelReset.connect(self.hide_hover_card)
+        self.results_model.dataChanged.connect(self._on_data_changed)
+
+    def set_entries(self, entries):
+        self.results_model.clear()
+        self.results_model.append_entries(entries)
+
+    def append_entries(self, entries):
+        self.results_model.append_entries(entries)
+
+    def remove_keys(self, keys):
+        self.hide_hover_card()
+        self.results_model.remove_keys(keys)
+
+    def clear(self):
+        self.results_model.clear()
+
+    def visible_rows(self):
+        # Rows of the cell lines in view, plus KEEP_LINES on either side
+        per_line = max(1, self.viewport().width() // CELL_WIDTH)
+        top = self.verticalScrollBar().value()
+        first_line = max(0, top // CELL_HEIGHT - KEEP_LINES)
+        last_line = (top + self.viewport().height()) // CELL_HEIGHT + KEEP_LINES
+        return first_line * per_line, (last_line + 1) * per_line - 1
+
+    def release_hidden(self):
+        self.results_model.release_outside(*self.visible_rows())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.release_timer.start()
+
+    def mouseMoveEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        if index.isValid() and index.row() != self.hover_row:
+            self._show_hover_card(index)
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        if not self.hover_card.underMouse():
+            self.hide_hover_card()
+        super().leaveEvent(event)
+
+    def eventFilter(self, obj, event):
+        if self.hover_card is not None and obj is self.hover_card and event.type() == QEvent.Type.Leave:
+            self.hide_hover_card()
+        return super().eventFilter(obj, event)
+
+    def _show_hover_card(self, index):
+        self.hover_row = index.row()
+        self.hover_card.set_content(
+            index.data(Qt.ItemDataRole.DisplayRole),
+            index.data(SubtitleRole),
+            index.data(Qt.ItemDataRole.DecorationRole),
+            index.data(PreviewStateRole)
+        )
+        self.hover_card.move(self.visualRect(index).topLeft())
+        self.hover_card.show()
+        self.hover_card.raise_()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=None):
+        if self.hover_card.isVisible() and top_left.row() <= self.hover_row <= bottom_right.row():
+            self._show_hover_card(self.results_model.index(self.hover_row))
+
+    def hide_hover_card(self, *args):
+        self.hover_row = -1
+        self.hover_card.hide()
@@ -1,12 +1,35 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QTextEdit, QPushButton, QFrame, QMessageBox, QListWidget)
-from PyQt6.QtCore import Qt
-from ...services.gemini import GeminiService
+                            QTextEdit, QPushButton, QFrame, QMessageBox, QListWidget, QListWidgetItem)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from ...services import script_analysis
+from ...utils.logger import logger
+
+class ScriptAnalysisWorker(QThread):
+    scene_done = pyqtSignal(int, int)
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self, script, api_key):
+        super().__init__()
+        self.script = script
+        self.api_key = api_key
+
+    def run(self):
+        try:
+            # Scenes are analyzed a few at a time; each one reports back as it lands
+            analysis = script_analysis.analyze_script(
+                self.script, self.api_key,
+                on_scene=lambda scene, done, total: self.scene_done.emit(done, total))
+            self.finished.emit(analysis)
+        except Exception as e:
+            logger.error(f"Script analysis failed: {e}", exc_info=True)
+            self.error.emit(str(e))
 
 class ScriptAssetsViewWidget(QWidget):
     def __init__(self, config):
         super().__init__()
         self.config = config
+        self.worker = None
         self.init_ui()
 
     def init_ui(self):
@@ -61,20 +84,47 @@ class ScriptAssetsViewWidget(QWidget):
 
     def analyze_script(self):
         script = self.script_input.toPlainText()
-        if not script: return
+        if not script.strip(): return
+        if self.worker and self.worker.isRunning(): return
         
-        try:
-            gemini = GeminiService(self.config.gemini_api_key)
-            # Use the existing generate_prompts or custom logic
-            prompts = gemini.generate_prompts(f"Identify key visual assets needed for this video script and provide search terms: {script}")
-            
-            self.queries_list.clear()
-            if prompts:
-                self.queries_list.addItems(prompts)
-            else:
-                self.queries_list.addItem("No specific keywords found")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"AI Analysis failed: {e}")
+        self.analyze_btn.setEnabled(False)
+        self.analyze_btn.setText("Analyzing...")
+        self.worker = ScriptAnalysisWorker(script, self.config.gemini_api_key)
+        self.worker.scene_done.connect(self.on_scene_done)
+        self.worker.finished.connect(self.on_analysis_finished)
+        self.worker.error.connect(self.on_analysis_error)
+        self.worker.start()
+
+    def on_scene_done(self, done, total):
+        self.analyze_btn.setText(f"Analyzing... {done}/{total} scenes")
+
+    def on_analysis_finished(self, analysis):
+        self.reset_analyze_btn()
+        self.queries_list.clear()
+        scenes = analysis['scenes']
+        for entry in analysis['queries']:
+            label = entry['query']
+            if len(scenes) > 1:
+                label += f"  ·  scene {', '.join(str(n) for n in entry['scenes'])}"
+            item = QListWidgetItem(label)
+            # The bare query is what gets searched
+            item.setData(Qt.ItemDataRole.UserRole, entry['query'])
+            item.setToolTip("\n\n".join(scenes[n - 1]['text'][:200] for n in entry['scenes']))
+            self.queries_list.addItem(item)
+        if not analysis['queries']:
+            self.queries_list.addItem("No specific keywords found")
+
+        failed = [str(scene['index']) for scene in scenes if scene.get('error')]
+        if failed:
+            QMessageBox.warning(self, "Error", f"AI Analysis failed for scene {', '.join(failed)}")
+
+    def on_analysis_error(self, message):
+        self.reset_analyze_btn()
+        QMessageBox.warning(self, "Error", f"AI Analysis failed: {message}")
+
+    def reset_analyze_btn(self):
+        self.analyze_btn.setEnabled(True)
+        self.analyze_btn.setText("Analyze Script")
 
     def search_selected(self):
         current_item = self.queries_list.currentItem()
@@ -82,7 +132,7 @@ class ScriptAssetsViewWidget(QWidget):
             QMessageBox.information(self, "Info", "Please select a keyword to search")
             return
             
-        keyword = current_item.text()
+        keyword = current_item.data(Qt.ItemDataRole.UserRole) or current_item.text()
         # Find the search_view in main_window and set query
         # This is a bit hacky, better would be a signal
         parent = self.window()
@@ -1,85 +1,42 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                             QPushButton, QComboBox, QSpinBox, QProgressBar, 
-                            QTextEdit, QFileDialog, QMessageBox, QFrame, QScrollArea)
+                            QTextEdit, QFileDialog, QMessageBox, QFrame)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from pathlib import Path
-from ...services.pexels import PexelsService
-from ...services.pixabay import PixabayService
-from ...services.mixkit_scraper import MixkitScraper
-from ...services.coverr_scraper import CoverrScraper
-from ...services.videezy_scraper import VideezyScraper
-from ...services.mazwai_scraper import MazwaiScraper
+from ...services import batch
 from ...services.gemini import GeminiService
-from ...services.downloader import Downloader
 from ...utils.logger import logger
-from ...utils.persistence import persistence
-from .tilt_card import TiltCard
+from ..async_bridge import AsyncSearchJob, async_search_available
+from .result_grid import ResultGrid
 
 class SearchWorker(QThread):
     finished = pyqtSignal(list)
+    provider_finished = pyqtSignal(str, list)
+    batch_ready = pyqtSignal(list)
+    first_result = pyqtSignal(float)
+    duplicates_found = pyqtSignal(list)
     error = pyqtSignal(str)
 
-    def __init__(self, service_type, query, count, config):
+    def __init__(self, service_type, query, count, config, start=0):
         super().__init__()
         self.service_type = service_type
         self.query = query
         self.count = count
         self.config = config
+        self.start_at = start
 
     def run(self):
         logger.info(f"SearchWorker started: type={self.service_type}, query='{self.query}'")
         try:
-            results = []
-            
-            # Mixkit (Public)
-            if self.service_type in ['Mixkit', 'Public Only', 'All Sources']:
-                mixkit = MixkitScraper()
-                results.extend(mixkit.search_videos(self.query, self.count))
-                
-            # Coverr (Public)
-            if self.service_type in ['Coverr', 'Public Only', 'All Sources']:
-                coverr = CoverrScraper()
-                results.extend(coverr.search_videos(self.query, self.count))
-
-            # Videezy (Public)
-            if self.service_type in ['Videezy', 'Public Only', 'All Sources']:
-                videezy = VideezyScraper()
-                results.extend(videezy.search_videos(self.query, self.count))
-
-            # Mazwai (Public)
-            if self.service_type in ['Mazwai', 'Public Only', 'All Sources']:
-                mazwai = MazwaiScraper()
-                results.extend(mazwai.search_videos(self.query, self.count))
-
-            # Pexels (Key required)
-            if self.service_type in ['Pexels', 'All Sources']:
-                if self.config.pexels_api_key:
-                    logger.debug("Pexels search enabled with key")
-                    pexels = PexelsService(self.config.pexels_api_key)
-                    videos = pexels.search_videos(self.query, self.count)
-                    for v in videos:
-                        v['source'] = 'Pexels'
-                        v['download_url'] = pexels.get_video_url(v)
-                    results.extend(videos)
-                else:
-                    logger.debug("Pexels skipped: No API Key")
+            # All selected sources run at once under one overall time limit;
+            # the search is recorded in history
+            results = batch.search('videos', self.service_type, self.query, self.count, self.config,
+                                   start=self.start_at,
+                                   on_batch=self.batch_ready.emit,
+                                   on_provider_finished=self.provider_finished.emit,
+                                   on_first_result=self.first_result.emit,
+                                   on_duplicates=self.duplicates_found.emit)
 
-            # Pixabay (Key required)
-            if self.service_type in ['Pixabay', 'All Sources']:
-                if self.config.pixabay_api_key:
-                    logger.debug("Pixabay search enabled with key")
-                    pixabay = PixabayService(self.config.pixabay_api_key)
-                    videos = pixabay.search_videos(self.query, self.count)
-                    for v in videos:
-                        v['source'] = 'Pixabay'
-                        v['download_url'] = pixabay.get_video_url(v)
-                    results.extend(videos)
-                else:
-                    logger.debug("Pixabay skipped: No API Key")
-            
-            # Record in history
-            persistence.add_history(self.query, self.service_type, len(results))
-            
             logger.info(f"SearchWorker finished: {len(results)} total results found")
             self.finished.emit(results)
         except Exception as e:
@@ -88,35 +45,31 @@ class SearchWorker(QThread):
 
 class DownloadWorker(QThread):
     progress = pyqtSignal(str)
+    percent = pyqtSignal(int)
     finished = pyqtSignal(int)
     
     def __init__(self, videos, save_path):
         super().__init__()
         self.videos = videos
         self.save_path = Path(save_path)
-        self.downloader = Downloader(self.save_path)
 
     def run(self):
-        count = 0
-        total = len(self.videos)
-        
-        import re
-        for i, video in enumerate(self.videos, 1):
-            self.progress.emit(f"Downloading {i}/{total}...")
-            # Sanitize filename
-            safe_id = re.sub(r'[^\w\-_.]', '_', str(video['id']).split('?')[0])
-            filename = f"{video['source'].lower()}_{safe_id}.mp4"
-            if self.downloader.download_video(video['download_url'], filename):
-                persistence.add_download(filename, video['source'], str(self.save_path / filename))
-                count += 1
-                
-        self.finished.emit(count)
+        completed, _ = batch.download('videos', self.videos, self.save_path, on_progress=self.on_progress)
+        self.finished.emit(len(completed))
+
+    def on_progress(self, done, total, done_bytes):
+        self.progress.emit(f"Downloaded {done}/{total} ({done_bytes / (1024 * 1024):.1f} MB)")
+        self.percent.emit(int(done * 100 / total))
 
 class SearchViewWidget(QWidget):
     def __init__(self, config):
         super().__init__()
         self.config = config
         self.found_videos = []
+        self.seen_videos = set()
+        self.search_query = None
+        self.search_type = None
+        self.search_count = 0
         self.init_ui()
 
     def init_ui(self):
@@ -160,7 +113,7 @@ class SearchViewWidget(QWidget):
         self.service_combo.setCursor(Qt.CursorShape.PointingHandCursor)
         
         self.count_spin = QSpinBox()
-        self.count_spin.setRange(1, 50)
+        self.count_spin.setRange(1, 500)
         self.count_spin.setValue(5)
         self.count_spin.setSuffix(" videos")
         self.count_spin.setFixedWidth(120)
@@ -204,24 +157,13 @@ class SearchViewWidget(QWidget):
         layout.addWidget(controls_frame)
 
         # Results Area
-        results_label = QLabel("RESULTS")
-        results_label.setObjectName("SubHeader")
-        layout.addWidget(results_label)
+        self.results_label = QLabel("RESULTS")
+        self.results_label.setObjectName("SubHeader")
+        layout.addWidget(self.results_label)
 
-        # Scrollable area for cards
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("background: transparent; border: none;")
-        
-        self.results_container = QWidget()
-        self.results_container.setStyleSheet("background: transparent;")
-        self.results_layout = QHBoxLayout(self.results_container)
-        self.results_layout.setContentsMargins(0, 0, 0, 0)
-        self.results_layout.setSpacing(20)
-        self.results_layout.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-        
-        self.scroll_area.setWidget(self.results_container)
-        layout.addWidget(self.scroll_area)
+        # Virtualized grid: only visible cells are painted
+        self.results_grid = ResultGrid()
+        layout.addWidget(self.results_grid)
 
         # Bottom Controls
         bottom_layout = QHBoxLayout()
@@ -242,6 +184,14 @@ class SearchViewWidget(QWidget):
         self.search_btn.setCursor(Qt.CursorShape.PointingHandCursor)
         self.search_btn.clicked.connect(self.start_search)
         
+        # Asks the sources for another round of the same size
+        self.more_btn = QPushButton("Load More")
+        self.more_btn.setObjectName("SecondaryButton")
+        self.more_btn.setEnabled(False)
+        self.more_btn.setMinimumHeight(48)
+        self.more_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.more_btn.clicked.connect(self.load_more)
+        
         self.download_btn = QPushButton("Download All")
         self.download_btn.setEnabled(False)
         self.download_btn.setMinimumHeight(48)
@@ -251,6 +201,7 @@ class SearchViewWidget(QWidget):
         bottom_layout.addWidget(self.path_input)
         bottom_layout.addWidget(browse_btn)
         bottom_layout.addWidget(self.search_btn)
+        bottom_layout.addWidget(self.more_btn)
         bottom_layout.addWidget(self.download_btn)
         
         layout.addLayout(bottom_layout)
@@ -280,46 +231,94 @@ class SearchViewWidget(QWidget):
         if not query:
             return
             
-        self.search_btn.setEnabled(False)
         # Clear results
-        while self.results_layout.count():
-            item = self.results_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        self.results_grid.clear()
+        self.results_label.setText("RESULTS")
         
         self.found_videos = []
+        self.seen_videos = set()
+        self.download_btn.setEnabled(False)
+
+        self.search_query = query
+        self.search_type = self.service_combo.currentText()
+        self.search_count = self.count_spin.value()
+        self.run_search()
+
+    def load_more(self):
+        # Only the next page is asked for. Paged sources continue from the pages
+        # they already fetched, and the search isn't added to the history again
+        if not self.search_query:
+            return
+        start = self.search_count
+        self.search_count += self.count_spin.value()
+        self.run_search(start)
+
+    def run_search(self, start=0):
+        self.search_btn.setEnabled(False)
+        self.more_btn.setEnabled(False)
         
-        self.worker = SearchWorker(
-            self.service_combo.currentText(),
-            query,
-            self.count_spin.value(),
-            self.config
-        )
+        if async_search_available():
+            self.worker = AsyncSearchJob('videos', self.search_type, self.search_query,
+                                         self.search_count, self.config, start)
+        else:
+            self.worker = SearchWorker(
+                self.search_type,
+                self.search_query,
+                self.search_count,
+                self.config,
+                start
+            )
+        self.worker.batch_ready.connect(self.on_results_batch)
+        self.worker.first_result.connect(self.on_first_result)
+        self.worker.duplicates_found.connect(self.on_duplicates_found)
         self.worker.finished.connect(self.on_search_finished)
         self.worker.error.connect(self.on_search_error)
         self.worker.start()
 
-    def on_search_finished(self, results):
-        self.search_btn.setEnabled(True)
-        self.found_videos = results
-        
-        for video in results:
+    def on_first_result(self, latency):
+        self.results_label.setText(f"RESULTS · first in {latency * 1000:.0f} ms")
+
+    def on_results_batch(self, videos):
+        # Results show up as providers produce them, before the search is done
+        videos = [v for v in videos if (v['source'], v['id']) not in self.seen_videos]
+        if not videos:
+            return
+        self.seen_videos.update((v['source'], v['id']) for v in videos)
+        self.found_videos.extend(videos)
+        entries = []
+        for video in videos:
             duration = video.get('duration', '?')
             quality = f"{video.get('width', 0)}x{video.get('height', 0)}"
-            title = f"Video {video['id']}"
-            subtitle = f"{video['source']} | {quality} | {duration}s"
-            
-            card = TiltCard(title, subtitle, video.get('preview'))
-            self.results_layout.addWidget(card)
-            
-        if results:
-            self.download_btn.setEnabled(True)
-            QMessageBox.information(self, "Search", f"Found {len(results)} videos")
+            entries.append({
+                'key': (video['source'], video['id']),
+                'title': f"Video {video['id']}",
+                'subtitle': f"{video['source']} | {quality} | {duration}s",
+                'preview': video.get('preview')
+            })
+        self.results_grid.append_entries(entries)
+        self.download_btn.setEnabled(True)
+
+    def on_duplicates_found(self, videos):
+        # Late reports of an earlier search don't apply to the results shown now
+        if self.sender() is not self.worker:
+            return
+        # The same clip from several sources: only the best copy stays
+        keys = {(v['source'], v['id']) for v in videos}
+        self.found_videos = [v for v in self.found_videos if (v['source'], v['id']) not in keys]
+        self.results_grid.remove_keys(keys)
+
+    def on_search_finished(self, results):
+        self.search_btn.setEnabled(True)
+        self.more_btn.setEnabled(bool(self.found_videos))
+        # Every result already reached the grid through on_results_batch
+        if self.found_videos:
+            QMessageBox.information(self, "Search", f"Found {len(self.found_videos)} videos")
         else:
             QMessageBox.information(self, "Search", "No videos found")
 
     def on_search_error(self, error):
         self.search_btn.setEnabled(True)
+        self.more_btn.setEnabled(bool(self.found_videos))
         QMessageBox.critical(self, "Error", f"Search failed: {error}")
 
     def browse_path(self):
@@ -335,8 +334,9 @@ class SearchViewWidget(QWidget):
         self.progress_bar.show()
         self.progress_bar.setValue(0)
         
-        self.dl_worker = DownloadWorker(self.found_videos, self.path_input.text())
+        self.dl_worker = DownloadWorker(list(self.found_videos), self.path_input.text())
         self.dl_worker.progress.connect(self.progress_bar.setFormat)
+        self.dl_worker.percent.connect(self.progress_bar.setValue)
         self.dl_worker.finished.connect(self.on_download_finished)
         self.dl_worker.start()
 
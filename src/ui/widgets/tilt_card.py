@@ -1,11 +1,10 @@
 from PyQt6.QtWidgets import (QGraphicsView, QGraphicsScene, QGraphicsProxyWidget, 
                             QFrame, QVBoxLayout, QLabel, QGraphicsRotation, QWidget)
-from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, pyqtProperty, QUrl
-from PyQt6.QtGui import QVector3D, QPainter, QPixmap
-from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest
+from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, pyqtProperty
+from PyQt6.QtGui import QVector3D, QPainter
 
 class TiltCard(QGraphicsView):
-    def __init__(self, title, subtitle, preview_url=None, parent=None):
+    def __init__(self, title, subtitle, parent=None):
         super().__init__(parent)
         self.setFixedSize(310, 260) 
         self.setStyleSheet("background: transparent; border: none;")
@@ -45,7 +44,7 @@ class TiltCard(QGraphicsView):
             border-bottom: 1px solid #27272a;
         """)
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setText("Loading...")
+        self.image_label.setText("No Preview")
         
         # Text container (for margins)
         text_container = QWidget()
@@ -65,16 +64,8 @@ class TiltCard(QGraphicsView):
         
         layout.addWidget(self.image_label)
         layout.addWidget(text_container)
-        
-        # Network manager for image
-        self.manager = QNetworkAccessManager(self)
-        self.manager.finished.connect(self.on_image_loaded)
-        if preview_url:
-            self.manager.get(QNetworkRequest(QUrl(preview_url)))
-        else:
-            self.image_label.setText("No Preview")
 
-        # Proxy for 3D setup (moved from on_image_loaded)
+        # Proxy for 3D setup
         self.proxy = self.scene.addWidget(self.content)
         self.proxy.setPos(20, 20)
         
@@ -94,20 +85,23 @@ class TiltCard(QGraphicsView):
             anim.setDuration(300)
             anim.setEasingCurve(QEasingCurve.Type.OutCubic)
 
-    def on_image_loaded(self, reply):
-        if reply.error() == reply.NetworkError.NoError:
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            if not pixmap.isNull():
-                scaled = pixmap.scaled(270, 140, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-                self.image_label.setPixmap(scaled)
-                self.image_label.setText("")
-            else:
-                self.image_label.setText("Error")
+    def set_preview(self, pixmap):
+        self.image_label.setPixmap(pixmap)
+        self.image_label.setText("")
+
+    def set_content(self, title, subtitle, pixmap=None, placeholder="No Preview"):
+        # Re-point an existing card at another result (used by the result grid)
+        self.title_label.setText(title)
+        self.subtitle_label.setText(subtitle)
+        if pixmap is not None and not pixmap.isNull():
+            self.set_preview(pixmap)
         else:
-            self.image_label.setText("Error")
-        reply.deleteLater()
+            self.image_label.clear()
+            self.image_label.setText(placeholder)
+        self.anim_x.stop()
+        self.anim_y.stop()
+        self.x_rotation.setAngle(0)
+        self.y_rotation.setAngle(0)
 
     def mouseMoveEvent(self, event):
         # Center of 310x260 view is (155, 130)
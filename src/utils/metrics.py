@@ -0,0 +1,294 @@
+import bisect
+import contextlib
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# In-process counters, gauges and histograms. Everything is labelled by
+# provider where it makes sense, so a slow "All Sources" search can be traced
+# to the source holding it up. Exported as Prometheus text or JSON, shown on
+# the Diagnostics page and served by the API server under /metrics.
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SPEED_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+
+# Recent observations kept per label set for exact percentiles
+WINDOW = 1024
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values) if value != '']
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def label_sets(self) -> List[Dict[str, str]]:
+        with self._lock:
+            keys = list(self._values)
+        return [dict(zip(self.labels, key)) for key in keys]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        # Sums over the labels left out
+        wanted = self._key(labels)
+        with self._lock:
+            return sum(v for key, v in self._values.items()
+                       if all(w in ('', k) for w, k in zip(wanted, key)))
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, key, '', value
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [{'labels': dict(zip(self.labels, key)), 'value': value} for key, value in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class _Series:
+    def __init__(self, buckets: int, window: int):
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, window: int = WINDOW):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = _Series(len(self.buckets), self.window)
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.sum += value
+            series.count += 1
+            series.recent.append(value)
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _matching(self, labels: Dict[str, Any]) -> List[_Series]:
+        # Called with the lock held
+        wanted = self._key(labels)
+        return [s for key, s in self._values.items() if all(w in ('', k) for w, k in zip(wanted, key))]
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            return sum(s.count for s in self._matching(labels))
+
+    def total(self, **labels) -> float:
+        with self._lock:
+            return sum(s.sum for s in self._matching(labels))
+
+    def percentile(self, pct: float, **labels) -> Optional[float]:
+        # Over the most recent observations (WINDOW per label set)
+        with self._lock:
+            values = sorted(v for s in self._matching(labels) for v in s.recent)
+        if not values:
+            return None
+        return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, str, float]]:
+        with self._lock:
+            items = [(key, list(s.counts), s.sum, s.count) for key, s in self._values.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                yield f"{self.name}_bucket", key, f'le="{_number(bound)}"', cumulative
+            yield f"{self.name}_sum", key, '', total
+            yield f"{self.name}_count", key, '', count
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = list(self._values)
+        rows = []
+        for key in keys:
+            labels = dict(zip(self.labels, key))
+            rows.append({
+                'labels': labels,
+                'count': self.count(**labels),
+                'sum': self.total(**labels),
+                'p50': self.percentile(50, **labels),
+                'p95': self.percentile(95, **labels),
+                'p99': self.percentile(99, **labels),
+            })
+        return rows
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = 'stock_parser'):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.prefix}_{name}", help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(f"{self.prefix}_{name}", help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.prefix}_{name}", help, labels, buckets))
+
+    def all(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in self.all():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(metric.labels, key, extra)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'started': self.started,
+            'uptime': round(time.time() - self.started, 1),
+            'metrics': {m.name: {'type': m.kind, 'help': m.help, 'samples': m.snapshot()} for m in self.all()},
+        }
+
+    def reset(self):
+        # Gauges describe the present, so they keep their values
+        for metric in self.all():
+            if metric.kind != 'gauge':
+                metric.reset()
+        self.started = time.time()
+
+
+def timed(histogram: Histogram, items: Iterable, **labels) -> Iterator:
+    # Passes items through, observing only the time spent producing them,
+    # not the time the consumer spends between items
+    iterator = iter(items)
+    spent = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                spent += time.perf_counter() - started
+            yield item
+    finally:
+        histogram.observe(spent, **labels)
+
+
+metrics = MetricsRegistry()
+
+# Provider requests, as sent by the sync and async transports
+provider_requests = metrics.counter(
+    'provider_requests_total', 'HTTP requests sent to a provider, by status', ('provider', 'status'))
+provider_request_seconds = metrics.histogram(
+    'provider_request_seconds', 'Time for a provider to answer one request', ('provider',))
+provider_bytes = metrics.counter(
+    'provider_response_bytes_total', 'Response bytes received from a provider', ('provider',))
+provider_errors = metrics.counter(
+    'provider_errors_total', 'Failed requests, error statuses and scraper failures', ('provider', 'reason'))
+provider_timeouts = metrics.counter(
+    'provider_timeouts_total', 'Requests that timed out, and searches dropped at the deadline',
+    ('provider', 'stage'))
+
+# Keep-alive reuse of the shared requests session, per host
+connections_opened = metrics.counter(
+    'http_connections_opened_total', 'TCP/TLS connections opened by the shared session', ('host',))
+connections_reused = metrics.counter(
+    'http_connections_reused_total', 'Requests sent over an already open connection', ('host',))
+
+# Parsing and search results
+parse_seconds = metrics.histogram(
+    'parse_seconds', 'Time spent parsing one result page', ('provider',), buckets=PARSE_BUCKETS)
+search_seconds = metrics.histogram(
+    'provider_search_seconds', 'Time for a provider to finish its part of a search', ('provider',))
+results_requested = metrics.counter(
+    'results_requested_total', 'Results asked from a provider', ('provider',))
+results_returned = metrics.counter(
+    'results_returned_total', 'Results a provider delivered', ('provider',))
+
+# Downloads
+download_bytes = metrics.counter('download_bytes_total', 'Bytes downloaded')
+downloads = metrics.counter('downloads_total', 'Finished download tasks, by result', ('result',))
+download_speed = metrics.histogram(
+    'download_speed_mb_per_second', 'Speed of each downloaded file', buckets=SPEED_BUCKETS)
+download_queue = metrics.gauge('download_queue_depth', 'Download tasks waiting for a worker')
+downloads_active = metrics.gauge('downloads_active', 'Download tasks in progress')
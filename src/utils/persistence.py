@@ -1,77 +1,190 @@
 import json
+import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from .logger import logger
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    query TEXT NOT NULL,
+    source TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_source ON history (source);
+CREATE INDEX IF NOT EXISTS history_query ON history (query);
+CREATE TABLE IF NOT EXISTS downloads (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    source TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS downloads_timestamp ON downloads (timestamp);
+CREATE INDEX IF NOT EXISTS downloads_source ON downloads (source);
+CREATE INDEX IF NOT EXISTS downloads_path ON downloads (path);
+"""
+
+# Old rows are trimmed after this many inserts, not on every one
+PRUNE_EVERY = 1000
+
+
 class PersistenceManager:
-    def __init__(self):
-        self.base_dir = Path.home() / ".stock_parser"
-        self.base_dir.mkdir(exist_ok=True)
-        
+    def __init__(self, base_dir: Optional[Path] = None, history_retention: int = 200_000,
+                 downloads_retention: int = 200_000):
+        self.base_dir = base_dir or Path.home() / ".stock_parser"
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+        self.db_file = self.base_dir / "stock_parser.db"
+        # Written by earlier versions, imported once
         self.history_file = self.base_dir / "history.json"
         self.downloads_file = self.base_dir / "downloads.json"
-        
-        self._ensure_files()
 
-    def _ensure_files(self):
-        for f in [self.history_file, self.downloads_file]:
-            if not f.exists():
-                with open(f, 'w', encoding='utf-8') as f_out:
-                    json.dump([], f_out)
+        # Newest rows kept per table
+        self.retention = {'history': history_retention, 'downloads': downloads_retention}
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts = {'history': 0, 'downloads': 0}
+
+        with self._connection() as db:
+            db.executescript(SCHEMA)
+        try:
+            self._import_json()
+        except Exception as e:
+            # Never worth failing startup over; tried again next time
+            logger.error(f"Persistence import error: {e}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections stay on the thread that opened them
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_file, timeout=10)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _import_json(self):
+        db = self._connection()
+        if db.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+            return
+
+        def load(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                return []
+            except Exception as e:
+                logger.error(f"Persistence import error ({path.name}): {e}")
+                return []
+            return entries if isinstance(entries, list) else []
+
+        def rows(entries, fields):
+            # Entries missing a field are skipped one by one
+            result = []
+            for entry in entries:
+                try:
+                    result.append(tuple(entry[field] for field in fields))
+                except (KeyError, TypeError):
+                    continue
+            return result
+
+        # The JSON files are newest first; rows are stored oldest first
+        history_entries = list(reversed(load(self.history_file)))
+        download_entries = list(reversed(load(self.downloads_file)))
+        history = rows(history_entries, ('timestamp', 'query', 'source', 'count'))
+        downloads = rows(download_entries, ('timestamp', 'filename', 'source', 'path'))
+
+        # Another process starting at the same time may get there first;
+        # whoever holds the write lock checks again before importing
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if not db.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                db.executemany("INSERT INTO history (timestamp, query, source, count) VALUES (?, ?, ?, ?)",
+                               history)
+                db.executemany("INSERT INTO downloads (timestamp, filename, source, path) VALUES (?, ?, ?, ?)",
+                               downloads)
+                db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('json_imported', ?)",
+                           (datetime.now().isoformat(),))
+            else:
+                history = downloads = []
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if history or downloads:
+            skipped = len(history_entries) + len(download_entries) - len(history) - len(downloads)
+            logger.info(f"Imported {len(history)} history and {len(downloads)} download entries from JSON"
+                        + (f", skipped {skipped} malformed" if skipped else ""))
+
+    def _insert(self, table: str, sql: str, rows: List[Tuple]):
+        db = self._connection()
+        with db:
+            db.executemany(sql, rows)
+
+        with self._lock:
+            self._inserts[table] += len(rows)
+            prune = self._inserts[table] >= PRUNE_EVERY
+            if prune:
+                self._inserts[table] = 0
+        if prune:
+            self._prune(table)
+
+    def _prune(self, table: str):
+        db = self._connection()
+        with db:
+            db.execute(f"DELETE FROM {table} WHERE id <= (SELECT MAX(id) FROM {table}) - ?",
+                       (self.retention[table],))
 
     def add_history(self, query: str, source: str, result_count: int):
         try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            entry = {
-                'timestamp': datetime.now().isoformat(),
-                'query': query,
-                'source': source,
-                'count': result_count
-            }
-            
-            data.insert(0, entry)
-            # Keep only last 100 entries
-            data = data[:100]
-            
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            self._insert('history', "INSERT INTO history (timestamp, query, source, count) VALUES (?, ?, ?, ?)",
+                         [(datetime.now().isoformat(), query, source, result_count)])
         except Exception as e:
             logger.error(f"Persistence error (history): {e}")
 
     def add_download(self, filename: str, source: str, path: str):
+        self.add_downloads([(filename, source, path)])
+
+    def add_downloads(self, entries: Iterable[Tuple[str, str, str]]):
+        # (filename, source, path) tuples, written in one transaction
+        timestamp = datetime.now().isoformat()
+        rows = [(timestamp, filename, source, path) for filename, source, path in entries]
+        if not rows:
+            return
         try:
-            with open(self.downloads_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            entry = {
-                'timestamp': datetime.now().isoformat(),
-                'filename': filename,
-                'source': source,
-                'path': path
-            }
-            
-            data.insert(0, entry)
-            data = data[:100]
-            
-            with open(self.downloads_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            self._insert('downloads', "INSERT INTO downloads (timestamp, filename, source, path) VALUES (?, ?, ?, ?)",
+                         rows)
         except Exception as e:
             logger.error(f"Persistence error (downloads): {e}")
 
-    def get_history(self):
+    def get_history(self, limit: int = 100) -> List[Dict[str, Any]]:
         try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
+            rows = self._connection().execute(
+                "SELECT timestamp, query, source, count FROM history ORDER BY id DESC LIMIT ?", (limit,))
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Persistence error (history): {e}")
             return []
 
-    def get_downloads(self):
+    def get_downloads(self, limit: int = 100) -> List[Dict[str, Any]]:
         try:
-            with open(self.downloads_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
+            rows = self._connection().execute(
+                "SELECT timestamp, filename, source, path FROM downloads ORDER BY id DESC LIMIT ?", (limit,))
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Persistence error (downloads): {e}")
             return []
 
 persistence = PersistenceManager()
@@ -0,0 +1,187 @@
+import atexit
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from .logger import logger
+from .result_cache import HOUR, normalize_query
+
+# Generated prompts for a scenario hardly go out of date, and every lookup
+# saved is a model round-trip and quota not spent
+DEFAULT_TTL = 30 * 24 * HOUR
+
+# A scenario of at least NEAR_DUPLICATE_WORDS words that differs from a
+# stored one by at most NEAR_DUPLICATE_EDITS words (in order) reuses its
+# answer, so a typo fixed in a long description costs no request. Short
+# texts never do: there one changed word ("day" for "night") is the point.
+NEAR_DUPLICATE_WORDS = 40
+NEAR_DUPLICATE_EDITS = 2
+
+# Lookups only mark entries as used in memory; the file is rewritten at most
+# this often for them, and on exit
+SAVE_INTERVAL = 60
+
+WORD = re.compile(r'\w+')
+
+
+def scenario_words(scenario: str) -> tuple:
+    return tuple(WORD.findall(scenario.lower()))
+
+
+def word_edits(a: tuple, b: tuple) -> int:
+    # Words inserted, deleted or replaced to turn a into b
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    return sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal')
+
+
+class PromptCache:
+    # All entries live in one small JSON file, since near-duplicate lookups
+    # compare against every stored scenario anyway
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 500, ttl: float = DEFAULT_TTL,
+                 near_duplicate_words: int = NEAR_DUPLICATE_WORDS,
+                 near_duplicate_edits: int = NEAR_DUPLICATE_EDITS):
+        self.path = path or Path.home() / ".stock_parser" / "cache" / "prompts.json"
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.near_duplicate_words = near_duplicate_words
+        self.near_duplicate_edits = near_duplicate_edits
+        self.enabled = True
+
+        self._lock = threading.Lock()
+        self._entries = None  # key -> entry, least recently used first
+        self._words = {}  # key -> scenario_words, kept next to the entries
+        self._dirty = False  # 'used' times changed since the last save
+        self._saved = 0.0
+        atexit.register(self.flush)
+
+    def _key(self, model: str, scenario: str) -> str:
+        raw = f"{model}|{normalize_query(scenario)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        # Called with the lock held
+        if self._entries is not None:
+            return
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Prompt cache unreadable, starting empty: {e}")
+        ordered = sorted(entries.items(), key=lambda kv: kv[1].get('used', 0))
+        self._entries = OrderedDict(ordered)
+        self._words = {key: scenario_words(entry['scenario']) for key, entry in ordered}
+
+    def _save(self):
+        # Called with the lock held
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._saved = time.monotonic()
+        except Exception as e:
+            logger.error(f"Prompt cache write failed: {e}")
+
+    def _drop(self, key: str):
+        # Called with the lock held
+        self._entries.pop(key, None)
+        self._words.pop(key, None)
+
+    def _touch(self, key: str) -> List[str]:
+        # Called with the lock held
+        entry = self._entries[key]
+        entry['used'] = time.time()
+        self._entries.move_to_end(key)
+        self._dirty = True
+        if time.monotonic() - self._saved > SAVE_INTERVAL:
+            self._save()
+        return list(entry['prompts'])
+
+    def _near_duplicate(self, model: str, scenario: str) -> Optional[str]:
+        # Called with the lock held
+        words = scenario_words(scenario)
+        if len(words) < self.near_duplicate_words:
+            return None
+        best, best_edits = None, self.near_duplicate_edits + 1
+        for k, entry in self._entries.items():
+            other = self._words[k]
+            if entry['model'] != model or abs(len(other) - len(words)) >= best_edits:
+                continue
+            edits = word_edits(words, other)
+            if edits < best_edits:
+                best, best_edits = k, edits
+        if best is not None:
+            logger.debug(f"Prompt cache near-duplicate hit ({best_edits} words apart)")
+        return best
+
+    def get(self, model: str, scenario: str, near_duplicates: bool = True) -> Optional[List[str]]:
+        # near_duplicates=False only takes exact (normalized) matches
+        if not self.enabled:
+            return None
+
+        key = self._key(model, scenario)
+        now = time.time()
+        with self._lock:
+            self._load()
+            expired = [k for k, entry in self._entries.items() if now - entry['created'] > self.ttl]
+            for k in expired:
+                self._drop(k)
+
+            if key in self._entries:
+                logger.debug("Prompt cache hit")
+                return self._touch(key)
+
+            best = self._near_duplicate(model, scenario) if near_duplicates else None
+            if best is not None:
+                return self._touch(best)
+            if expired:
+                self._save()
+        return None
+
+    def put(self, model: str, scenario: str, prompts: List[str]):
+        if not self.enabled or not prompts:
+            return
+
+        key = self._key(model, scenario)
+        now = time.time()
+        entry: Dict[str, Any] = {
+            'model': model,
+            'scenario': normalize_query(scenario),
+            'created': now,
+            'used': now,
+            'prompts': list(prompts),
+        }
+        with self._lock:
+            self._load()
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._words[key] = scenario_words(entry['scenario'])
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            self._save()
+
+    def flush(self):
+        with self._lock:
+            if self._dirty and self._entries is not None:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._words = {}
+            self._dirty = False
+            self.path.unlink(missing_ok=True)
+
+
+prompt_cache = PromptCache()
@@ -0,0 +1,280 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from .logger import logger
+
+HOUR = 60 * 60
+
+# How long a provider's results count as fresh. Scraped pages change more
+# often than the curated API listings.
+PROVIDER_TTLS = {
+    'Pexels': 24 * HOUR,
+    'Pixabay': 24 * HOUR,
+    'Mixkit': 12 * HOUR,
+    'Coverr': 12 * HOUR,
+    'Videezy': 6 * HOUR,
+    'Mazwai': 12 * HOUR,
+    'Burst': 12 * HOUR,
+    'Stocksnap': 6 * HOUR,
+    'Unsplash': 6 * HOUR,
+}
+DEFAULT_TTL = 6 * HOUR
+
+# Count a whole-page scraper is asked for: everything on the page
+WHOLE_PAGE = 10_000
+
+
+def normalize_query(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+
+class _Incomplete:
+    def __repr__(self):
+        return 'INCOMPLETE'
+
+
+# Returned by a provider generator that failed part way; what it yielded
+# is passed on but not cached
+INCOMPLETE = _Incomplete()
+
+
+def collect(results) -> Tuple[List[Dict[str, Any]], bool]:
+    # All of a list or generator's results, and whether they are complete
+    if not inspect.isgenerator(results):
+        return list(results or []), True
+    collected = []
+    while True:
+        try:
+            collected.append(next(results))
+        except StopIteration as stop:
+            return collected, stop.value is not INCOMPLETE
+
+
+class ResultCache:
+    def __init__(self, directory: Optional[Path] = None, max_entries: int = 2000,
+                 max_bytes: int = 64 * 1024 * 1024, stale_window: float = 7 * 24 * HOUR,
+                 stale_while_revalidate: bool = True):
+        self.directory = directory or Path.home() / ".stock_parser" / "cache" / "results"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Expired entries younger than ttl + stale_window are still served
+        # while a background refresh replaces them
+        self.stale_window = stale_window
+        self.stale_while_revalidate = stale_while_revalidate
+        self.enabled = True
+
+        self._lock = threading.Lock()
+        self._index = None  # key -> file size, least recently used first
+        self._refreshing = set()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+
+    def _key(self, provider: str, kind: str, query: str) -> str:
+        # One entry per query, whatever the count; see get()
+        raw = f"{provider}|{kind}|{normalize_query(query)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load_index(self):
+        # Called with the lock held
+        if self._index is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for f in self.directory.glob('*.json'):
+            try:
+                st = f.stat()
+                entries.append((st.st_mtime, f.stem, st.st_size))
+            except OSError:
+                continue
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+
+    def _evict(self):
+        # Called with the lock held
+        total = sum(self._index.values())
+        while self._index and (len(self._index) > self.max_entries or total > self.max_bytes):
+            key, size = self._index.popitem(last=False)
+            total -= size
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def get(self, provider: str, kind: str, query: str, count: int) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        # Returns (results, fresh). results is None on a miss. An entry stored
+        # for at least count results answers smaller counts too, and so does
+        # one the provider couldn't fill, since asking for more won't help.
+        if not self.enabled:
+            return None, False
+
+        key = self._key(provider, kind, query)
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None, False
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except Exception:
+                self._index.pop(key, None)
+                return None, False
+
+            age = time.time() - entry['created']
+            ttl = PROVIDER_TTLS.get(provider, DEFAULT_TTL)
+            if age > ttl + self.stale_window or (age > ttl and not self.stale_while_revalidate):
+                self._index.pop(key, None)
+                path.unlink(missing_ok=True)
+                return None, False
+
+            results = entry['results']
+            if entry.get('count', 0) < count and len(results) >= entry.get('count', 0):
+                return None, False
+
+            # File mtime doubles as the last access time for LRU order
+            self._index.move_to_end(key)
+            os.utime(path)
+            return results[:count], age <= ttl
+
+    def put(self, provider: str, kind: str, query: str, count: int, results: List[Dict[str, Any]]):
+        if not self.enabled:
+            return
+
+        key = self._key(provider, kind, query)
+        entry = {
+            'provider': provider,
+            'kind': kind,
+            'query': normalize_query(query),
+            'count': count,
+            'created': time.time(),
+            'results': results
+        }
+        try:
+            data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+            with self._lock:
+                self._load_index()
+                tmp_path = self._path(key).with_suffix('.tmp')
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+                self._index[key] = len(data)
+                self._index.move_to_end(key)
+                self._evict()
+        except Exception as e:
+            logger.error(f"Result cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                self._path(key).unlink(missing_ok=True)
+            self._index.clear()
+
+    def _refresh(self, key, call, provider, kind, query, count):
+        try:
+            self.store(provider, kind, query, count, *call())
+        except Exception as e:
+            logger.warning(f"{provider} background refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def lookup(self, call, provider, kind, query, count) -> Optional[List[Dict[str, Any]]]:
+        # Cached results or None. A stale hit is still returned, and refreshed
+        # in the background with call() -> (results, complete), blocking.
+        results, fresh = self.get(provider, kind, query, count)
+        if results is None:
+            return None
+
+        logger.debug(f"{provider} {kind} cache hit for '{query}' ({'fresh' if fresh else 'stale'})")
+        if not fresh:
+            key = (self._key(provider, kind, query), count)
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                self._refresher.submit(self._refresh, key, call, provider, kind, query, count)
+        return results
+
+    def store(self, provider, kind, query, count, results: List[Dict[str, Any]], complete: bool = True):
+        if not complete:
+            logger.debug(f"{provider} {kind} results for '{query}' incomplete, not cached")
+        elif results:
+            self.put(provider, kind, query, count, results)
+
+    def cached(self, provider: str, kind: str, whole_page: bool = False):
+        # Decorator for provider methods taking query and count arguments,
+        # returning either a list or a generator of results. Empty results are
+        # never stored, since that's how providers report failures, and neither
+        # are those of a generator that returned INCOMPLETE.
+        # whole_page is for scrapers reading a single page: everything on it is
+        # parsed and stored, so asking for more later doesn't fetch it again.
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            def bind(args, kwargs):
+                arguments = signature.bind(*args, **kwargs)
+                arguments.apply_defaults()
+                return arguments
+
+            if inspect.isgeneratorfunction(func):
+                @functools.wraps(func)
+                def stream_wrapper(*args, **kwargs):
+                    arguments = bind(args, kwargs)
+                    query, count = arguments.arguments['query'], arguments.arguments['count']
+                    if whole_page and self.enabled:
+                        arguments.arguments['count'] = WHOLE_PAGE
+                    asked = arguments.arguments['count']
+
+                    def call():
+                        return func(*arguments.args, **arguments.kwargs)
+
+                    results = self.lookup(lambda: collect(call()), provider, kind, query, asked)
+                    if results is not None:
+                        yield from results[:count]
+                        return
+
+                    # Only a stream that ran to the end without failing is stored
+                    collected = []
+                    inner = call()
+                    try:
+                        while True:
+                            try:
+                                item = next(inner)
+                            except StopIteration as stop:
+                                complete = stop.value is not INCOMPLETE
+                                break
+                            collected.append(item)
+                            if len(collected) <= count:
+                                yield item
+                    finally:
+                        inner.close()
+                    self.store(provider, kind, query, asked, collected, complete)
+                return stream_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                arguments = bind(args, kwargs)
+                query, count = arguments.arguments['query'], arguments.arguments['count']
+                results = self.lookup(lambda: collect(func(*args, **kwargs)), provider, kind, query, count)
+                if results is not None:
+                    return results
+
+                results = func(*args, **kwargs)
+                self.store(provider, kind, query, count, results)
+                return results
+            return wrapper
+        return decorator
+
+
+result_cache = ResultCache()
@@ -0,0 +1,16 @@
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+# Previews scaled down for the result cards. The GUI's ThumbnailLoader reads
+# and writes them; the deduplicator hashes them and adds the ones it had to
+# fetch itself, so neither downloads a preview the other already has.
+THUMB_DIR = Path.home() / ".stock_parser" / "cache" / "thumbs"
+
+# Size of the preview area on a TiltCard; thumbnails cover it
+THUMB_WIDTH = 270
+THUMB_HEIGHT = 140
+
+
+def thumbnail_path(url: str, directory: Optional[Path] = None) -> Path:
+    return (directory or THUMB_DIR) / (hashlib.sha1(url.encode('utf-8')).hexdigest() + '.jpg')